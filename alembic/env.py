@@ -8,6 +8,7 @@ import app.models.user
 import app.models.thread
 import app.models.message
 import app.models.recipe
+import app.models.llm_usage
 from alembic import context
 from app.core.config import settings
 
@@ -0,0 +1,46 @@
+"""thread soft delete and cascading message foreign key
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("threads", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_threads_deleted_at",
+        "threads",
+        ["deleted_at"],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NOT NULL"),
+    )
+    # Let Postgres remove messages when a thread row is purged
+    op.drop_constraint("messages_thread_id_fkey", "messages", type_="foreignkey")
+    op.create_foreign_key(
+        "messages_thread_id_fkey",
+        "messages",
+        "threads",
+        ["thread_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("messages_thread_id_fkey", "messages", type_="foreignkey")
+    op.create_foreign_key(
+        "messages_thread_id_fkey", "messages", "threads", ["thread_id"], ["id"]
+    )
+    op.drop_index("ix_threads_deleted_at", table_name="threads")
+    op.drop_column("threads", "deleted_at")
@@ -0,0 +1,121 @@
+"""denormalized thread activity columns maintained by trigger
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "threads",
+        sa.Column("last_message_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+    )
+    op.add_column(
+        "threads",
+        sa.Column("message_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    )
+    op.add_column("threads", sa.Column("last_message_preview", sa.String(), nullable=True))
+
+    op.create_index(
+        "ix_messages_thread_id_created_at",
+        "messages",
+        ["thread_id", "created_at"],
+        unique=False,
+    )
+
+    # Backfill from existing messages
+    op.execute(
+        """
+        UPDATE threads t SET
+            message_count = s.message_count,
+            last_message_at = s.last_message_at,
+            last_message_preview = s.last_message_preview
+        FROM (
+            SELECT DISTINCT ON (thread_id)
+                thread_id,
+                count(*) OVER (PARTITION BY thread_id) AS message_count,
+                created_at AS last_message_at,
+                left(content, 200) AS last_message_preview
+            FROM messages
+            ORDER BY thread_id, created_at DESC
+        ) s
+        WHERE t.id = s.thread_id
+        """
+    )
+    op.execute(
+        "UPDATE threads SET last_message_at = created_at WHERE message_count = 0"
+    )
+
+    op.create_index(
+        "ix_threads_user_id_last_message_at",
+        "threads",
+        ["user_id", sa.text("last_message_at DESC")],
+        unique=False,
+        postgresql_where=sa.text("deleted_at IS NULL"),
+    )
+
+    # Keep the columns in sync atomically with every message insert/delete.
+    # Threads already soft-deleted are skipped so purges don't pay for it.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION messages_thread_activity() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE threads SET
+                    message_count = message_count + 1,
+                    last_message_preview = CASE
+                        WHEN NEW.created_at >= last_message_at THEN left(NEW.content, 200)
+                        ELSE last_message_preview
+                    END,
+                    last_message_at = GREATEST(last_message_at, NEW.created_at),
+                    updated_at = GREATEST(updated_at, NEW.created_at)
+                WHERE id = NEW.thread_id;
+                RETURN NEW;
+            END IF;
+
+            UPDATE threads SET
+                message_count = GREATEST(message_count - 1, 0),
+                last_message_at = COALESCE(
+                    (SELECT max(created_at) FROM messages WHERE thread_id = OLD.thread_id),
+                    created_at
+                ),
+                last_message_preview = (
+                    SELECT left(content, 200) FROM messages
+                    WHERE thread_id = OLD.thread_id
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                )
+            WHERE id = OLD.thread_id AND deleted_at IS NULL;
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER messages_thread_activity
+        AFTER INSERT OR DELETE ON messages
+        FOR EACH ROW EXECUTE FUNCTION messages_thread_activity()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS messages_thread_activity ON messages")
+    op.execute("DROP FUNCTION IF EXISTS messages_thread_activity()")
+    op.drop_index("ix_threads_user_id_last_message_at", table_name="threads")
+    op.drop_index("ix_messages_thread_id_created_at", table_name="messages")
+    op.drop_column("threads", "last_message_preview")
+    op.drop_column("threads", "message_count")
+    op.drop_column("threads", "last_message_at")
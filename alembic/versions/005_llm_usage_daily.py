@@ -0,0 +1,42 @@
+"""per-user daily LLM usage
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_usage_daily",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("agent", sa.String(), nullable=False),
+        sa.Column("model", sa.String(), nullable=False),
+        sa.Column("turns", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("llm_calls", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column("prompt_tokens", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("cached_prompt_tokens", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("completion_tokens", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("llm_seconds", sa.Float(), server_default=sa.text("0"), nullable=False),
+        sa.Column("ttft_seconds", sa.Float(), server_default=sa.text("0"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "day", "agent", "model"),
+    )
+    # Admin reports filter by day range across all users
+    op.create_index("ix_llm_usage_daily_day", "llm_usage_daily", ["day"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_usage_daily_day", table_name="llm_usage_daily")
+    op.drop_table("llm_usage_daily")
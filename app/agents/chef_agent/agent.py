@@ -1,27 +1,42 @@
 import json
-from dotenv import load_dotenv
 from langchain.agents import create_agent
 from app.agents.chef_agent.tools.web_search_tool import web_search
 from app.agents.chef_agent.prompt import CHEF_AGENT_PROMPT
 from app.agents.chef_agent.schemas import RecipeResponse
 from langchain_core.messages import AnyMessage, AIMessage, ToolMessage
+from app.core.cassettes import cassette_model
+from app.core.resources import resources
 from typing import List, Generator
 
-load_dotenv()
 
+def _build_chef_model():
+    from langchain_openai import ChatOpenAI  # heavy import, deferred to first build
 
-chef_agent = create_agent(
-    tools=[web_search],
-    model="gpt-5-nano",
-    system_prompt=CHEF_AGENT_PROMPT,
-    response_format=RecipeResponse,
-)
+    return cassette_model(ChatOpenAI(model="gpt-5-nano"), "chef")
+
+
+def _build_chef_agent():
+    return create_agent(
+        tools=[web_search],
+        model=resources.get("chef_model"),
+        system_prompt=CHEF_AGENT_PROMPT,
+        response_format=RecipeResponse,
+    )
+
+
+resources.register("chef_model", _build_chef_model)
+resources.register("chef_agent", _build_chef_agent)
+
+
+def get_chef_agent():
+    """Get the chef agent of this process (built on first use)."""
+    return resources.get("chef_agent")
 
   
 def stream_chef_agent(messages: List[AnyMessage], config: dict) -> Generator[str, None, None]:
     """Stream the chef agent response with structured JSON events"""
     
-    for token, metadata in chef_agent.stream(
+    for token, metadata in get_chef_agent().stream(
         {"messages": messages},
         stream_mode="messages",
     ):
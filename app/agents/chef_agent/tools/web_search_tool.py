@@ -1,15 +1,21 @@
 from langchain.tools import tool
-from tavily import TavilyClient
 from typing import Dict, Any
+from app.core.cassettes import cassette_search
 from app.core.config import settings
+from app.core.resources import resources
 
 
+def _build_tavily_client():
+    from tavily import TavilyClient  # deferred to first build
 
-tavily_client = TavilyClient(api_key=settings.tavily_api_key)
+    return cassette_search(TavilyClient(api_key=settings.tavily_api_key))
+
+
+resources.register("tavily_client", _build_tavily_client)
 
 
 @tool
 def web_search(text_query: str) -> Dict[str, Any]:
     """Search the web for recipes by text query"""
-    return tavily_client.search(text_query)
+    return resources.get("tavily_client").search(text_query)
 
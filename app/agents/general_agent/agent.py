@@ -1,39 +1,60 @@
 import json
-from dotenv import load_dotenv
 from langchain.agents import create_agent
 from app.agents.general_agent.prompt import GENERAL_AGENT_PROMPT
 from app.agents.general_agent.tools.chef_agent import call_chef_agent
 from app.agents.general_agent.tools.save_recipe_tool import save_recipe
-from app.agents.general_agent.middlewares import (
-    _drop_orphan_tool_calls,
-    _drop_orphan_tool_messages,
-    _trim_messages,
-    _user_language_prompt,
-)
-from app.agents.general_agent.checkpointer import checkpointer
+from app.agents.general_agent.middlewares import _sanitize_history, _user_language_prompt
+from app.agents.general_agent.checkpointer import get_checkpointer
 from langchain_core.messages import AnyMessage, AIMessage, ToolMessage
 from app.agents.general_agent.schemas import GeneralAgentContext
-from langchain_openai import ChatOpenAI
+from app.core.tracing import agent_callbacks
+from app.core.cassettes import cassette_model
+from app.core.config import settings
+from app.core.resources import resources
 from typing import List, Generator
 
-load_dotenv()
 
+def _build_general_model():
+    from langchain_openai import ChatOpenAI  # heavy import, deferred to first build
 
-model = ChatOpenAI(model="gpt-5-nano", temperature=0.3)
+    # Usage on the last streamed chunk feeds the token accounting
+    return cassette_model(ChatOpenAI(model="gpt-5-nano", temperature=0.3, stream_usage=True), "general")
+
+
+def _build_summary_model():
+    from langchain_openai import ChatOpenAI
+
+    return cassette_model(
+        ChatOpenAI(
+            model=settings.history_summary_model,
+            temperature=0,
+            max_tokens=settings.history_summary_max_tokens,
+            stream_usage=True,
+        ),
+        "summary",
+    )
+
+
+def _build_general_agent():
+    return create_agent(
+        tools=[call_chef_agent, save_recipe],
+        model=resources.get("general_model"),
+        system_prompt=GENERAL_AGENT_PROMPT,
+        checkpointer=get_checkpointer(),
+        context_schema=GeneralAgentContext,
+        middleware=[_sanitize_history, _user_language_prompt],
+    )
+
+
+resources.register("general_model", _build_general_model)
+resources.register("summary_model", _build_summary_model)
+resources.register("general_agent", _build_general_agent)
+
+
+def get_general_agent():
+    """Get the general agent of this process (built on first use)."""
+    return resources.get("general_agent")
 
-general_agent = create_agent(
-    tools=[call_chef_agent, save_recipe],
-    model=model,
-    system_prompt=GENERAL_AGENT_PROMPT,
-    checkpointer=checkpointer,
-    context_schema=GeneralAgentContext,
-    middleware=[
-        _drop_orphan_tool_calls,
-        _user_language_prompt,
-        _trim_messages,
-        _drop_orphan_tool_messages,
-    ],
-)
 
 def stream_general_agent(
     messages: List[AnyMessage],
@@ -41,10 +62,14 @@ def stream_general_agent(
     context: GeneralAgentContext,
 ) -> Generator[str, None, None]:
     """Stream the general agent response with structured JSON events."""
-    stream = general_agent.stream(
+    stream = get_general_agent().stream(
         {"messages": messages},
         stream_mode=["updates", "messages"],
-        config=config,
+        config={
+            **config,
+            "callbacks": [*agent_callbacks(), *config.get("callbacks", [])],
+            "metadata": {"agent": "general"},
+        },
         context=context,
     )
     for mode, chunk in stream:
@@ -4,11 +4,27 @@ PostgreSQL checkpointer for LangGraph agent state persistence.
 import logging
 from langgraph.checkpoint.postgres import PostgresSaver
 from app.core.config import settings
+from app.core.metrics import time_stage
+from app.core.tracing import tracer
+from app.core.resources import resources
 
 logger = logging.getLogger(__name__)
 
-_checkpointer_instance = None
-_context_manager = None
+
+class InstrumentedPostgresSaver(PostgresSaver):
+    """PostgresSaver that records checkpoint load/save times as chat stage metrics and spans."""
+
+    def get_tuple(self, config):
+        with tracer.start_as_current_span("checkpoint.get_tuple"), time_stage("checkpoint_load"):
+            return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with tracer.start_as_current_span("checkpoint.put"), time_stage("checkpoint_save"):
+            return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with tracer.start_as_current_span("checkpoint.put_writes"):
+            return super().put_writes(config, writes, task_id, task_path)
 
 
 def get_postgres_uri() -> str:
@@ -22,32 +38,30 @@ def get_postgres_uri() -> str:
     return uri
 
 
-def get_checkpointer() -> PostgresSaver:
+def _open_checkpointer() -> PostgresSaver:
     """
-    Get or create PostgreSQL checkpointer singleton.
-    
-    Note: setup() creates necessary tables. Should be called once on initialization.
-    PostgresSaver.from_conn_string() returns a context manager, so we need to enter it.
+    Connect the PostgreSQL checkpointer and make sure its tables exist.
+
+    PostgresSaver.from_conn_string() returns a context manager, so we need to enter it;
+    the connection is closed by the registry on shutdown.
     """
-    global _checkpointer_instance, _context_manager
-    
-    if _checkpointer_instance is None:
-        uri = get_postgres_uri()
-        # from_conn_string returns a context manager
-        _context_manager = PostgresSaver.from_conn_string(uri)
-        # Enter the context manager to get the actual checkpointer instance
-        _checkpointer_instance = _context_manager.__enter__()
-        
-        # Setup tables on first use (idempotent)
-        try:
-            _checkpointer_instance.setup()
-            logger.info("PostgreSQL checkpointer tables initialized")
-        except Exception as e:
-            logger.warning(f"Checkpointer setup warning: {e}")
-            # Continue anyway - tables might already exist
-    
-    return _checkpointer_instance
+    uri = get_postgres_uri()
+    checkpointer = InstrumentedPostgresSaver.from_conn_string(uri).__enter__()
+
+    # Setup tables on first use (idempotent)
+    try:
+        checkpointer.setup()
+        logger.info("PostgreSQL checkpointer tables initialized")
+    except Exception as e:
+        logger.warning(f"Checkpointer setup warning: {e}")
+        # Continue anyway - tables might already exist
+
+    return checkpointer
 
 
-# Create singleton instance
-checkpointer = get_checkpointer()
+resources.register("checkpointer", _open_checkpointer, close=lambda saver: saver.conn.close())
+
+
+def get_checkpointer() -> PostgresSaver:
+    """Get the PostgreSQL checkpointer of this process (connected on first use)."""
+    return resources.get("checkpointer")
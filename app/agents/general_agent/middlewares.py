@@ -1,13 +1,21 @@
+from functools import lru_cache
 from typing import Any
 
-from langchain.agents import AgentState
 from langchain.agents.middleware import before_agent, dynamic_prompt, ModelRequest
 from langchain.messages import RemoveMessage
+from langgraph.config import get_config
 from langgraph.runtime import Runtime
 
 from langchain_core.messages import AIMessage, ToolMessage
 
 from app.agents.general_agent.prompt import GENERAL_AGENT_PROMPT
+from app.agents.general_agent.schemas import GeneralAgentState
+from app.agents.general_agent.summary import cap_backlog, history_folder, transcript_entry
+from app.core.config import settings
+from app.core.metrics import HISTORY_EVICTED_MESSAGES, PROMPT_HISTORY_MESSAGES, PROMPT_HISTORY_TOKENS
+from app.core.resources import resources
+from app.utils.languages import DEFAULT_LANGUAGE, LANGUAGES, normalize_language
+from app.utils.tokens import message_tokens
 
 
 def _get_tool_call_ids(msg: AIMessage) -> set[str]:
@@ -20,84 +28,183 @@ def _get_tool_call_ids(msg: AIMessage) -> set[str]:
     return ids
 
 
-def _preceding_ai_has_tool_call(messages: list, i: int) -> bool:
-    """True if messages[i] is a ToolMessage and the preceding message is an AIMessage with a matching tool_call."""
-    if i <= 0 or i >= len(messages):
-        return False
-    msg = messages[i]
-    if not isinstance(msg, ToolMessage):
-        return False
-    prev = messages[i - 1]
-    if not isinstance(prev, AIMessage):
-        return False
-    tool_call_id = getattr(msg, "tool_call_id", None)
-    if not tool_call_id:
-        return False
-    return tool_call_id in _get_tool_call_ids(prev)
-
-
-@before_agent
-def _drop_orphan_tool_messages(state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
-    """Remove ToolMessages that do not follow an AIMessage with a matching tool_call.
-    Prevents OpenAI 400: messages with role 'tool' must be a response to a preceding message with 'tool_calls'.
-    Can occur after trimming when the preceding AIMessage was removed."""
-    messages = state.get("messages") or []
-    to_remove = [
-        m for i, m in enumerate(messages)
-        if isinstance(m, ToolMessage) and not _preceding_ai_has_tool_call(messages, i)
-    ]
-    if not to_remove:
-        return None
-    return {"messages": [RemoveMessage(id=m.id) for m in to_remove]}
+def _history_units(messages: list) -> tuple[list[list[int]], list[int]]:
+    """
+    Split the history into units in one pass, collecting the messages OpenAI would reject.
 
+    A unit is one message, or an AIMessage with tool_calls together with the
+    ToolMessages answering it (which must follow it directly). Dropped:
 
-@before_agent
-def _drop_orphan_tool_calls(state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
-    """Remove the last AIMessage if it has tool_calls with no following ToolMessages.
-    Prevents OpenAI 400: 'An assistant message with tool_calls must be followed by tool messages'."""
-    messages = state.get("messages") or []
-    if not messages:
-        return None
-    for i in range(len(messages) - 1, -1, -1):
+    - ToolMessages that do not answer a tool_call of the AIMessage they follow
+      (OpenAI 400: messages with role 'tool' must be a response to a preceding
+      message with 'tool_calls')
+    - AIMessages with a tool_call that is never answered (a cancelled or failed
+      turn), with the answers they did get (OpenAI 400: 'An assistant message
+      with tool_calls must be followed by tool messages')
+
+    Returns:
+        Indexes of the messages of each unit, and indexes of the messages to drop
+    """
+    units: list[list[int]] = []
+    dropped: list[int] = []
+    i, n = 0, len(messages)
+    while i < n:
         msg = messages[i]
-        if not isinstance(msg, AIMessage):
+        if isinstance(msg, ToolMessage):
+            dropped.append(i)
+            i += 1
             continue
-        tool_calls = getattr(msg, "tool_calls", None)
-        if not tool_calls:
-            continue
-        pending = _get_tool_call_ids(msg)
-        for j in range(i + 1, len(messages)):
-            if isinstance(messages[j], ToolMessage):
-                tid = getattr(messages[j], "tool_call_id", None)
-                if tid:
-                    pending.discard(tid)
+        pending = _get_tool_call_ids(msg) if isinstance(msg, AIMessage) else set()
+        unit = [i]
+        j = i + 1
+        if pending:
+            while j < n and isinstance(messages[j], ToolMessage):
+                tool_call_id = getattr(messages[j], "tool_call_id", None)
+                if tool_call_id in pending:
+                    pending.discard(tool_call_id)
+                    unit.append(j)
+                else:
+                    dropped.append(j)
+                j += 1
         if pending:
-            return {"messages": [RemoveMessage(id=msg.id)]}
-        break
-    return None
+            dropped.extend(unit)
+        else:
+            units.append(unit)
+        i = j
+    return units, dropped
+
+
+def history_token_budget(model: str) -> int:
+    """Tokens of history sent to `model` (HISTORY_TOKEN_BUDGETS entry, else HISTORY_TOKEN_BUDGET)."""
+    return settings.history_token_budgets.get(model, settings.history_token_budget)
+
+
+def _thread_id() -> str | None:
+    """Thread of the running graph, or None outside one (or without a checkpointer thread)."""
+    try:
+        return get_config()["configurable"].get("thread_id")
+    except RuntimeError:
+        return None
+
+
+@before_agent(state_schema=GeneralAgentState)
+def _sanitize_history(state: GeneralAgentState, runtime: Runtime) -> dict[str, Any] | None:
+    """Keep the newest history that fits the model's token budget, without orphan tool calls/results, in one update.
+
+    Trimming cuts between units, so it never leaves a ToolMessage without its
+    AIMessage (or the reverse); the most recent unit is always kept. Only the
+    window that can fit is inspected: everything before it is removed anyway.
+
+    With HISTORY_SUMMARY_ENABLED the evicted messages go, as transcript
+    text, to the thread's `history_backlog`, which is folded into `history_summary` in the
+    background (see `app.agents.general_agent.summary`); a finished fold is
+    applied here on the next turn. Eviction then goes
+    HISTORY_SUMMARY_BATCH_TOKENS below the budget, so folds run once per
+    batch of turns instead of on every turn of a long thread."""
+    messages = state.get("messages") or []
+    update: dict[str, Any] = {}
+    thread_id = _thread_id() if settings.history_summary_enabled else None
+    summary = state.get("history_summary", "")
+    backlog = list(state.get("history_backlog") or [])
+    if thread_id is not None:
+        folded = history_folder.take(thread_id, summary, backlog)
+        if folded is not None:
+            summary, count = folded
+            backlog = backlog[count:]
+            update["history_summary"] = summary
+            update["history_backlog"] = backlog
+
+    model = getattr(resources.get("general_model"), "model_name", None) or "unknown"
+    budget = history_token_budget(model)
+    counts: dict[int, int] = {}
+
+    def tokens(i: int) -> int:
+        if i not in counts:
+            counts[i] = message_tokens.count(messages[i], model)
+        return counts[i]
+
+    extra = 0
+    while True:
+        # Newest messages up to the budget, widened by the tokens dropped from them,
+        # starting at a unit head (the AIMessage whose results it would cut off)
+        window, total = len(messages), 0
+        while window > 0 and total <= budget + extra:
+            window -= 1
+            total += tokens(window)
+        while window > 0 and isinstance(messages[window], ToolMessage):
+            window -= 1
+        units, dropped = _history_units(messages[window:])
+        dropped_tokens = sum(tokens(window + i) for i in dropped)
+        if window == 0 or dropped_tokens <= extra:
+            break
+        extra = dropped_tokens
+
+    def keep(limit: int) -> tuple[int, int, int]:
+        """Index of the first message kept, and the tokens and messages kept."""
+        kept_tokens = kept_messages = 0
+        cut = len(messages)
+        for unit in reversed(units):
+            unit_tokens = sum(tokens(window + i) for i in unit)
+            if kept_messages and kept_tokens + unit_tokens > limit:
+                break
+            kept_tokens += unit_tokens
+            kept_messages += len(unit)
+            cut = window + unit[0]
+        return cut, kept_tokens, kept_messages
+
+    dropped_indexes = {window + i for i in dropped}
+    cut, kept_tokens, kept_messages = keep(budget)
+    summarize = thread_id is not None and any(i not in dropped_indexes for i in range(cut))
+    if summarize:
+        cut, kept_tokens, kept_messages = keep(budget - settings.history_summary_batch_tokens)
+    evicted = [i for i in range(cut) if i not in dropped_indexes]
+    to_remove = evicted + sorted(dropped_indexes)
+    PROMPT_HISTORY_TOKENS.labels(agent="general").observe(kept_tokens)
+    PROMPT_HISTORY_MESSAGES.labels(agent="general").observe(kept_messages)
+    if to_remove:
+        HISTORY_EVICTED_MESSAGES.labels(agent="general", reason="budget").inc(len(evicted))
+        HISTORY_EVICTED_MESSAGES.labels(agent="general", reason="orphan").inc(len(dropped_indexes))
+        update["messages"] = [RemoveMessage(id=messages[i].id) for i in to_remove]
+    if summarize:
+        backlog += [entry for entry in map(transcript_entry, (messages[i] for i in evicted)) if entry]
+        backlog, lost = cap_backlog(backlog)
+        if lost:
+            # Folds keep failing: the oldest messages are lost after all
+            HISTORY_EVICTED_MESSAGES.labels(agent="general", reason="unsummarized").inc(lost)
+        update["history_backlog"] = backlog
+    if thread_id is not None and backlog:
+        history_folder.start(thread_id, summary, backlog)
+    return update or None
+
+
+@lru_cache(maxsize=None)
+def _known_language_prompt(language: str) -> str:
+    """System prompt for a language of `LANGUAGES`: GENERAL_AGENT_PROMPT unchanged, then the language note."""
+    if language == DEFAULT_LANGUAGE:
+        return GENERAL_AGENT_PROMPT
+    return f"{GENERAL_AGENT_PROMPT} Only respond in {language}."
+
+
+def _language_prompt(language: str) -> str:
+    """System prompt for a `normalize_language` result.
+
+    Only the languages of `LANGUAGES` are memoized; a passed-through name is
+    user text, so its prompt is built per call (caching it would keep a copy
+    of the prompt per name ever sent) and quoted as a name."""
+    if language in LANGUAGES:
+        return _known_language_prompt(language)
+    return f'{GENERAL_AGENT_PROMPT} Only respond in the language named "{language}".'
 
 
 @dynamic_prompt
 def _user_language_prompt(request: ModelRequest) -> str:
-    """Generate system prompt based on user language."""
-    user_language = request.runtime.context.user_language
-    base_prompt = GENERAL_AGENT_PROMPT
-
-    if user_language != "English":
-        return f"{base_prompt} Only respond in {user_language}."
-    return base_prompt
-
-
-@before_agent
-def _trim_messages(state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
-    """Trim old messages, keeping only the last 10."""
-    messages = state["messages"]
-    
-    # If 10 or fewer messages, no trimming needed
-    if len(messages) <= 10:
-        return None
-    
-    # Remove messages BEFORE the last 10 (keep the recent ones)
-    messages_to_remove = messages[:-10]
-    
-    return {"messages": [RemoveMessage(id=m.id) for m in messages_to_remove]}
\ No newline at end of file
+    """Generate system prompt based on user language.
+
+    Most stable first, for the provider's prompt cache (a prefix match): the
+    static prompt, shared by every user, then the language (the same note for
+    every user of a language), then the thread's history summary."""
+    prompt = _language_prompt(normalize_language(request.runtime.context.user_language))
+    summary = request.state.get("history_summary")
+    if summary:
+        prompt = f"{prompt}\nSummary of the earlier conversation:\n{summary}\n"
+    return prompt
@@ -33,3 +33,11 @@ Tools (call ONLY when appropriate):
 
 - save_recipe(recipe): Call only when the user explicitly asks to save a recipe (e.g. "save that recipe") in a later message. Pass the full recipe object from context (the recipe from an earlier call_chef_agent result).
 """
+
+HISTORY_SUMMARY_PROMPT = """
+You keep the running summary of a conversation between a user and a culinary assistant. You get the current summary and the messages that are leaving the assistant's context; return the updated summary.
+
+Keep what the assistant needs later: dietary restrictions, allergies, likes and dislikes, ingredients and equipment at hand, servings, recipes already suggested (names only) and whether they were saved, open requests. Drop greetings, small talk and recipe details.
+
+Write terse notes in English, at most {max_tokens} tokens. Return only the summary.
+"""
@@ -1,8 +1,16 @@
-from typing import Optional
+from typing import NotRequired, Optional
 
+from langchain.agents import AgentState
 from pydantic import BaseModel, Field
 
 
 class GeneralAgentContext(BaseModel):
     user_language: str = Field(default="English")
-    user_id: Optional[int] = Field(default=None, description="Current user ID for save_recipe tool")
\ No newline at end of file
+    user_id: Optional[int] = Field(default=None, description="Current user ID for save_recipe tool")
+
+
+class GeneralAgentState(AgentState):
+    # Running summary of the messages evicted from the history window
+    history_summary: NotRequired[str]
+    # Transcript of the evicted messages not folded into the summary yet, one entry per message
+    history_backlog: NotRequired[list[str]]
@@ -0,0 +1,157 @@
+"""
+Running summary of the general agent's evicted history, folded in the background.
+
+Messages evicted from the history window go to the thread's
+`history_backlog` as transcript entries, one short line of text per message
+(in the agent state, so they survive restarts and reach whichever worker
+serves the next turn; text, not messages, so images and full recipe JSON
+are not checkpointed again). `HistoryFolder.start` folds the
+backlog into the summary with the summary model in a worker thread, off the
+turn's critical path; `HistoryFolder.take` hands the result to the next turn
+of the thread, which stores it and drops the folded messages from the
+backlog. A fold that fails, or whose result is lost (another worker, a
+restart), leaves the backlog as it was, to be folded again.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from app.agents.general_agent.prompt import HISTORY_SUMMARY_PROMPT
+from app.core.config import settings
+from app.core.resources import resources
+from app.core.tracing import agent_callbacks
+from app.utils.tokens import count_text_tokens
+
+logger = logging.getLogger(__name__)
+
+# Characters of each tool result (a recipe JSON) shown to the summary model
+SUMMARY_TOOL_RESULT_CHARS = 600
+# Characters of each user or assistant message (a full recipe answer)
+SUMMARY_MESSAGE_CHARS = 2000
+# Threads with a fold running or waiting for their next turn, in this process
+MAX_PENDING_FOLDS = 1024
+# Transcript kept for folding; past this (folds keep failing) the oldest entries go
+MAX_BACKLOG_TOKENS = 8000
+
+
+def _has_image(msg: BaseMessage) -> bool:
+    return isinstance(msg.content, list) and any(
+        isinstance(block, dict) and block.get("type") in ("image_url", "image") for block in msg.content
+    )
+
+
+def transcript_entry(msg: BaseMessage) -> str:
+    """Plain-text transcript of one message for the summary model ("" if it has nothing to tell).
+
+    Images become a placeholder; tool results and long messages are cut."""
+    if isinstance(msg, ToolMessage):
+        return f"Tool {msg.name or 'result'}: {msg.text[:SUMMARY_TOOL_RESULT_CHARS]}"
+    if isinstance(msg, AIMessage):
+        lines = [
+            f"Assistant called {call['name']}: {json.dumps(call['args'], ensure_ascii=False)}"
+            for call in msg.tool_calls
+        ]
+        if msg.text:
+            lines.append(f"Assistant: {msg.text[:SUMMARY_MESSAGE_CHARS]}")
+        return "\n".join(lines)
+    text = msg.text[:SUMMARY_MESSAGE_CHARS]
+    if _has_image(msg):
+        text = f"[image] {text}".rstrip()
+    return f"User: {text}" if text else ""
+
+
+def cap_backlog(backlog: list[str]) -> tuple[list[str], int]:
+    """
+    Newest entries of `backlog` within MAX_BACKLOG_TOKENS.
+
+    Returns:
+        The entries kept, and the number of oldest entries dropped
+    """
+    total, start = 0, len(backlog)
+    while start > 0:
+        total += count_text_tokens(backlog[start - 1], settings.history_summary_model)
+        if total > MAX_BACKLOG_TOKENS:
+            break
+        start -= 1
+    return backlog[start:], start
+
+
+def _digest(entries: list[str]) -> bytes:
+    return hashlib.blake2b("\0".join(entries).encode(), digest_size=16).digest()
+
+
+def summarize_history(summary: str, entries: list[str]) -> str:
+    """Fold the transcript `entries` into the running `summary` with the summary model."""
+    transcript = "\n".join(entries)
+    request = [
+        SystemMessage(HISTORY_SUMMARY_PROMPT.format(max_tokens=settings.history_summary_max_tokens)),
+        HumanMessage(f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"),
+    ]
+    response = resources.get("summary_model").invoke(
+        request, config={"callbacks": agent_callbacks(), "metadata": {"agent": "summary"}}
+    )
+    return response.text.strip() or summary
+
+
+@dataclass
+class _Fold:
+    future: Future
+    summary: str  # summary the fold started from
+    count: int  # backlog entries it covers, oldest first
+    digest: bytes  # of those entries
+
+
+class HistoryFolder:
+    """Background summary folds, one per thread at a time."""
+
+    def __init__(self) -> None:
+        self._folds: OrderedDict[str, _Fold] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self, thread_id: str, summary: str, backlog: list[str]) -> None:
+        """Fold `backlog` into `summary` in the background, unless a fold of the thread is already running."""
+        with self._lock:
+            fold = self._folds.get(thread_id)
+            if fold is not None and not fold.future.done():
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+            future = self._executor.submit(summarize_history, summary, list(backlog))
+            self._folds[thread_id] = _Fold(future, summary, len(backlog), _digest(backlog))
+            self._folds.move_to_end(thread_id)
+            while len(self._folds) > MAX_PENDING_FOLDS:
+                self._folds.popitem(last=False)
+
+    def take(self, thread_id: str, summary: str, backlog: list[str]) -> Optional[tuple[str, int]]:
+        """
+        Result of the thread's finished fold, if it still applies to the thread's state.
+
+        Returns:
+            (new summary, number of backlog entries it covers), or None when no
+            fold finished, it failed, or the state moved on without it
+        """
+        with self._lock:
+            fold = self._folds.get(thread_id)
+            if fold is None or not fold.future.done():
+                return None
+            del self._folds[thread_id]
+        try:
+            new_summary = fold.future.result()
+        except Exception as exc:
+            logger.warning("History summary update failed, folding again next turn: %s", exc)
+            return None
+        if fold.summary != summary or len(backlog) < fold.count or _digest(backlog[:fold.count]) != fold.digest:
+            return None
+        return new_summary, fold.count
+
+
+# Singleton instance
+history_folder = HistoryFolder()
@@ -1,12 +1,16 @@
 from langchain.tools import tool
-from app.agents.chef_agent.agent import chef_agent
+from app.agents.chef_agent.agent import get_chef_agent
 from langchain_core.messages import HumanMessage
 
 
 @tool
 def call_chef_agent(message: str) -> str: 
     """Call the chef agent to generate one recipe based on the user's ingredients and instructions."""
-    response = chef_agent.invoke({"messages": [HumanMessage(content=message)]})
+    # Runs inherit the caller's callbacks; the metadata labels them as the chef agent's
+    response = get_chef_agent().invoke(
+        {"messages": [HumanMessage(content=message)]},
+        config={"metadata": {"agent": "chef"}},
+    )
     
     # Return structured response if available, otherwise fall back to message content
     if response.get("structured_response"):
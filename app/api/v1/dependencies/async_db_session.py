@@ -1,9 +1,20 @@
+from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db_config.db_async_session import async_session
+from app.db_config.db_async_session import async_session, replica_session
+from app.db_config.read_routing import read_router
 
 
 async def get_async_db() -> AsyncSession:
     async with async_session() as session:
         yield session
+
+
+async def get_replica_db() -> Optional[AsyncSession]:
+    """Session on the read replica, or None when unconfigured or lagging."""
+    if not await read_router.replica_healthy():
+        yield None
+        return
+    async with replica_session() as session:
+        yield session
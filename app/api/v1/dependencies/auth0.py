@@ -8,9 +8,13 @@ from jose import jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.dependencies.async_db_session import get_async_db
+from app.api.v1.dependencies.async_db_session import get_async_db, get_replica_db
+from app.core.cache import read_cache
 from app.core.config import settings
+from app.core.metrics import time_stage
+from app.db_config.read_routing import read_router
 from app.models.user import User
+from app.schemas.user import UserOut
 
 # Auth0 configuration
 auth0_domain = settings.auth0_domain
@@ -92,11 +96,13 @@ def verify_jwt(token: str) -> Dict:
 
 def get_token_payload(token: str = Security(oauth2_scheme)) -> Dict:
     """Dependency that verifies the token and returns its decoded payload."""
-    return verify_jwt(token)
+    with time_stage("auth"):
+        return verify_jwt(token)
 
 
 async def get_current_user(
     db: AsyncSession = Depends(get_async_db),
+    replica_db: Optional[AsyncSession] = Depends(get_replica_db),
     token_data: Dict = Depends(get_token_payload),
     raw_token: str = Security(oauth2_scheme),
 ) -> User:
@@ -104,9 +110,23 @@ async def get_current_user(
     if not auth0_sub:
         raise HTTPException(status_code=401, detail="Token missing 'sub' claim.")
 
-    # Try to find existing user by auth0_id
-    result = await db.execute(select(User).where(User.auth0_id == auth0_sub))
-    user = result.scalar_one_or_none()
+    # Try to find existing user by auth0_id (cached; returns a detached User)
+    # from the replica when available; a user created or updated moments ago
+    # may only be on the primary, so a replica miss is re-checked there.
+    async def _load_user() -> Optional[Dict]:
+        query = select(User).where(User.auth0_id == auth0_sub)
+        found = None
+        if replica_db is not None and not await read_router.wrote_recently(auth0_sub):
+            found = (await replica_db.execute(query)).scalar_one_or_none()
+        if found is None:
+            found = (await db.execute(query)).scalar_one_or_none()
+        return UserOut.model_validate(found).model_dump() if found else None
+
+    with time_stage("user_lookup"):
+        cached = await read_cache.get_or_load(
+            "user", auth0_sub, "profile", _load_user, ttl=settings.cache_user_ttl_seconds
+        )
+    user = User(**cached) if cached else None
 
     if user is None:
         # Pull claims
@@ -153,6 +173,8 @@ async def get_current_user(
         db.add(user)
         await db.commit()
         await db.refresh(user)
+        await read_cache.invalidate("user", auth0_sub)
+        await read_router.record_write(auth0_sub)
 
     return user
 
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.dependencies.async_db_session import get_async_db, get_replica_db
+from app.api.v1.dependencies.auth0 import get_current_user
+from app.db_config.read_routing import read_router
+from app.models.user import User
+
+
+async def get_read_db(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    replica_db: Optional[AsyncSession] = Depends(get_replica_db),
+) -> AsyncSession:
+    """
+    Session for read-only endpoints: the replica when it may serve this user.
+
+    Falls back to the primary session when no replica is configured, the
+    replica lags too far, or the user wrote recently (read-your-writes).
+    """
+    if await read_router.use_replica(current_user.id) and replica_db is not None:
+        return replica_db
+    return db
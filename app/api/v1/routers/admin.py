@@ -0,0 +1,109 @@
+"""
+Admin router - operational endpoints guarded by `settings.admin_permission`.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.dependencies.async_db_session import get_async_db
+from app.api.v1.dependencies.auth0 import require_permission
+from app.core.cache import read_cache
+from app.core.config import settings
+from app.core.profiling import profile_store
+from app.core.rate_limit import chat_limiter
+from app.db_config.read_routing import read_router
+from app.schemas.admin import (
+    CacheStatsOut,
+    ProfileOut,
+    RateLimitStatsOut,
+    ReadRoutingOut,
+    UsageRowOut,
+)
+from app.schemas.health import DrainStatusOut
+from app.services.drain_service import drain_service
+from app.services.usage_service import UsageService
+
+router = APIRouter(dependencies=[Depends(require_permission(settings.admin_permission))])
+
+
+@router.get("/cache", response_model=CacheStatsOut)
+async def cache_stats() -> CacheStatsOut:
+    """Read cache hit rate and latency for the worker serving this request (`/metrics` has every worker's)."""
+    return CacheStatsOut(**read_cache.stats.as_dict())
+
+
+@router.get("/rate-limits", response_model=RateLimitStatsOut)
+async def rate_limit_stats() -> RateLimitStatsOut:
+    """Chat rate-limit and concurrency decisions for the worker serving this request (`/metrics` has every worker's)."""
+    return RateLimitStatsOut(**chat_limiter.stats.as_dict())
+
+
+@router.get("/drain", response_model=DrainStatusOut)
+async def drain_status() -> DrainStatusOut:
+    """Shutdown drain progress (in-flight chat turns) of the worker serving this request."""
+    return DrainStatusOut(**drain_service.status())
+
+
+@router.get("/replica", response_model=ReadRoutingOut)
+async def replica_status() -> ReadRoutingOut:
+    """Read replica lag and read routing decisions of the worker serving this request."""
+    return ReadRoutingOut(**read_router.status())
+
+
+@router.get("/usage", response_model=List[UsageRowOut])
+async def usage(
+    start: Optional[date] = Query(None, description="First UTC day (default: 6 days before end)"),
+    end: Optional[date] = Query(None, description="Last UTC day (default: today)"),
+    user_id: Optional[int] = Query(None),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+) -> List[UsageRowOut]:
+    """
+    Per-user daily LLM usage by agent and model, newest day first.
+
+    Rows still buffered in the workers (up to `USAGE_FLUSH_SECONDS`) are not
+    included yet.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=6)
+    rows = await UsageService(db).get_usage(start, end, user_id=user_id, limit=limit)
+    return [
+        UsageRowOut(
+            user_id=row.user_id,
+            day=row.day,
+            agent=row.agent,
+            model=row.model,
+            turns=row.turns,
+            llm_calls=row.llm_calls,
+            prompt_tokens=row.prompt_tokens,
+            cached_prompt_tokens=row.cached_prompt_tokens,
+            completion_tokens=row.completion_tokens,
+            llm_seconds=row.llm_seconds,
+            avg_ttft_ms=1000 * row.ttft_seconds / row.turns if row.turns else None,
+            tokens_per_second=row.completion_tokens / row.llm_seconds if row.llm_seconds else None,
+            updated_at=row.updated_at,
+        )
+        for row in rows
+    ]
+
+
+@router.get("/profiles", response_model=List[ProfileOut])
+async def list_profiles() -> List[ProfileOut]:
+    """Request profiles stored on this host (`X-Profile: 1` requests), newest first."""
+    return [ProfileOut(**meta) for meta in profile_store.list()]
+
+
+@router.get("/profiles/{profile_id}", response_class=Response)
+async def download_profile(profile_id: UUID) -> Response:
+    """Folded stacks of a profile (open in speedscope, or render with flamegraph.pl)."""
+    folded = profile_store.read(profile_id.hex)
+    if folded is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return Response(
+        content=folded,
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id.hex}.folded"'},
+    )
@@ -5,7 +5,10 @@ This router is kept thin, delegating business logic to ChatService.
 """
 import logging
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile, status
 
 logger = logging.getLogger(__name__)
 from fastapi.responses import StreamingResponse
@@ -13,10 +16,50 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.dependencies.auth0 import get_current_user
 from app.api.v1.dependencies.async_db_session import get_async_db
+from app.core.metrics import track_stream
+from app.core.rate_limit import chat_limiter
+from app.core.stream_bus import stream_bus
 from app.services.chat_service import chat_service
+from app.services.drain_service import drain_service
 
 router = APIRouter()
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "X-Accel-Buffering": "no",
+    "Connection": "keep-alive",
+}
+
+
+class ChatStreamResponse(StreamingResponse):
+    """
+    SSE response that runs `cleanup` once the response is over, however it ends.
+
+    The body generators release the stream lease and the turn in their
+    `finally`, but a generator that never started (the client left before
+    the first chunk) never runs it, and one left suspended at a `yield` only
+    runs it when garbage-collected. So the response closes the body, then
+    runs the cleanups, which are idempotent.
+    """
+
+    def __init__(self, content, cleanup: list[Callable[[], Awaitable[None]]]) -> None:
+        super().__init__(content, media_type="text/event-stream", headers=SSE_HEADERS)
+        self._cleanup = cleanup
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            except Exception:
+                logger.exception("Closing the chat stream failed")
+            for cleanup in self._cleanup:
+                try:
+                    await cleanup()
+                except Exception:
+                    logger.exception("Chat stream cleanup failed")
+
 
 @router.post("/stream")
 async def stream_chat(
@@ -26,36 +69,88 @@ async def stream_chat(
     user_language: str = Form("English", description="User's preferred response language"),
     _user = Depends(get_current_user),
     db: AsyncSession = Depends(get_async_db),
-) -> StreamingResponse:
+) -> ChatStreamResponse:
     """
     Stream the chef agent response.
     
     User must be authenticated. Accepts text message and optional image.
     Messages are automatically saved to the database.
+
+    Rate-limited per user (429 with `Retry-After` when too many requests or
+    concurrent streams); 503 with `Retry-After` while the server restarts. Other tabs can follow the turn with
+    `GET /{thread_id}/stream` and stop it with `POST /{thread_id}/cancel`.
     
     - **thread_id**: Unique conversation thread identifier
     - **message**: Text message from the user
     - **image**: Optional image file (jpeg, png, webp, gif)
-    - **user_language**: Preferred response language (default: English)
+    - **user_language**: Preferred response language, as a name or code such as `pt-BR`; unrecognized names are passed through as a quoted name of up to three words of letters and hyphens, 32 characters at most (default: English)
     """
-    # Process image if provided
-    image_base64, image_type = await chat_service.process_image(image)
+    try:
+        thread_id = str(UUID(thread_id))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="Invalid thread_id.")
+
+    drain_service.check_accepting()
+    lease = await chat_limiter.acquire(_user.id)
+    try:
+        # Process image if provided
+        image_base64, image_type = await chat_service.process_image(image)
+        turn = await stream_bus.start_turn(thread_id, _user.id)
+    except BaseException:
+        await lease.release()
+        raise
 
     # Stream with message persistence (headers avoid buffering so client gets token-by-token)
-    return StreamingResponse(
-        chat_service.stream_with_persistence(
+    return ChatStreamResponse(
+        lease.wrap(track_stream("turn", turn.relay(chat_service.stream_with_persistence(
             message=message,
             thread_id=thread_id,
             user_id=_user.id,
             db=db,
             image_base64=image_base64,
             image_type=image_type,
-            user_language=user_language
-        ),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "X-Accel-Buffering": "no",
-            "Connection": "keep-alive",
-        },
+            user_language=user_language,
+            cancel_event=turn.cancelled,
+        )))),
+        cleanup=[turn.finish, lease.release],
     )
+
+
+@router.get("/{thread_id}/stream")
+async def follow_chat(
+    thread_id: UUID,
+    _user = Depends(get_current_user),
+) -> ChatStreamResponse:
+    """
+    Follow the response currently being generated for a thread.
+
+    Served by any worker: replays the turn's events so far, then streams new
+    ones until the turn ends. 404 if no response is being generated.
+    """
+    drain_service.check_accepting()
+    lease = await chat_limiter.acquire(_user.id)
+    try:
+        events = await stream_bus.follow(str(thread_id), _user.id)
+    except BaseException:
+        await lease.release()
+        raise
+    if events is None:
+        await lease.release()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No response is being generated for this thread.")
+    return ChatStreamResponse(lease.wrap(track_stream("follower", events)), cleanup=[lease.release])
+
+
+@router.post("/{thread_id}/cancel", status_code=status.HTTP_202_ACCEPTED)
+async def cancel_chat(
+    thread_id: UUID,
+    _user = Depends(get_current_user),
+) -> Response:
+    """
+    Stop the response currently being generated for a thread.
+
+    The worker running the turn is signalled (on any node); the stream ends
+    with a `cancelled` event and the partial answer is saved.
+    """
+    if not await stream_bus.cancel(str(thread_id), _user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No response is being generated for this thread.")
+    return Response(status_code=status.HTTP_202_ACCEPTED)
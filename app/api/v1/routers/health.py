@@ -0,0 +1,43 @@
+"""
+Health router - liveness and readiness probes (served at the root, unauthenticated).
+"""
+from fastapi import APIRouter, Response, status
+
+from app.schemas.health import HealthOut, ReadinessOut, WarmUpStepOut
+from app.services.drain_service import drain_service
+from app.services.warmup_service import warmup_service
+
+router = APIRouter()
+
+
+@router.get("/healthz", response_model=HealthOut)
+async def healthz() -> HealthOut:
+    """Liveness: the process is up and its event loop is serving requests."""
+    return HealthOut()
+
+
+@router.get("/readyz", response_model=ReadinessOut)
+async def readyz(response: Response) -> ReadinessOut:
+    """
+    Readiness: 200 once this worker's warm-up has finished, 503 before and
+    while it drains for shutdown.
+
+    Reports state, duration and attempts of each warm-up component.
+    """
+    ready = warmup_service.ready and not drain_service.draining
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessOut(
+        ready=ready,
+        draining=drain_service.draining,
+        warmup_seconds=warmup_service.seconds,
+        components={
+            name: WarmUpStepOut(
+                state=step.state,
+                seconds=step.seconds,
+                attempts=step.attempts,
+                error=step.error,
+            )
+            for name, step in warmup_service.steps.items()
+        },
+    )
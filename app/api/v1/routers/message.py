@@ -1,16 +1,20 @@
 """
 Message router - handles message endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from app.api.v1.dependencies.auth0 import get_current_user
 from app.api.v1.dependencies.async_db_session import get_async_db
+from app.api.v1.dependencies.read_db import get_read_db
 from app.models.user import User as UserModel
 from app.schemas.message import MessageCreate, MessageOut
 from app.services.message_service import MessageService
+from app.utils.etag import etag_headers, etag_matches, make_etag, not_modified
+from app.utils.fieldsets import parse_fields, partial_schema
+from app.utils.serialization import json_response
 
 router = APIRouter()
 
@@ -45,36 +49,54 @@ async def create_message(
 @router.get("/thread/{thread_id}", response_model=List[MessageOut])
 async def get_messages(
     thread_id: UUID,
-    db: AsyncSession = Depends(get_async_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,role,content"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_user),
-) -> List[MessageOut]:
+) -> Response:
     """
     Get all messages for a thread.
     
-    The thread must belong to the current user.
+    The thread must belong to the current user. Use `fields` to return only
+    some fields (e.g. skip `recipes` when only rendering text). Supports
+    conditional GET: a matching `If-None-Match` returns 304.
     """
-    messages = await MessageService(db).get_messages(thread_id, current_user.id)
-    return [MessageOut.model_validate(msg) for msg in messages]
+    selected = parse_fields(fields, MessageOut)
+    service = MessageService(db)
+    version = await service.get_thread_version(thread_id, current_user.id)
+    if version is None:
+        return json_response(List[MessageOut], [])
+    etag = make_etag(thread_id, version, selected)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    rows = await service.get_message_rows(thread_id, current_user.id, selected)
+    schema = MessageOut if selected is None else partial_schema(MessageOut, selected)
+    response = json_response(List[schema], rows)
+    response.headers.update(etag_headers(etag))
+    return response
 
 
 @router.get("/{message_id}", response_model=MessageOut)
 async def get_message(
     message_id: UUID,
-    db: AsyncSession = Depends(get_async_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,role,content"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_user),
-) -> MessageOut:
+) -> Response:
     """
     Get a specific message by ID.
     
     The message's thread must belong to the current user.
     """
-    message = await MessageService(db).get_message(message_id, current_user.id)
-    if not message:
+    selected = parse_fields(fields, MessageOut)
+    row = await MessageService(db).get_message_row(message_id, current_user.id, selected)
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Message not found or you don't have access to it"
         )
-    return MessageOut.model_validate(message)
+    schema = MessageOut if selected is None else partial_schema(MessageOut, selected)
+    return json_response(schema, row)
 
 
 @router.delete("/{message_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,15 @@
+"""
+Metrics router - Prometheus scrape endpoint (served at the root, unauthenticated).
+"""
+from fastapi import APIRouter, Response
+
+from app.core.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus metrics of this worker (of all workers in multiprocess mode)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
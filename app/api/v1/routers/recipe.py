@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from app.api.v1.dependencies.auth0 import get_current_user
 from app.api.v1.dependencies.async_db_session import get_async_db
-from app.schemas.recipe import Recipe, RecipeCreate, RecipeUpdate
+from app.api.v1.dependencies.read_db import get_read_db
+from app.core.config import settings
+from app.schemas.recipe import Recipe, RecipeCreate, RecipeImportResult, RecipeUpdate
 from app.services.recipe_service import RecipeService
 from app.models.user import User as UserModel
+from app.utils.etag import etag_headers, etag_matches, make_etag, not_modified
+from app.utils.fieldsets import parse_fields, partial_schema
+from app.utils.ndjson import iter_ndjson_lines
+from app.utils.serialization import json_response
 
 router = APIRouter()
 
@@ -24,21 +31,71 @@ async def create_recipe(
 
 @router.get("/", response_model=List[Recipe])
 async def list_recipes(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,total_time"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserModel = Depends(get_current_user),
+) -> Response:
+    """
+    List all recipes for the current user (optionally only the given `fields`).
+
+    Supports conditional GET: a matching `If-None-Match` returns 304.
+    """
+    selected = parse_fields(fields, Recipe)
+    service = RecipeService(db)
+    etag = make_etag(await service.get_recipes_version(current_user.id), selected)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    rows = await service.get_recipe_rows(current_user.id, selected)
+    schema = Recipe if selected is None else partial_schema(Recipe, selected)
+    response = json_response(List[schema], rows)
+    response.headers.update(etag_headers(etag))
+    return response
+
+
+@router.get("/export")
+async def export_recipes(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserModel = Depends(get_current_user),
+) -> StreamingResponse:
+    """Stream all recipes for the current user as NDJSON (one recipe per line)."""
+    return StreamingResponse(
+        RecipeService(db).export_recipes_ndjson(current_user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="recipes.ndjson"'},
+    )
+
+
+@router.post("/import", response_model=RecipeImportResult)
+async def import_recipes(
+    request: Request,
     db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_user),
-) -> List[Recipe]:
-    """List all recipes for the current user."""
-    return await RecipeService(db).get_recipes(current_user.id)
+) -> RecipeImportResult:
+    """
+    Bulk-import recipes from an NDJSON body (one `RecipeCreate` per line).
+
+    The body is read incrementally; invalid lines (and lines over
+    `RECIPE_IMPORT_MAX_LINE_BYTES`) are skipped and reported, and so are the
+    lines of a batch the database rejects.
+    """
+    return await RecipeService(db).import_recipes(
+        iter_ndjson_lines(request.stream(), settings.recipe_import_max_line_bytes), current_user.id
+    )
 
 
 @router.get("/{recipe_id}", response_model=Recipe)
 async def get_recipe_by_id(
     recipe_id: UUID,
-    db: AsyncSession = Depends(get_async_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,total_time"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_user),
-) -> Recipe:
-    """Get a recipe by ID."""
-    return await RecipeService(db).get_recipe_by_id(recipe_id, current_user.id)
+) -> Response:
+    """Get a recipe by ID (optionally only the given `fields`)."""
+    selected = parse_fields(fields, Recipe)
+    recipe = await RecipeService(db).get_recipe_data(recipe_id, current_user.id, selected)
+    schema = Recipe if selected is None else partial_schema(Recipe, selected)
+    return json_response(schema, recipe)
 
 
 @router.patch("/{recipe_id}", response_model=Recipe)
@@ -1,18 +1,23 @@
 """
 Thread router - handles conversation thread endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from app.api.v1.dependencies.auth0 import get_current_user
 from app.api.v1.dependencies.async_db_session import get_async_db
+from app.api.v1.dependencies.read_db import get_read_db
 from app.models.user import User as UserModel
 from app.models.thread import Thread as ThreadModel
-from app.schemas.thread import ThreadCreate, ThreadOut
+from app.schemas.thread import ThreadBulkDeleteOut, ThreadCreate, ThreadOut
 from app.schemas.message import MessageOut
 from app.services.thread_service import ThreadService
+from app.utils.etag import etag_headers, etag_matches, make_etag, not_modified
+from app.utils.fieldsets import parse_fields, partial_schema
+from app.utils.serialization import json_response
 
 router = APIRouter()
 
@@ -31,42 +36,67 @@ async def create_thread(
         user_id=thread.user_id,
         created_at=thread.created_at,
         updated_at=thread.updated_at,
+        last_message_at=thread.last_message_at,
+        message_count=thread.message_count,
+        last_message_preview=thread.last_message_preview,
         messages=[MessageOut.model_validate(msg) for msg in messages]
     )
 
 
 @router.get("/", response_model=List[ThreadOut])
 async def get_threads(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,last_message_at,last_message_preview"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserModel = Depends(get_current_user),
+) -> Response:
+    """
+    Get all threads for the current user, most recently active first.
+
+    Use `fields` to return only some fields; messages are only loaded when
+    `messages` is requested. Supports conditional GET: a matching
+    `If-None-Match` returns 304.
+    """
+    selected = parse_fields(fields, ThreadOut)
+    service = ThreadService(db)
+    etag = make_etag(await service.get_threads_version(current_user.id), selected)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    rows = await service.get_thread_rows(current_user.id, selected)
+    schema = ThreadOut if selected is None else partial_schema(ThreadOut, selected)
+    response = json_response(List[schema], rows)
+    response.headers.update(etag_headers(etag))
+    return response
+
+
+@router.delete("/", response_model=ThreadBulkDeleteOut)
+async def delete_threads(
+    older_than: datetime = Query(..., description="Delete threads with no activity since this time"),
     db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_user),
-) -> List[ThreadOut]:
-    """Get all threads for the current user."""
-    threads = await ThreadService(db).get_threads(current_user.id)
-    return [
-        ThreadOut(
-            id=thread.id,
-            user_id=thread.user_id,
-            created_at=thread.created_at,
-            updated_at=thread.updated_at,
-            messages=[MessageOut.model_validate(msg) for msg in (thread.messages or [])]
-        )
-        for thread in threads
-    ]
+) -> ThreadBulkDeleteOut:
+    """Delete all of the current user's threads with no activity since `older_than`."""
+    deleted = await ThreadService(db).delete_threads_older_than(current_user.id, older_than)
+    return ThreadBulkDeleteOut(deleted=deleted)
 
 
 @router.get("/{thread_id}", response_model=ThreadOut)
 async def get_thread(
     thread_id: UUID,
-    db: AsyncSession = Depends(get_async_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,message_count"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: UserModel = Depends(get_current_user),
-) -> ThreadOut:
+) -> ThreadOut | Response:
     """Get a specific thread by ID (must belong to current user)."""
-    thread = await ThreadService(db).get_thread(thread_id, current_user.id)
+    selected = parse_fields(fields, ThreadOut)
+    thread = await ThreadService(db).get_thread(thread_id, current_user.id, selected)
     if not thread:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Thread not found"
         )
+    if selected is not None:
+        return json_response(partial_schema(ThreadOut, selected), thread)
     # Access messages while in async context
     messages = thread.messages if hasattr(thread, 'messages') else []
     return ThreadOut(
@@ -74,6 +104,9 @@ async def get_thread(
         user_id=thread.user_id,
         created_at=thread.created_at,
         updated_at=thread.updated_at,
+        last_message_at=thread.last_message_at,
+        message_count=thread.message_count,
+        last_message_preview=thread.last_message_preview,
         messages=[MessageOut.model_validate(msg) for msg in messages]
     )
 
@@ -11,6 +11,8 @@ from app.api.v1.dependencies.auth0 import (
     update_user_email,
 )
 from app.api.v1.dependencies.async_db_session import get_async_db
+from app.core.cache import read_cache
+from app.db_config.read_routing import read_router
 from app.models.user import User as UserModel
 from app.schemas.user import UserOut, UserUpdate
 
@@ -84,6 +86,8 @@ async def update_current_user(
             raise HTTPException(status_code=400, detail="Email already in use") from e
         raise
     await db.refresh(user)
+    await read_cache.invalidate("user", user.auth0_id)
+    await read_router.record_write(user.auth0_id)
 
     return user
 
@@ -0,0 +1,301 @@
+"""
+Read-through cache for user-scoped collections.
+
+Entries live in one Redis hash per (namespace, owner), e.g.
+`cache:recipes:42`, with one hash field per query variant (fields, ids). A
+write only has to delete that single key to invalidate every variant.
+
+- Stampedes: concurrent misses for the same entry share one load in this
+  process, and a short Redis lock lets one worker load while the others poll.
+- Races with writes: each (namespace, owner) has a generation counter,
+  `cache:recipes:42:gen`, that `invalidate` increments. A load stores its
+  result only if the generation is still the one read before loading
+  (atomically, in a Lua script), so a load that read rows from before a
+  write cannot put them back after the write's invalidation.
+- TTL: the hash expires `ttl` after its first variant was stored; later
+  variants do not extend it.
+- Failures: any Redis error bypasses the cache (straight to Postgres) and
+  pauses Redis use for `settings.cache_retry_seconds`.
+- Metrics: hits, misses, stores, fenced stores, errors and latency go to
+  Prometheus per namespace (`chef_cache_*`, aggregated over workers);
+  `stats` keeps the same numbers for this worker only.
+"""
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic_core import from_json, to_json
+
+from app.core.config import settings
+from app.core.metrics import (
+    CACHE_ERRORS,
+    CACHE_LOAD_SECONDS,
+    CACHE_LOOKUP_SECONDS,
+    CACHE_LOOKUPS,
+    CACHE_STORES,
+)
+from app.core.redis import InMemoryRedis, get_redis, get_sync_redis
+
+logger = logging.getLogger(__name__)
+
+_MISS = object()
+
+# Outlives any load by far: a generation that expired and restarted at 0
+# during a load could let a stale result through
+GENERATION_TTL_SECONDS = 24 * 3600
+
+STORE_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+if redis.call('TTL', KEYS[1]) < 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+end
+return 1
+"""
+
+
+class CacheStats:
+    """Counters and latency totals for cache lookups in this worker (see `/admin/cache`)."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.bypassed = 0
+        self.discarded = 0
+        self.lookup_seconds = 0.0
+        self.load_seconds = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "bypassed": self.bypassed,
+            "discarded": self.discarded,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_lookup_ms": 1000 * self.lookup_seconds / lookups if lookups else 0.0,
+            "avg_load_ms": 1000 * self.load_seconds / self.misses if self.misses else 0.0,
+        }
+
+
+class ReadCache:
+    """Redis-backed read cache with invalidation, stampede guard and fallback."""
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+        self._inflight: dict[tuple[str, str], asyncio.Future] = {}
+        self._disabled_until = 0.0
+        self._store_script: Any = None
+        self._store_script_client: Any = None
+
+    @staticmethod
+    def key(namespace: str, owner: Any) -> str:
+        """Redis key holding all cached variants for one owner."""
+        return f"cache:{namespace}:{owner}"
+
+    @staticmethod
+    def generation_key(key: str) -> str:
+        """Redis key of the invalidation counter for the entry at `key`."""
+        return f"{key}:gen"
+
+    @staticmethod
+    def variant(*parts: Any) -> str:
+        """Hash field for a query variant, e.g. variant("list", ("id", "name"))."""
+        return ":".join(
+            "*" if part is None else ",".join(part) if isinstance(part, (tuple, list)) else str(part)
+            for part in parts
+        )
+
+    def _available(self) -> bool:
+        return settings.cache_enabled and time.monotonic() >= self._disabled_until
+
+    def _on_error(self, namespace: str, exc: Exception) -> None:
+        self.stats.errors += 1
+        CACHE_ERRORS.labels(namespace=namespace).inc()
+        self._disabled_until = time.monotonic() + settings.cache_retry_seconds
+        logger.warning("Cache unavailable, falling back to Postgres: %s", exc)
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        owner: Any,
+        variant: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """
+        Return the cached value for (namespace, owner, variant) or load and cache it.
+
+        Args:
+            namespace: Collection name, e.g. "recipes"
+            owner: Owner id the entry is scoped to (user id, auth0 sub)
+            variant: Query variant within the owner's entry (e.g. requested fields)
+            loader: Coroutine factory that reads from Postgres; its result must be
+                JSON-serializable (UUIDs and datetimes become strings)
+            ttl: Entry TTL in seconds (defaults to settings.cache_ttl_seconds)
+
+        Returns:
+            The cached or freshly loaded value (decoded from JSON on hits)
+        """
+        if not self._available():
+            self.stats.bypassed += 1
+            CACHE_LOOKUPS.labels(namespace=namespace, result="bypassed").inc()
+            return await loader()
+
+        key = self.key(namespace, owner)
+        inflight = self._inflight.get((key, variant))
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[(key, variant)] = future
+        try:
+            value = await self._get_or_load(
+                namespace, key, variant, loader, ttl or settings.cache_ttl_seconds
+            )
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else awaited it
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop((key, variant), None)
+
+    async def _get_or_load(
+        self, namespace: str, key: str, variant: str, loader: Callable[[], Awaitable[Any]], ttl: float
+    ) -> Any:
+        client = get_redis()
+        lock_key = f"{key}:lock:{variant}"
+        have_lock = False
+        try:
+            cached = await self._lookup(namespace, client, key, variant)
+            if cached is not _MISS:
+                return cached
+            # Another worker may be loading the same entry; wait for it briefly
+            have_lock = bool(await client.set(lock_key, 1, px=settings.cache_lock_timeout_ms, nx=True))
+            if not have_lock:
+                for _ in range(settings.cache_lock_poll_attempts):
+                    await asyncio.sleep(settings.cache_lock_poll_interval)
+                    cached = await self._lookup(namespace, client, key, variant, count_miss=False)
+                    if cached is not _MISS:
+                        return cached
+            # Read before loading: a write invalidating from now on changes it
+            generation = int(await client.get(self.generation_key(key)) or 0)
+        except Exception as exc:
+            self._on_error(namespace, exc)
+            return await loader()
+
+        try:
+            start = time.perf_counter()
+            value = await loader()
+            elapsed = time.perf_counter() - start
+            self.stats.load_seconds += elapsed
+            CACHE_LOAD_SECONDS.labels(namespace=namespace).observe(elapsed)
+            try:
+                stored = await self._store(client, key, variant, generation, to_json(value), ttl)
+            except Exception as exc:
+                self._on_error(namespace, exc)
+            else:
+                if not stored:
+                    self.stats.discarded += 1
+                CACHE_STORES.labels(namespace=namespace, outcome="stored" if stored else "fenced").inc()
+            return value
+        finally:
+            if have_lock:
+                try:
+                    await client.delete(lock_key)
+                except Exception as exc:
+                    self._on_error(namespace, exc)
+
+    async def _store(
+        self, client: Any, key: str, variant: str, generation: int, value: bytes, ttl: float
+    ) -> bool:
+        """Store `value` unless the entry was invalidated since `generation` was read."""
+        gen_key = self.generation_key(key)
+        if isinstance(client, InMemoryRedis):
+            with client.atomic():
+                if int(client.get_sync(gen_key) or 0) != generation:
+                    return False
+                client.hset_sync(key, variant, value)
+                client.expire_sync(key, ttl, nx=True)
+                return True
+        if self._store_script is None or self._store_script_client is not client:
+            self._store_script = client.register_script(STORE_SCRIPT)
+            self._store_script_client = client
+        return bool(await self._store_script(
+            keys=[key, gen_key], args=[generation, variant, value, math.ceil(ttl)]
+        ))
+
+    async def _lookup(
+        self, namespace: str, client: Any, key: str, variant: str, count_miss: bool = True
+    ) -> Any:
+        start = time.perf_counter()
+        raw = await client.hget(key, variant)
+        elapsed = time.perf_counter() - start
+        self.stats.lookup_seconds += elapsed
+        CACHE_LOOKUP_SECONDS.labels(namespace=namespace).observe(elapsed)
+        if raw is None:
+            if count_miss:
+                self.stats.misses += 1
+                CACHE_LOOKUPS.labels(namespace=namespace, result="miss").inc()
+            return _MISS
+        self.stats.hits += 1
+        CACHE_LOOKUPS.labels(namespace=namespace, result="hit").inc()
+        return from_json(raw)
+
+    async def invalidate(self, namespace: str, *owners: Any) -> None:
+        """Drop every cached variant for the given owners, and fence off loads in flight."""
+        if not settings.cache_enabled or not owners:
+            return
+        client = get_redis()
+        keys = [self.key(namespace, owner) for owner in owners]
+        try:
+            if isinstance(client, InMemoryRedis):
+                self._invalidate_memory(client, keys)
+                return
+            async with client.pipeline(transaction=True) as pipe:
+                for key in keys:
+                    pipe.incr(self.generation_key(key))
+                    pipe.expire(self.generation_key(key), GENERATION_TTL_SECONDS)
+                pipe.delete(*keys)
+                await pipe.execute()
+        except Exception as exc:
+            self._on_error(namespace, exc)
+
+    def invalidate_sync(self, namespace: str, *owners: Any) -> None:
+        """Like `invalidate`, for sync callers (e.g. LangGraph tools in worker threads)."""
+        if not settings.cache_enabled or not owners:
+            return
+        client = get_sync_redis()
+        keys = [self.key(namespace, owner) for owner in owners]
+        try:
+            if isinstance(client, InMemoryRedis):
+                self._invalidate_memory(client, keys)
+                return
+            with client.pipeline(transaction=True) as pipe:
+                for key in keys:
+                    pipe.incr(self.generation_key(key))
+                    pipe.expire(self.generation_key(key), GENERATION_TTL_SECONDS)
+                pipe.delete(*keys)
+                pipe.execute()
+        except Exception as exc:
+            self._on_error(namespace, exc)
+
+    def _invalidate_memory(self, client: InMemoryRedis, keys: list[str]) -> None:
+        with client.atomic():
+            for key in keys:
+                client.incr_sync(self.generation_key(key))
+                client.expire_sync(self.generation_key(key), GENERATION_TTL_SECONDS)
+            client.delete_sync(*keys)
+
+
+# Singleton instance
+read_cache = ReadCache()
@@ -0,0 +1,386 @@
+"""
+Record/replay ("cassettes") of the chat model and web search calls.
+
+With `settings.cassette_mode`:
+
+- `record`: calls go to OpenAI and Tavily as usual; each request is saved
+  with its response and timing under `settings.cassette_dir` (streamed
+  responses chunk by chunk, with the time each chunk took)
+- `replay`: nothing leaves the process; each request is answered from the
+  recording that matches it, sleeping the recorded timing multiplied by
+  `settings.cassette_time_scale` (1: original timing, 0: no delays). A
+  request without a recording raises `CassetteMissError`
+- `off` (default): the clients are used unwrapped
+
+Requests match on normalized content: the message roles, text (whitespace
+collapsed) and tool calls (name and arguments, not their random ids), the
+bound tool names and the structured output schema. When code changes the
+system prompt, the tools or what a tool returns, a replayed request no
+longer matches exactly; it then falls back to the recording of the same
+conversation (the non-system messages without the tool results), so
+recorded conversations can be replayed through new code.
+
+Recordings contain the users' conversations; keep the directory private.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, ClassVar, Iterator, Optional, TypeVar
+
+from langchain_core.messages import (
+    AIMessageChunk,
+    BaseMessage,
+    ToolMessage,
+    message_chunk_to_message,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M")
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+
+class CassetteMissError(LookupError):
+    """Replay mode got a request that has no recording."""
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+
+def _text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _content(content: Any) -> Any:
+    if isinstance(content, str):
+        return _text(content)
+    blocks = []
+    for block in content:
+        if isinstance(block, str):
+            blocks.append(_text(block))
+        elif block.get("type") == "text":
+            blocks.append(_text(block.get("text", "")))
+        else:
+            # Images, reasoning, ...: compared by digest, without their ids
+            blocks.append({"type": block.get("type"), "digest": _digest({k: v for k, v in block.items() if k != "id"})})
+    return blocks
+
+
+def normalize_messages(messages: list[BaseMessage], conversation_only: bool = False) -> list[dict[str, Any]]:
+    """
+    Messages reduced to what identifies a request.
+
+    Args:
+        messages: Request messages
+        conversation_only: Drop system messages and the content of tool results
+    """
+    normalized = []
+    for message in messages:
+        if conversation_only and message.type == "system":
+            continue
+        entry: dict[str, Any] = {"role": message.type}
+        if isinstance(message, ToolMessage):
+            entry["name"] = message.name
+        if not (conversation_only and isinstance(message, ToolMessage)):
+            entry["content"] = _content(message.content)
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            entry["tool_calls"] = [{"name": call["name"], "args": call["args"]} for call in tool_calls]
+        normalized.append(entry)
+    return normalized
+
+
+def _tool_name(tool: Any) -> str:
+    if isinstance(tool, dict):
+        return (tool.get("function") or {}).get("name") or tool.get("name") or tool.get("type", "")
+    return getattr(tool, "name", None) or getattr(tool, "__name__", str(tool))
+
+
+def _schema_name(response_format: Any) -> Optional[str]:
+    if response_format is None:
+        return None
+    if isinstance(response_format, dict):
+        return (response_format.get("json_schema") or {}).get("name") or response_format.get("type")
+    return getattr(response_format, "__name__", str(response_format))
+
+
+class Cassette:
+    """Recordings of one client ("general", "chef", "tavily"), one JSON file per conversation key."""
+
+    def __init__(self, name: str, directory: Optional[str] = None):
+        self.name = name
+        self.directory = Path(directory or settings.cassette_dir) / name
+        self._lock = threading.Lock()
+
+    def _path(self, group: str) -> Path:
+        return self.directory / f"{group}.json"
+
+    def _load(self, group: str) -> list[dict[str, Any]]:
+        try:
+            return json.loads(self._path(group).read_text())["takes"]
+        except FileNotFoundError:
+            return []
+
+    def find(
+        self,
+        request: dict[str, Any],
+        group_request: Optional[dict[str, Any]] = None,
+        kind: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Recording of `request` (preferably of the same `kind`), else the latest one recorded for `group_request`.
+
+        Raises:
+            CassetteMissError: Nothing recorded for it
+        """
+        key = _digest(request)
+        takes = self._load(_digest(group_request or request))
+        exact = [take for take in takes if take["key"] == key]
+        for take in exact:
+            if take.get("kind") == kind:
+                return take
+        if exact:
+            return exact[-1]
+        if takes:
+            logger.debug("Cassette %s: no exact match for %s, replaying the conversation's recording", self.name, key)
+            return ([take for take in takes if take.get("kind") == kind] or takes)[-1]
+        raise CassetteMissError(f"No {self.name} recording for request {key} in {self.directory}")
+
+    def save(self, request: dict[str, Any], take: dict[str, Any], group_request: Optional[dict[str, Any]] = None) -> None:
+        """Store a recording, replacing an earlier one of the same request and kind."""
+        take = {
+            "key": _digest(request),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "request": request,
+            **take,
+        }
+        group = _digest(group_request or request)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            takes = [t for t in self._load(group) if (t["key"], t.get("kind")) != (take["key"], take.get("kind"))]
+            takes.append(take)
+            path = self._path(group)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"takes": takes}, indent=1, default=str))
+            tmp.replace(path)
+
+    @staticmethod
+    def delay(seconds: float) -> float:
+        """Replay delay for a recorded duration."""
+        return max(0.0, seconds * settings.cassette_time_scale)
+
+
+def _chunk_to_dict(chunk: ChatGenerationChunk, offset: float) -> dict[str, Any]:
+    entry = {"offset": round(offset, 6), "message": message_to_dict(chunk.message)}
+    if chunk.generation_info:
+        entry["generation_info"] = chunk.generation_info
+    return entry
+
+
+def _replay_chunks(take: dict[str, Any]) -> Iterator[tuple[float, ChatGenerationChunk]]:
+    """(delay before it, chunk) of a recording, streamed or not."""
+    previous = 0.0
+    for entry in take["chunks"]:
+        message = messages_from_dict([entry["message"]])[0]
+        if not isinstance(message, AIMessageChunk):
+            message = AIMessageChunk(
+                content=message.content,
+                additional_kwargs=message.additional_kwargs,
+                response_metadata=message.response_metadata,
+                id=message.id,
+                usage_metadata=message.usage_metadata,
+                tool_call_chunks=[
+                    {"id": call["id"], "name": call["name"], "args": json.dumps(call["args"]), "index": i}
+                    for i, call in enumerate(message.tool_calls)
+                ],
+            )
+        yield Cassette.delay(entry["offset"] - previous), ChatGenerationChunk(
+            message=message, generation_info=entry.get("generation_info")
+        )
+        previous = entry["offset"]
+
+
+def _replay_result(take: dict[str, Any]) -> tuple[float, ChatResult]:
+    """(delay, result) of a recording, streamed or not."""
+    if take["kind"] == "generate":
+        entry = take["chunks"][0]
+        message = messages_from_dict([entry["message"]])[0]
+        generation = ChatGeneration(message=message, generation_info=entry.get("generation_info"))
+    else:
+        merged = None
+        for _, chunk in _replay_chunks(take):
+            merged = chunk if merged is None else merged + chunk
+        generation = ChatGeneration(message=message_chunk_to_message(merged.message), generation_info=merged.generation_info)
+    return Cassette.delay(take["elapsed"]), ChatResult(generations=[generation], llm_output=take.get("llm_output"))
+
+
+class CassetteChatModel:
+    """
+    Mixin recording or replaying a chat model's `_generate`/`_stream` calls.
+
+    Used through `cassette_model()`, which puts it in front of the model's
+    own class, so everything else (tool binding, structured output, model
+    profile, tracing parameters) is the wrapped model's.
+    """
+
+    cassette: ClassVar[Cassette]
+
+    def _cassette_requests(self, messages: list[BaseMessage], kwargs: dict[str, Any]) -> tuple[dict, dict]:
+        request = {
+            "model": getattr(self, "model_name", None),
+            "messages": normalize_messages(messages),
+            "tools": sorted(_tool_name(tool) for tool in kwargs.get("tools") or []),
+            "response_format": _schema_name(kwargs.get("response_format")),
+        }
+        return request, {"messages": normalize_messages(messages, conversation_only=True)}
+
+    def _save_stream(self, requests: tuple[dict, dict], chunks: list[dict], elapsed: float) -> None:
+        request, group = requests
+        self.cassette.save(request, {"kind": "stream", "elapsed": round(elapsed, 6), "chunks": chunks}, group)
+
+    def _save_result(self, requests: tuple[dict, dict], result: ChatResult, elapsed: float) -> None:
+        request, group = requests
+        generation = result.generations[0]
+        entry = {"offset": round(elapsed, 6), "message": message_to_dict(generation.message)}
+        if generation.generation_info:
+            entry["generation_info"] = generation.generation_info
+        take = {"kind": "generate", "elapsed": round(elapsed, 6), "chunks": [entry], "llm_output": result.llm_output}
+        self.cassette.save(request, take, group)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        requests = self._cassette_requests(messages, kwargs)
+        if settings.cassette_mode == "replay":
+            delay, result = _replay_result(self.cassette.find(*requests, kind="generate"))
+            time.sleep(delay)
+            return result
+        start = time.perf_counter()
+        result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self._save_result(requests, result, time.perf_counter() - start)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        requests = self._cassette_requests(messages, kwargs)
+        if settings.cassette_mode == "replay":
+            delay, result = _replay_result(self.cassette.find(*requests, kind="generate"))
+            await asyncio.sleep(delay)
+            return result
+        start = time.perf_counter()
+        result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        await asyncio.to_thread(self._save_result, requests, result, time.perf_counter() - start)
+        return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        requests = self._cassette_requests(messages, kwargs)
+        if settings.cassette_mode == "replay":
+            for delay, chunk in _replay_chunks(self.cassette.find(*requests, kind="stream")):
+                time.sleep(delay)
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        # Time spent inside the model's stream only, not while the consumer holds a chunk
+        chunks, elapsed = [], 0.0
+        stream = super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(stream)
+            except StopIteration:
+                break
+            elapsed += time.perf_counter() - start
+            chunks.append(_chunk_to_dict(chunk, elapsed))
+            yield chunk
+        self._save_stream(requests, chunks, elapsed)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        requests = self._cassette_requests(messages, kwargs)
+        if settings.cassette_mode == "replay":
+            for delay, chunk in _replay_chunks(self.cassette.find(*requests, kind="stream")):
+                await asyncio.sleep(delay)
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        chunks, elapsed = [], 0.0
+        stream = super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs)
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = await anext(stream)
+            except StopAsyncIteration:
+                break
+            elapsed += time.perf_counter() - start
+            chunks.append(_chunk_to_dict(chunk, elapsed))
+            yield chunk
+        await asyncio.to_thread(self._save_stream, requests, chunks, elapsed)
+
+
+_model_classes: dict[tuple[type, str], type] = {}
+
+
+def cassette_model(model: M, name: str) -> M:
+    """
+    `model` recording to / replaying from the `name` cassette, per `settings.cassette_mode`.
+
+    Returns `model` itself when cassettes are off.
+    """
+    if settings.cassette_mode == "off":
+        return model
+    if settings.cassette_mode not in CASSETTE_MODES:
+        raise ValueError(f"CASSETTE_MODE must be one of {', '.join(CASSETTE_MODES)}, not {settings.cassette_mode!r}")
+    model_class = type(model)
+    cls = _model_classes.get((model_class, name))
+    if cls is None:
+        cls = _model_classes[(model_class, name)] = type(
+            f"Cassette{model_class.__name__}",
+            (CassetteChatModel, model_class),
+            {"__module__": __name__, "__annotations__": {"cassette": ClassVar[Cassette]}, "cassette": Cassette(name)},
+        )
+    wrapped = model.model_copy()
+    # Same fields and clients, with the cassette methods in front of the model's own
+    object.__setattr__(wrapped, "__class__", cls)
+    logger.info("Chat model %s: cassette %s (%s)", name, settings.cassette_mode, cls.cassette.directory)
+    return wrapped
+
+
+class CassetteSearchClient:
+    """Tavily client whose `search()` records to / replays from a cassette."""
+
+    def __init__(self, client: Any, cassette: Cassette):
+        self.client = client
+        self.cassette = cassette
+
+    def search(self, query: str, **kwargs: Any) -> dict:
+        request = {"query": _text(query.casefold()), "kwargs": kwargs}
+        if settings.cassette_mode == "replay":
+            take = self.cassette.find(request)
+            time.sleep(Cassette.delay(take["elapsed"]))
+            return take["response"]
+        start = time.perf_counter()
+        response = self.client.search(query, **kwargs)
+        self.cassette.save(request, {"elapsed": round(time.perf_counter() - start, 6), "response": response})
+        return response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+
+def cassette_search(client: M, name: str = "tavily") -> M:
+    """`client` with `search()` recording to / replaying from the `name` cassette; itself when cassettes are off."""
+    if settings.cassette_mode == "off":
+        return client
+    if settings.cassette_mode not in CASSETTE_MODES:
+        raise ValueError(f"CASSETTE_MODE must be one of {', '.join(CASSETTE_MODES)}, not {settings.cassette_mode!r}")
+    return CassetteSearchClient(client, Cassette(name))
@@ -0,0 +1,190 @@
+"""
+Event loop lag monitor and blocking-call detector.
+
+Every handler, SSE stream and background worker of a process shares one
+event loop, so any blocking call on it (a sync HTTP or database call, CPU
+work) stalls all of them.
+
+- A task on the loop wakes up every `settings.loop_monitor_interval_seconds`
+  and records how late it woke up in `chef_event_loop_lag_seconds`.
+- A watchdog thread notices when that task has not run for longer than
+  `settings.loop_block_threshold_ms`, captures the stack of the loop thread
+  (the blocking frame is at the bottom) and logs it with the method and path
+  of the request whose task is blocking, once per stall.
+- With `settings.loop_blocking_strict` (for tests and local debugging) known
+  blocking calls (`time.sleep`, `requests`, sync `httpx`, sync `psycopg`)
+  raise `BlockingCallError` when made on the event loop thread.
+"""
+import asyncio
+import functools
+import importlib
+import logging
+import sys
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+from app.core.metrics import EVENT_LOOP_LAG_SECONDS, EVENT_LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+# Scope of the request handled by the current task (set by LoopMonitorMiddleware)
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+# (module, attribute path) of calls that block the calling thread
+BLOCKING_CALLS = (
+    ("time", "sleep"),
+    ("requests.sessions", "Session.request"),
+    ("httpx", "Client.send"),
+    ("psycopg", "Connection.execute"),
+    ("psycopg", "Cursor.execute"),
+)
+
+
+class BlockingCallError(RuntimeError):
+    """A blocking call was made on the event loop thread (strict mode)."""
+
+
+class LoopMonitorMiddleware:
+    """ASGI middleware exposing the request scope to the watchdog through a context variable."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+
+class LoopMonitor:
+    """Measures event loop lag and logs the stack of stalls."""
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._heartbeat = time.monotonic()
+        self._last_lag = 0.0
+
+    def start(self) -> None:
+        """Start the lag probe on the running event loop and the watchdog thread (idempotent)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the lag probe and the watchdog thread."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval = settings.loop_monitor_interval_seconds
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self._last_lag = max(0.0, loop.time() - start - interval)
+            EVENT_LOOP_LAG_SECONDS.observe(self._last_lag)
+            self._heartbeat = time.monotonic()
+
+    def _watch(self) -> None:
+        interval = settings.loop_monitor_interval_seconds
+        threshold = settings.loop_block_threshold_ms / 1000
+        stalled = False
+        while not self._stopped.wait(min(interval, threshold) / 2):
+            blocked = time.monotonic() - self._heartbeat - interval
+            if blocked <= threshold:
+                if stalled:
+                    logger.warning("Event loop unblocked; the lag probe woke %.0f ms late", 1000 * self._last_lag)
+                    stalled = False
+                continue
+            if not stalled:  # report each stall once
+                stalled = True
+                EVENT_LOOP_STALLS.inc()
+                self._report(blocked)
+
+    def _report(self, blocked: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "(no frame)\n"
+        task = asyncio.current_task(self._loop)
+        scope = task.get_context().get(_request_scope) if task is not None else None
+        request = f"{scope['method']} {scope['path']}" if scope and scope.get("type") == "http" else "no request"
+        logger.warning(
+            "Event loop blocked for %.0f ms (task %s, %s); loop thread stack:\n%s",
+            1000 * blocked,
+            task.get_name() if task is not None else "none",
+            request,
+            stack,
+        )
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _guard(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    def guarded(*args: Any, **kwargs: Any) -> Any:
+        if _on_event_loop():
+            raise BlockingCallError(f"{name} called on the event loop thread; use its async variant or a thread")
+        return fn(*args, **kwargs)
+
+    guarded.__wrapped_blocking__ = fn
+    return guarded
+
+
+def forbid_blocking_calls() -> list[str]:
+    """
+    Make the calls in `BLOCKING_CALLS` raise `BlockingCallError` on an event loop thread.
+
+    Calls from worker threads are unaffected. Modules that are not installed
+    are skipped.
+
+    Returns:
+        Names of the guarded calls
+    """
+    guarded = []
+    for module_name, path in BLOCKING_CALLS:
+        try:
+            owner: Any = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        *parents, attr = path.split(".")
+        for parent in parents:
+            owner = getattr(owner, parent)
+        fn = getattr(owner, attr)
+        if not hasattr(fn, "__wrapped_blocking__"):
+            setattr(owner, attr, _guard(f"{module_name}.{path}", fn))
+        guarded.append(f"{module_name}.{path}")
+    return guarded
+
+
+# Singleton instance
+loop_monitor = LoopMonitor()
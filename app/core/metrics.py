@@ -0,0 +1,377 @@
+"""
+Prometheus metrics, exposed at `/metrics`.
+
+- HTTP: requests, latency and in-progress requests per route template (never
+  the raw path, so IDs do not become label values)
+- chat stages: `chef_chat_stage_seconds{stage}` for auth, user_lookup,
+  message_insert, checkpoint_load, checkpoint_save, first_token (from the
+  agent call to its first text) and persist
+- chat streams: duration, outcome and in-flight count of turns and followers,
+  and cancellations
+- event loop: scheduling lag and stalls above the blocking threshold,
+  recorded by the loop monitor
+- LLM calls and tools: latency, outcomes, token usage, prompt size, prompt
+  cache hits and output tokens per second labelled by agent
+  ("general", "chef", "summary"), model and tool name, recorded by `MetricsCallbackHandler`
+- chat history: estimated tokens and messages kept for the general agent's
+  model call and messages evicted (over budget, orphan tool calls/results,
+  dropped from the summary backlog)
+- chat limits: requests turned away by reason (rate: token bucket,
+  concurrency: open-stream cap), limiter Redis errors and stream leases held
+- read cache: lookups by result (hit, miss, bypassed), loads stored or
+  fenced off by a concurrent invalidation, errors, and lookup and load
+  latency, labelled by namespace ("recipes", ...)
+
+Labels only take values from small fixed sets (route templates, stage names,
+agent/tool/model and cache namespace names defined in code). With several workers set
+`PROMETHEUS_MULTIPROC_DIR` to an empty directory shared by the workers so
+`/metrics` aggregates all of them.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Chat turns and tool calls take seconds to minutes
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Prompt sizes
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+
+HTTP_REQUESTS = Counter(
+    "chef_http_requests_total",
+    "HTTP requests by route template, method and status code.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "chef_http_request_seconds",
+    "HTTP request latency until the last body byte, by route template.",
+    ["method", "route"],
+    buckets=FAST_BUCKETS + (30, 60, 120, 300),
+)
+HTTP_IN_PROGRESS = Gauge(
+    "chef_http_requests_in_progress",
+    "HTTP requests currently being served.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+CHAT_STAGE_SECONDS = Histogram(
+    "chef_chat_stage_seconds",
+    "Time spent in each stage of a chat turn.",
+    ["stage"],
+    buckets=FAST_BUCKETS + (30, 60, 120, 300),
+)
+CHAT_STAGE_ERRORS = Counter(
+    "chef_chat_stage_errors_total",
+    "Chat turn stages that raised.",
+    ["stage"],
+)
+CHAT_CANCELLATIONS = Counter(
+    "chef_chat_cancellations_total",
+    "Chat turns stopped by a cancel request or the shutdown drain.",
+)
+CHAT_STREAMS = Counter(
+    "chef_chat_streams_total",
+    "Finished chat streams by kind (turn, follower) and outcome (completed, disconnected, error).",
+    ["kind", "outcome"],
+)
+CHAT_STREAM_SECONDS = Histogram(
+    "chef_chat_stream_seconds",
+    "Chat stream duration by kind (turn, follower).",
+    ["kind"],
+    buckets=SLOW_BUCKETS,
+)
+CHAT_STREAMS_IN_FLIGHT = Gauge(
+    "chef_chat_streams_in_flight",
+    "Open chat streams by kind (turn, follower).",
+    ["kind"],
+    multiprocess_mode="livesum",
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "chef_event_loop_lag_seconds",
+    "Delay of the loop monitor's periodic wake-up past its deadline (event loop lag).",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_STALLS = Counter(
+    "chef_event_loop_stalls_total",
+    "Times the event loop was blocked longer than the blocking threshold.",
+)
+
+LLM_REQUESTS = Counter(
+    "chef_llm_requests_total",
+    "LLM calls by agent, model and outcome.",
+    ["agent", "model", "outcome"],
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "chef_llm_request_seconds",
+    "LLM call latency by agent and model.",
+    ["agent", "model"],
+    buckets=SLOW_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "chef_llm_tokens_total",
+    "LLM tokens by agent, model and type (input, output).",
+    ["agent", "model", "type"],
+)
+LLM_OUTPUT_TOKENS_PER_SECOND = Histogram(
+    "chef_llm_output_tokens_per_second",
+    "Output tokens per second of LLM call time, by agent and model.",
+    ["agent", "model"],
+    buckets=(5, 10, 20, 35, 50, 75, 100, 150, 200, 300, 500),
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "chef_llm_prompt_tokens",
+    "Input tokens per LLM call, by agent and model.",
+    ["agent", "model"],
+    buckets=TOKEN_BUCKETS,
+)
+LLM_CACHED_PROMPT_TOKENS = Counter(
+    "chef_llm_cached_prompt_tokens_total",
+    "Input tokens served from the provider's prompt cache, by agent and model.",
+    ["agent", "model"],
+)
+PROMPT_HISTORY_TOKENS = Histogram(
+    "chef_prompt_history_tokens",
+    "Estimated tokens of the chat history kept for a model call, by agent.",
+    ["agent"],
+    buckets=TOKEN_BUCKETS,
+)
+PROMPT_HISTORY_MESSAGES = Histogram(
+    "chef_prompt_history_messages",
+    "Messages of chat history kept for a model call, by agent.",
+    ["agent"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+HISTORY_EVICTED_MESSAGES = Counter(
+    "chef_history_evicted_messages_total",
+    "Messages removed from chat history, by agent and reason (budget, orphan, unsummarized).",
+    ["agent", "reason"],
+)
+TOOL_CALLS = Counter(
+    "chef_tool_calls_total",
+    "Agent tool calls by agent, tool and outcome.",
+    ["agent", "tool", "outcome"],
+)
+TOOL_SECONDS = Histogram(
+    "chef_tool_seconds",
+    "Agent tool latency (call_chef_agent, web_search, save_recipe, ...).",
+    ["agent", "tool"],
+    buckets=SLOW_BUCKETS,
+)
+
+
+CHAT_LIMIT_REJECTIONS = Counter(
+    "chef_chat_limit_rejections_total",
+    "Chat requests turned away with 429, by reason (rate: token bucket, concurrency: open-stream cap).",
+    ["reason"],
+)
+CHAT_LIMIT_ERRORS = Counter(
+    "chef_chat_limit_errors_total",
+    "Redis errors that made the chat limiter fall back to per-process limits.",
+)
+CHAT_STREAM_LEASES = Gauge(
+    "chef_chat_stream_leases",
+    "Concurrent-stream slots currently held.",
+    multiprocess_mode="livesum",
+)
+
+CACHE_LOOKUPS = Counter(
+    "chef_cache_lookups_total",
+    "Read cache lookups by namespace and result (hit, miss, bypassed: cache disabled or Redis unavailable).",
+    ["namespace", "result"],
+)
+CACHE_STORES = Counter(
+    "chef_cache_stores_total",
+    "Loaded values by namespace and outcome (stored, fenced: discarded after a concurrent invalidation).",
+    ["namespace", "outcome"],
+)
+CACHE_ERRORS = Counter(
+    "chef_cache_errors_total",
+    "Redis errors that made the read cache fall back to Postgres, by namespace.",
+    ["namespace"],
+)
+CACHE_LOOKUP_SECONDS = Histogram(
+    "chef_cache_lookup_seconds",
+    "Read cache lookup latency (Redis round trip), by namespace.",
+    ["namespace"],
+    buckets=FAST_BUCKETS,
+)
+CACHE_LOAD_SECONDS = Histogram(
+    "chef_cache_load_seconds",
+    "Latency of the Postgres loads behind read cache misses, by namespace.",
+    ["namespace"],
+    buckets=FAST_BUCKETS,
+)
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """Record the duration of a chat stage (and count it as an error if it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        CHAT_STAGE_ERRORS.labels(stage=stage).inc()
+        raise
+    finally:
+        CHAT_STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+async def track_stream(kind: str, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Count `stream` as in flight while it is consumed; record its duration and outcome."""
+    gauge = CHAT_STREAMS_IN_FLIGHT.labels(kind=kind)
+    gauge.inc()
+    start = time.perf_counter()
+    outcome = "disconnected"
+    try:
+        async for chunk in stream:
+            yield chunk
+        outcome = "completed"
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        gauge.dec()
+        CHAT_STREAM_SECONDS.labels(kind=kind).observe(time.perf_counter() - start)
+        CHAT_STREAMS.labels(kind=kind, outcome=outcome).inc()
+
+
+def _route_template(scope) -> str:
+    """
+    Route template of a request, e.g. /api/v1/thread/{thread_id}.
+
+    Built from the path by putting back the names of the matched path
+    parameters, so it includes router prefixes. Unmatched paths (404s,
+    scanners) share one label value.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    names = {str(value): name for name, value in (scope.get("path_params") or {}).items()}
+    return "/".join(
+        f"{{{names[segment]}}}" if segment in names else segment
+        for segment in scope["path"].split("/")
+    )
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording request count, latency and concurrency per route."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            template = _route_template(scope)
+            HTTP_REQUESTS.labels(method=method, route=template, status=str(status_code)).inc()
+            HTTP_REQUEST_SECONDS.labels(method=method, route=template).observe(
+                time.perf_counter() - start
+            )
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback recording LLM and tool metrics.
+
+    Pass it in the `callbacks` of the top-level agent run; nested runs (the
+    chef agent called from a tool) inherit it. The agent label comes from the
+    `agent` key of the run metadata, which the innermost agent run sets.
+    """
+
+    def __init__(self) -> None:
+        self._runs: dict[UUID, tuple[float, str, str]] = {}
+
+    @staticmethod
+    def _agent(metadata: Optional[dict]) -> str:
+        return (metadata or {}).get("agent") or "unknown"
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs) -> None:
+        model = (metadata or {}).get("ls_model_name") or "unknown"
+        self._runs[run_id] = (time.perf_counter(), self._agent(metadata), model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        start, agent, model = self._runs.pop(run_id, (None, "unknown", "unknown"))
+        elapsed = time.perf_counter() - start if start is not None else None
+        if elapsed is not None:
+            LLM_REQUEST_SECONDS.labels(agent=agent, model=model).observe(elapsed)
+        LLM_REQUESTS.labels(agent=agent, model=model, outcome="ok").inc()
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    output_tokens = usage.get("output_tokens", 0)
+                    LLM_TOKENS.labels(agent=agent, model=model, type="input").inc(usage.get("input_tokens", 0))
+                    LLM_PROMPT_TOKENS.labels(agent=agent, model=model).observe(usage.get("input_tokens", 0))
+                    LLM_CACHED_PROMPT_TOKENS.labels(agent=agent, model=model).inc(
+                        (usage.get("input_token_details") or {}).get("cache_read", 0)
+                    )
+                    LLM_TOKENS.labels(agent=agent, model=model, type="output").inc(output_tokens)
+                    if elapsed and output_tokens:
+                        LLM_OUTPUT_TOKENS_PER_SECOND.labels(agent=agent, model=model).observe(
+                            output_tokens / elapsed
+                        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        _, agent, model = self._runs.pop(run_id, (None, "unknown", "unknown"))
+        LLM_REQUESTS.labels(agent=agent, model=model, outcome="error").inc()
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs) -> None:
+        tool = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._runs[run_id] = (time.perf_counter(), self._agent(metadata), tool)
+
+    def _end_tool(self, run_id: UUID, outcome: str) -> None:
+        start, agent, tool = self._runs.pop(run_id, (None, "unknown", "unknown"))
+        if start is not None:
+            TOOL_SECONDS.labels(agent=agent, tool=tool).observe(time.perf_counter() - start)
+        TOOL_CALLS.labels(agent=agent, tool=tool, outcome=outcome).inc()
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._end_tool(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._end_tool(run_id, "error")
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Metrics in the Prometheus text format, aggregated over workers in multiprocess mode."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# Singleton instance
+metrics_callback = MetricsCallbackHandler()
@@ -0,0 +1,312 @@
+"""
+On-demand profiling of single requests.
+
+A request sent with `X-Profile: 1` and a token holding
+`settings.admin_permission` (checked with `require_permission`) is sampled
+every `settings.profiling_interval_ms` until its response body, streamed or
+not, has been sent. Each sample records the stack of:
+
+- the request's asyncio tasks (the request task and the tasks it spawns,
+  such as the streaming body): the running stack when on the event loop,
+  otherwise the coroutine chain it is awaiting in
+- threads that run work for the request, registered with `profile_thread`
+  (the agent steps of a chat turn)
+
+Samples are saved as folded stacks (`frame;frame;frame count`, readable by
+speedscope, flamegraph.pl and inferno) in `settings.profiling_dir`, keeping
+the newest `settings.profiling_max_files` profiles. The response carries the
+profile id in `X-Profile-Id`; `/api/v1/admin/profiles` lists and downloads
+them.
+
+Requests without the header only pay for the header lookup: the sampler
+thread runs only while a profile is active.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+from uuid import uuid4
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+_current_profile: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+
+
+@dataclass
+class Profile:
+    """Samples of one profiled request."""
+
+    method: str
+    path: str
+    loop: asyncio.AbstractEventLoop
+    loop_thread: int
+    id: str = field(default_factory=lambda: uuid4().hex)
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    stacks: Counter = field(default_factory=Counter)
+    samples: int = 0
+    duration_seconds: float = 0.0
+    status_code: Optional[int] = None
+    # Thread id -> name, for threads working for this request
+    threads: dict[int, str] = field(default_factory=dict)
+    _start: float = field(default_factory=time.perf_counter)
+
+    def metadata(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(self.duration_seconds, 4),
+            "samples": self.samples,
+            "interval_ms": settings.profiling_interval_ms,
+        }
+
+
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2]) + os.sep
+_STDLIB = sysconfig.get_paths()["stdlib"] + os.sep
+
+
+def _frame_label(frame) -> str:
+    """`qualname (file:line)` with the file relative to the project, site-packages or stdlib."""
+    code = frame.f_code
+    filename = code.co_filename
+    _, marker, rest = filename.rpartition("site-packages" + os.sep)
+    if marker:
+        filename = rest
+    else:
+        for root in (_PROJECT_ROOT, _STDLIB):
+            if filename.startswith(root):
+                filename = filename[len(root):]
+                break
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> list[str]:
+    """Labels from the outermost to the innermost frame."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _await_stack(coro) -> list[str]:
+    """Labels of a suspended coroutine and the awaitables it is waiting on, outermost first."""
+    labels = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return labels
+
+
+class Sampler:
+    """Background thread sampling the active profiles; runs only while there is one."""
+
+    def __init__(self) -> None:
+        self._profiles: dict[str, Profile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.pop(profile.id, None)
+
+    def _run(self) -> None:
+        interval = settings.profiling_interval_ms / 1000
+        while True:
+            with self._lock:
+                profiles = list(self._profiles.values())
+                if not profiles:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for profile in profiles:
+                try:
+                    self._sample(profile, frames)
+                except Exception:
+                    # Tasks and frames change under us; skip this sample
+                    logger.debug("Profile sample failed", exc_info=True)
+            time.sleep(interval)
+
+    @staticmethod
+    def _sample(profile: Profile, frames: dict) -> None:
+        if time.perf_counter() - profile._start > settings.profiling_max_seconds:
+            return
+        profile.samples += 1
+        running = asyncio.current_task(profile.loop)
+        for task in asyncio.all_tasks(profile.loop):
+            if task.get_context().get(_current_profile) is not profile:
+                continue
+            if task is running and profile.loop_thread in frames:
+                stack = ["loop (running)", *_thread_stack(frames[profile.loop_thread])]
+            else:
+                stack = ["loop (awaiting)", *_await_stack(task.get_coro())]
+            profile.stacks[";".join(stack)] += 1
+        for thread_id, name in list(profile.threads.items()):
+            frame = frames.get(thread_id)
+            if frame is not None:
+                profile.stacks[";".join([f"thread {name}", *_thread_stack(frame)])] += 1
+
+
+def profile_thread(fn: Callable[..., T]) -> Callable[..., T]:
+    """
+    Wrap `fn` so the threads running it are sampled for the current request's profile.
+
+    Returns `fn` itself when the request is not profiled.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return fn
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        thread = threading.current_thread()
+        profile.threads[thread.ident] = thread.name
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.threads.pop(thread.ident, None)
+
+    return run
+
+
+class ProfileStore:
+    """Profiles on local disk (folded stacks plus JSON metadata), newest `max_files` kept."""
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def save(self, profile: Profile) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        folded = "".join(f"{stack} {count}\n" for stack, count in profile.stacks.most_common())
+        (self.directory / f"{profile.id}.folded").write_text(folded)
+        (self.directory / f"{profile.id}.json").write_text(json.dumps(profile.metadata()))
+        self._prune()
+
+    def _prune(self) -> None:
+        entries = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in entries[self.max_files:]:
+            stale.with_suffix(".folded").unlink(missing_ok=True)
+            stale.unlink(missing_ok=True)
+
+    def list(self) -> list[dict[str, Any]]:
+        """Metadata of the stored profiles, newest first."""
+        if not self.directory.is_dir():
+            return []
+        profiles = []
+        for path in self.directory.glob("*.json"):
+            try:
+                profiles.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return sorted(profiles, key=lambda p: p["started_at"], reverse=True)
+
+    def read(self, profile_id: str) -> Optional[str]:
+        """Folded stacks of a profile, or None if it is not stored (any more)."""
+        try:
+            return (self.directory / f"{profile_id}.folded").read_text()
+        except FileNotFoundError:
+            return None
+
+
+async def _authorize(headers: dict[bytes, bytes]) -> Optional[JSONResponse]:
+    """Error response unless the request's token holds the admin permission."""
+    from app.api.v1.dependencies.auth0 import require_permission, verify_jwt
+
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    try:
+        if scheme.lower() != "bearer" or not token:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        token_data = await run_in_threadpool(verify_jwt, token)
+        await require_permission(settings.admin_permission)(token_data=token_data)
+    except HTTPException as exc:
+        return JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
+    return None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that ask for it with `X-Profile: 1`."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not any(
+            name == PROFILE_HEADER and value not in (b"", b"0") for name, value in scope["headers"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        denied = await _authorize(headers)
+        if denied is not None:
+            await denied(scope, receive, send)
+            return
+
+        profile = Profile(
+            method=scope["method"],
+            path=scope["path"],
+            loop=asyncio.get_running_loop(),
+            loop_thread=threading.get_ident(),
+        )
+
+        async def send_with_id(message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (PROFILE_ID_HEADER, profile.id.encode())]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        profile_sampler.add(profile)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile_sampler.remove(profile)
+            _current_profile.reset(token)
+            profile.duration_seconds = time.perf_counter() - profile._start
+            try:
+                await asyncio.to_thread(profile_store.save, profile)
+                logger.info(
+                    "Profiled %s %s: %d samples in %.2fs (profile %s)",
+                    profile.method, profile.path, profile.samples, profile.duration_seconds, profile.id,
+                )
+            except OSError:
+                logger.exception("Could not save profile %s", profile.id)
+
+
+# Singleton instances
+profile_sampler = Sampler()
+profile_store = ProfileStore(settings.profiling_dir, settings.profiling_max_files)
@@ -0,0 +1,268 @@
+"""
+Per-user rate limiting and concurrent-stream caps for chat.
+
+Both limits are enforced across workers through Redis in one atomic Lua
+script (Redis server time, so worker clocks don't matter):
+
+- Concurrency (`CHAT_CONCURRENCY_LIMIT_ENABLED`): a sorted set of stream
+  leases per user, scored by expiry, so a worker that dies mid-stream only
+  holds its slot until the lease expires. Checked first, so a request
+  turned away for too many open streams does not spend a token.
+- Token bucket (`CHAT_RATE_LIMIT_ENABLED`): `chat_rate_limit_burst` requests
+  at once, refilled at `chat_rate_limit_per_minute`.
+
+With `REDIS_URL=memory://`, or while Redis is unreachable, the same limits are
+enforced per process instead.
+
+Rejections by reason, Redis errors and held leases go to Prometheus
+(`chef_chat_limit_*`, `chef_chat_stream_leases`, aggregated over workers);
+`stats` keeps the same numbers for this worker only.
+"""
+import logging
+import math
+import time
+import uuid
+from typing import Any, AsyncIterator
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import CHAT_LIMIT_ERRORS, CHAT_LIMIT_REJECTIONS, CHAT_STREAM_LEASES
+from app.core.redis import get_redis, uses_memory
+
+logger = logging.getLogger(__name__)
+
+ACQUIRE_SCRIPT = """
+local limit = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+if limit > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+    if redis.call('ZCARD', KEYS[2]) >= limit then
+        return {0, 0}
+    end
+end
+if ARGV[1] == '1' then
+    local capacity = tonumber(ARGV[2])
+    local rate = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        wait = math.ceil((1 - tokens) / rate)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate) + 1000)
+    if wait > 0 then
+        return {wait, 0}
+    end
+end
+if limit > 0 then
+    redis.call('ZADD', KEYS[2], now + tonumber(ARGV[5]), ARGV[6])
+    redis.call('PEXPIRE', KEYS[2], ARGV[5])
+end
+return {0, 1}
+"""
+
+
+class RateLimitStats:
+    """Counters for chat limit decisions in this process (see `/admin/rate-limits`)."""
+
+    def __init__(self) -> None:
+        self.allowed = 0
+        self.rate_limited = 0
+        self.concurrency_limited = 0
+        self.errors = 0
+        self.active_streams = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "rate_limited": self.rate_limited,
+            "concurrency_limited": self.concurrency_limited,
+            "errors": self.errors,
+            "active_streams": self.active_streams,
+        }
+
+
+class StreamLease:
+    """A held concurrent-stream slot; release it when the stream ends."""
+
+    def __init__(self, limiter: "ChatLimiter", user_id: int, member: str, local: bool) -> None:
+        self._limiter = limiter
+        self.user_id = user_id
+        self.member = member
+        self.local = local
+        self._released = False
+
+    async def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        await self._limiter._release(self)
+
+    async def wrap(self, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Yield from `stream`, releasing the slot however the stream ends."""
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await self.release()
+
+
+class ChatLimiter:
+    """Token-bucket rate limit and concurrent-stream cap per user."""
+
+    def __init__(self) -> None:
+        self.stats = RateLimitStats()
+        self._script: Any = None
+        self._script_client: Any = None
+        self._disabled_until = 0.0
+        # Per-process fallback state
+        self._buckets: dict[int, tuple[float, float]] = {}
+        self._streams: dict[int, dict[str, float]] = {}
+
+    @staticmethod
+    def bucket_key(user_id: int) -> str:
+        return f"ratelimit:chat:{user_id}"
+
+    @staticmethod
+    def streams_key(user_id: int) -> str:
+        return f"streams:chat:{user_id}"
+
+    def _use_redis(self) -> bool:
+        return not uses_memory() and time.monotonic() >= self._disabled_until
+
+    def _on_error(self, exc: Exception) -> None:
+        self.stats.errors += 1
+        CHAT_LIMIT_ERRORS.inc()
+        self._disabled_until = time.monotonic() + settings.cache_retry_seconds
+        logger.warning("Rate limiter falling back to per-process limits: %s", exc)
+
+    def _get_script(self) -> Any:
+        client = get_redis()
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(ACQUIRE_SCRIPT)
+            self._script_client = client
+        return self._script
+
+    @staticmethod
+    def _stream_limit() -> int:
+        """Concurrent streams allowed per user (0: no cap)."""
+        return settings.chat_max_concurrent_streams if settings.chat_concurrency_limit_enabled else 0
+
+    async def acquire(self, user_id: int) -> StreamLease:
+        """
+        Take one stream slot and one token for the user (each when its limit is enabled).
+
+        Args:
+            user_id: User starting a chat stream
+
+        Returns:
+            StreamLease holding the slot
+
+        Raises:
+            HTTPException: 429 with `Retry-After` when either limit is exceeded
+        """
+        member = uuid.uuid4().hex
+        local = True
+        enabled = settings.chat_rate_limit_enabled or settings.chat_concurrency_limit_enabled
+        if enabled and self._use_redis():
+            try:
+                wait_ms, acquired = await self._acquire_redis(user_id, member)
+                local = False
+            except Exception as exc:
+                self._on_error(exc)
+        if local:
+            wait_ms, acquired = self._acquire_local(user_id, member)
+
+        if wait_ms > 0:
+            self.stats.rate_limited += 1
+            CHAT_LIMIT_REJECTIONS.labels(reason="rate").inc()
+            self._reject(
+                "Too many chat requests. Please slow down.",
+                math.ceil(wait_ms / 1000),
+            )
+        if not acquired:
+            self.stats.concurrency_limited += 1
+            CHAT_LIMIT_REJECTIONS.labels(reason="concurrency").inc()
+            self._reject(
+                f"Too many concurrent chat streams (max {settings.chat_max_concurrent_streams}).",
+                settings.chat_concurrency_retry_after_seconds,
+            )
+        self.stats.allowed += 1
+        self.stats.active_streams += 1
+        CHAT_STREAM_LEASES.inc()
+        return StreamLease(self, user_id, member, local)
+
+    @staticmethod
+    def _reject(detail: str, retry_after: int) -> None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(max(1, retry_after))},
+        )
+
+    async def _acquire_redis(self, user_id: int, member: str) -> tuple[int, bool]:
+        wait_ms, acquired = await self._get_script()(
+            keys=[self.bucket_key(user_id), self.streams_key(user_id)],
+            args=[
+                int(settings.chat_rate_limit_enabled),
+                settings.chat_rate_limit_burst,
+                settings.chat_rate_limit_per_minute / 60_000,
+                self._stream_limit(),
+                int(settings.chat_stream_lease_seconds * 1000),
+                member,
+            ],
+        )
+        return int(wait_ms), bool(acquired)
+
+    def _acquire_local(self, user_id: int, member: str) -> tuple[int, bool]:
+        now = time.monotonic()
+        limit = self._stream_limit()
+        leases: dict[str, float] = {}
+        if limit:
+            leases = {
+                m: expiry for m, expiry in self._streams.get(user_id, {}).items() if expiry > now
+            }
+            if len(leases) >= limit:
+                self._streams[user_id] = leases
+                return 0, False
+
+        if settings.chat_rate_limit_enabled:
+            capacity = settings.chat_rate_limit_burst
+            rate = settings.chat_rate_limit_per_minute / 60
+            tokens, ts = self._buckets.get(user_id, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            if tokens < 1:
+                self._buckets[user_id] = (tokens, now)
+                return math.ceil(1000 * (1 - tokens) / rate), False
+            self._buckets[user_id] = (tokens - 1, now)
+
+        if limit:
+            leases[member] = now + settings.chat_stream_lease_seconds
+            self._streams[user_id] = leases
+        return 0, True
+
+    async def _release(self, lease: StreamLease) -> None:
+        self.stats.active_streams -= 1
+        CHAT_STREAM_LEASES.dec()
+        if lease.local:
+            leases = self._streams.get(lease.user_id)
+            if leases is not None:
+                leases.pop(lease.member, None)
+                if not leases:
+                    self._streams.pop(lease.user_id, None)
+            return
+        try:
+            await get_redis().zrem(self.streams_key(lease.user_id), lease.member)
+        except Exception as exc:
+            self._on_error(exc)
+
+
+# Singleton instance
+chat_limiter = ChatLimiter()
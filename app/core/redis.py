@@ -0,0 +1,206 @@
+"""
+Shared Redis clients.
+
+`settings.redis_url` selects the backend. A `memory://` URL uses
+`InMemoryRedis`, an in-process stand-in for the small subset of the Redis API
+this app uses, for single-process deployments and tests.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, ContextManager, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+_async_client: Any = None
+_sync_client: Any = None
+_pubsub_client: Any = None
+_memory_store: Optional["InMemoryRedis"] = None
+
+
+class InMemoryRedis:
+    """In-process stand-in for the Redis commands used by the app."""
+
+    def __init__(self) -> None:
+        self._data: dict[str, Any] = {}
+        self._expires: dict[str, float] = {}
+        # Reentrant, so `atomic()` callers can run several commands under it
+        self._lock = threading.RLock()
+
+    # --- internals (call with self._lock held) ---
+
+    def _alive(self, key: str) -> bool:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            return False
+        return key in self._data
+
+    def _set_ttl(self, key: str, ex: Optional[float], px: Optional[int]) -> None:
+        if px is not None:
+            self._expires[key] = time.monotonic() + px / 1000
+        elif ex is not None:
+            self._expires[key] = time.monotonic() + ex
+        else:
+            self._expires.pop(key, None)
+
+    # --- sync API ---
+
+    def atomic(self) -> ContextManager:
+        """Run several commands with no other command in between (what MULTI or a Lua script gives on Redis)."""
+        return self._lock
+
+    def get_sync(self, key: str) -> Any:
+        with self._lock:
+            return self._data.get(key) if self._alive(key) else None
+
+    def incr_sync(self, key: str) -> int:
+        with self._lock:
+            value = int(self._data[key]) + 1 if self._alive(key) else 1
+            self._data[key] = value
+            return value
+
+    def expire_sync(self, key: str, seconds: float, nx: bool = False) -> bool:
+        with self._lock:
+            if not self._alive(key) or (nx and key in self._expires):
+                return False
+            self._set_ttl(key, seconds, None)
+            return True
+
+    def hset_sync(self, key: str, field: str, value: Any) -> int:
+        with self._lock:
+            if not self._alive(key):
+                self._data[key] = {}
+            is_new = field not in self._data[key]
+            self._data[key][field] = value
+            return int(is_new)
+
+    def delete_sync(self, *keys: str) -> int:
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    # --- async API (subset of redis.asyncio.Redis) ---
+
+    async def ping(self) -> bool:
+        return True
+
+    async def get(self, key: str) -> Any:
+        return self.get_sync(key)
+
+    async def incr(self, key: str) -> int:
+        return self.incr_sync(key)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ex: Optional[float] = None,
+        px: Optional[int] = None,
+        nx: bool = False,
+    ) -> Optional[bool]:
+        with self._lock:
+            if nx and self._alive(key):
+                return None
+            self._data[key] = value
+            self._set_ttl(key, ex, px)
+            return True
+
+    async def delete(self, *keys: str) -> int:
+        return self.delete_sync(*keys)
+
+    async def expire(self, key: str, seconds: float, nx: bool = False) -> bool:
+        return self.expire_sync(key, seconds, nx=nx)
+
+    async def hget(self, key: str, field: str) -> Any:
+        with self._lock:
+            if not self._alive(key):
+                return None
+            return self._data[key].get(field)
+
+    async def hset(self, key: str, field: str, value: Any) -> int:
+        return self.hset_sync(key, field, value)
+
+    async def aclose(self) -> None:
+        return None
+
+
+def uses_memory() -> bool:
+    """True when `settings.redis_url` selects the in-process stand-in."""
+    return settings.redis_url.startswith("memory://")
+
+
+def _memory() -> InMemoryRedis:
+    global _memory_store
+    if _memory_store is None:
+        _memory_store = InMemoryRedis()
+    return _memory_store
+
+
+def get_redis() -> Any:
+    """Return the process-wide async Redis client (created lazily)."""
+    global _async_client
+    if uses_memory():
+        return _memory()
+    if _async_client is None:
+        _async_client = aioredis.from_url(
+            settings.redis_url,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+        )
+    return _async_client
+
+
+def get_pubsub_redis() -> Any:
+    """
+    Return the process-wide async client for pub/sub subscriptions.
+
+    Subscribers block on reads for as long as a channel is quiet, so this
+    client has no socket timeout (unlike `get_redis()`); dead connections are
+    detected by periodic health checks instead.
+    """
+    global _pubsub_client
+    if _pubsub_client is None:
+        _pubsub_client = aioredis.from_url(
+            settings.redis_url,
+            socket_connect_timeout=settings.redis_socket_timeout,
+            health_check_interval=30,
+        )
+    return _pubsub_client
+
+
+def get_sync_redis() -> Any:
+    """Return the process-wide sync Redis client, for worker-thread callers."""
+    global _sync_client
+    if uses_memory():
+        return _memory()
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(
+            settings.redis_url,
+            socket_timeout=settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_timeout,
+        )
+    return _sync_client
+
+
+async def close_redis() -> None:
+    """Close the Redis clients of this process."""
+    global _async_client, _sync_client, _pubsub_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _pubsub_client is not None:
+        await _pubsub_client.aclose()
+        _pubsub_client = None
+    if _sync_client is not None:
+        await asyncio.to_thread(_sync_client.close)
+        _sync_client = None
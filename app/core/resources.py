@@ -0,0 +1,97 @@
+"""
+Process-local registry of expensive shared resources.
+
+Modules register a factory (and optionally a closer) at import time; nothing
+is built until the resource is first used or the warm-up started from the
+FastAPI lifespan builds it, i.e. in each worker process after fork. Importing
+the app therefore opens no connections and builds no clients.
+
+Instances are tied to the process that built them: a forked child that
+inherits them builds its own on first use (the parent's sockets are never
+reused), and `resources.close()` shuts down what this process built, newest
+first.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceRegistry:
+    """Lazily built, lifecycle-managed singletons (checkpointer, agents, clients)."""
+
+    def __init__(self) -> None:
+        self._factories: dict[str, tuple[Callable[[], Any], Optional[Callable[[Any], None]]]] = {}
+        self._instances: dict[str, Any] = {}
+        self._pid = os.getpid()
+        # Reentrant: factories may get() the resources they depend on
+        self._lock = threading.RLock()
+        self.build_seconds: dict[str, float] = {}
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        close: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        """
+        Register how to build (and optionally close) a resource.
+
+        Args:
+            name: Resource name, e.g. "checkpointer"
+            factory: Builds the resource; called at most once per process
+            close: Releases the resource on shutdown
+        """
+        self._factories[name] = (factory, close)
+
+    def _check_pid(self) -> None:
+        if os.getpid() != self._pid:
+            # Forked: inherited instances belong to the parent, never close them here
+            self._instances = {}
+            self.build_seconds = {}
+            self._pid = os.getpid()
+
+    def get(self, name: str) -> Any:
+        """Return the resource, building it on first use in this process."""
+        instance = self._instances.get(name)
+        if instance is not None and os.getpid() == self._pid:
+            return instance
+        with self._lock:
+            self._check_pid()
+            if name not in self._instances:
+                factory, _ = self._factories[name]
+                start = time.perf_counter()
+                self._instances[name] = factory()
+                self.build_seconds[name] = time.perf_counter() - start
+                logger.info("Built %s in %.0f ms", name, 1000 * self.build_seconds[name])
+            return self._instances[name]
+
+    def is_built(self, name: str) -> bool:
+        return os.getpid() == self._pid and name in self._instances
+
+    def names(self) -> list[str]:
+        """Registered resource names, in registration order."""
+        return list(self._factories)
+
+    async def close(self) -> None:
+        """Close the resources built by this process, newest first."""
+        with self._lock:
+            self._check_pid()
+            instances = list(self._instances.items())
+            self._instances = {}
+        for name, instance in reversed(instances):
+            _, close = self._factories[name]
+            if close is None:
+                continue
+            try:
+                await asyncio.to_thread(close, instance)
+            except Exception as exc:
+                logger.warning("Error closing %s: %s", name, exc)
+
+
+# Singleton instance
+resources = ResourceRegistry()
@@ -0,0 +1,299 @@
+"""
+Cross-worker fan-out and cancellation for chat turns.
+
+The worker running a chat turn publishes every SSE event it sends, so any
+worker can serve followers of that turn (e.g. a second browser tab) and a
+cancel request can reach the owner wherever it lands:
+
+- `chat:turn:{thread_id}` records the running turn (turn id and owner).
+- `chat:turn:{turn_id}:events` keeps the turn's events for late followers and
+  `chat:turn:{turn_id}` is the pub/sub channel for new ones. Each published
+  event carries its list index, so replayed and live events are merged
+  without gaps or duplicates.
+- `chat:cancel` carries cancel requests; every worker listens on it and stops
+  the turns it owns.
+
+Followers and cancels for turns owned by the same worker never touch Redis.
+With `REDIS_URL=memory://` everything stays in process (single worker).
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, AsyncIterator, Optional
+
+from pydantic_core import from_json, to_json
+
+from app.core.config import settings
+from app.core.redis import get_pubsub_redis, get_redis, uses_memory
+
+logger = logging.getLogger(__name__)
+
+CANCEL_CHANNEL = "chat:cancel"
+# Stored after a turn's last event (SSE chunks are never empty)
+END_OF_TURN = ""
+
+# Delete the running-turn record only if it still belongs to this turn
+RELEASE_TURN_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current and cjson.decode(current)['turn_id'] == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def turn_key(thread_id: str) -> str:
+    return f"chat:turn:{thread_id}"
+
+
+def events_key(turn_id: str) -> str:
+    return f"chat:turn:{turn_id}:events"
+
+
+def events_channel(turn_id: str) -> str:
+    return f"chat:turn:{turn_id}"
+
+
+class ChatTurn:
+    """A chat turn running on this worker."""
+
+    def __init__(self, bus: "StreamBus", thread_id: str, user_id: int) -> None:
+        self._bus = bus
+        self.thread_id = thread_id
+        self.user_id = user_id
+        self.turn_id = uuid.uuid4().hex
+        self.cancelled = asyncio.Event()
+        self.done = False
+        self.events: list[str] = []
+        self.followers: set[asyncio.Queue] = set()
+        self.published = True  # False once publishing to Redis has failed
+
+    async def relay(self, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Yield from `stream`, publishing every event to followers."""
+        try:
+            async for chunk in stream:
+                if chunk:
+                    await self._bus._publish(self, chunk)
+                yield chunk
+        finally:
+            await self.finish()
+
+    async def finish(self) -> None:
+        """End the turn for followers and release the thread's claim (once; later calls do nothing)."""
+        if not self.done:
+            await self._bus._finish(self)
+
+
+class StreamBus:
+    """Publishes chat turn events and routes cancel requests across workers."""
+
+    def __init__(self) -> None:
+        self._turns: dict[str, ChatTurn] = {}
+        self._active: set[ChatTurn] = set()
+        self._listener: Optional[asyncio.Task] = None
+        self._release_script: Any = None
+
+    async def start_turn(self, thread_id: str, user_id: int) -> ChatTurn:
+        """Register a new turn for the thread, owned by this worker."""
+        turn = ChatTurn(self, thread_id, user_id)
+        self._turns[thread_id] = turn
+        self._active.add(turn)
+        if uses_memory():
+            turn.published = False
+            return turn
+        self._ensure_listener()
+        try:
+            await get_redis().set(
+                turn_key(thread_id),
+                to_json({"turn_id": turn.turn_id, "user_id": user_id}),
+                ex=int(settings.chat_stream_lease_seconds),
+            )
+        except Exception as exc:
+            turn.published = False
+            logger.warning("Stream bus unavailable, turn %s not shared: %s", turn.turn_id, exc)
+        return turn
+
+    async def _publish(self, turn: ChatTurn, chunk: str) -> None:
+        seq = len(turn.events)
+        turn.events.append(chunk)
+        for queue in turn.followers:
+            queue.put_nowait(chunk)
+        if turn.published:
+            await self._publish_remote(turn, seq, chunk)
+
+    async def _publish_remote(self, turn: ChatTurn, seq: int, chunk: str, end: bool = False) -> None:
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.rpush(events_key(turn.turn_id), END_OF_TURN if end else chunk)
+            event = {"seq": seq, "end": True} if end else {"seq": seq, "data": chunk}
+            pipe.publish(events_channel(turn.turn_id), to_json(event))
+            if seq == 0 or end:
+                ttl = settings.chat_turn_replay_seconds if end else settings.chat_stream_lease_seconds
+                pipe.expire(events_key(turn.turn_id), int(ttl))
+            await pipe.execute()
+        except Exception as exc:
+            turn.published = False
+            logger.warning("Stream bus unavailable, turn %s no longer shared: %s", turn.turn_id, exc)
+
+    def active_turns(self) -> list[ChatTurn]:
+        """Turns still running on this worker."""
+        return list(self._active)
+
+    async def _finish(self, turn: ChatTurn) -> None:
+        turn.done = True
+        self._active.discard(turn)
+        for queue in turn.followers:
+            queue.put_nowait(None)
+        if self._turns.get(turn.thread_id) is turn:
+            del self._turns[turn.thread_id]
+        if not turn.published:
+            return
+        await self._publish_remote(turn, len(turn.events), END_OF_TURN, end=True)
+        try:
+            if self._release_script is None:
+                self._release_script = get_redis().register_script(RELEASE_TURN_SCRIPT)
+            await self._release_script(keys=[turn_key(turn.thread_id)], args=[turn.turn_id])
+        except Exception as exc:
+            logger.warning("Could not release turn %s: %s", turn.turn_id, exc)
+
+    async def _running_turn(self, thread_id: str, user_id: int) -> Optional[str]:
+        """Turn id of the user's running turn on another worker, if any."""
+        if uses_memory():
+            return None
+        raw = await get_redis().get(turn_key(thread_id))
+        if raw is None:
+            return None
+        info = from_json(raw)
+        return info["turn_id"] if info["user_id"] == user_id else None
+
+    async def follow(self, thread_id: str, user_id: int) -> Optional[AsyncIterator[str]]:
+        """
+        Subscribe to the running turn of a thread.
+
+        Args:
+            thread_id: Thread whose running turn to follow
+            user_id: User following (must own the turn)
+
+        Returns:
+            Async iterator over the turn's SSE events (from the first one),
+            or None if no turn of this user is running for the thread
+        """
+        turn = self._turns.get(thread_id)
+        if turn is not None and turn.user_id == user_id:
+            return self._follow_local(turn)
+        turn_id = await self._running_turn(thread_id, user_id)
+        if turn_id is None:
+            return None
+        return self._follow_remote(turn_id)
+
+    async def _follow_local(self, turn: ChatTurn) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        turn.followers.add(queue)
+        backlog, done = list(turn.events), turn.done
+        try:
+            for chunk in backlog:
+                yield chunk
+            if done:
+                return
+            while True:
+                chunk = await asyncio.wait_for(
+                    queue.get(), settings.chat_follow_idle_timeout_seconds
+                )
+                if chunk is None:
+                    return
+                yield chunk
+        except asyncio.TimeoutError:
+            return
+        finally:
+            turn.followers.discard(queue)
+
+    async def _follow_remote(self, turn_id: str) -> AsyncIterator[str]:
+        pubsub = get_pubsub_redis().pubsub()
+        try:
+            # Subscribe before reading the backlog so no event falls in between
+            await pubsub.subscribe(events_channel(turn_id))
+            next_seq = 0
+            for raw in await get_redis().lrange(events_key(turn_id), 0, -1):
+                chunk = raw.decode()
+                if chunk == END_OF_TURN:
+                    return
+                yield chunk
+                next_seq += 1
+            idle_deadline = time.monotonic() + settings.chat_follow_idle_timeout_seconds
+            while True:
+                remaining = idle_deadline - time.monotonic()
+                if remaining <= 0:
+                    return  # owner went quiet (or died)
+                # None on timeout and also for (ignored) subscribe confirmations
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+                if message is None:
+                    continue
+                idle_deadline = time.monotonic() + settings.chat_follow_idle_timeout_seconds
+                event = from_json(message["data"])
+                if event["seq"] < next_seq:
+                    continue
+                if event.get("end"):
+                    return
+                yield event["data"]
+                next_seq = event["seq"] + 1
+        finally:
+            await pubsub.aclose()
+
+    async def cancel(self, thread_id: str, user_id: int) -> bool:
+        """
+        Ask the worker running the thread's current turn to stop it.
+
+        Returns:
+            True if a running turn of this user was found and signalled
+        """
+        turn = self._turns.get(thread_id)
+        if turn is not None and turn.user_id == user_id:
+            turn.cancelled.set()
+            return True
+        turn_id = await self._running_turn(thread_id, user_id)
+        if turn_id is None:
+            return False
+        await get_redis().publish(
+            CANCEL_CHANNEL, to_json({"thread_id": thread_id, "turn_id": turn_id})
+        )
+        return True
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen_for_cancels())
+
+    async def _listen_for_cancels(self) -> None:
+        """Stop local turns when a cancel request arrives from any worker."""
+        while True:
+            pubsub = get_pubsub_redis().pubsub()
+            try:
+                await pubsub.subscribe(CANCEL_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    request = from_json(message["data"])
+                    turn = self._turns.get(request["thread_id"])
+                    if turn is not None and turn.turn_id == request["turn_id"]:
+                        turn.cancelled.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Cancel listener disconnected, retrying: %s", exc)
+                await asyncio.sleep(settings.cache_retry_seconds)
+            finally:
+                await pubsub.aclose()
+
+    async def close(self) -> None:
+        """Stop the cancel listener of this worker."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+
+# Singleton instance
+stream_bus = StreamBus()
@@ -0,0 +1,218 @@
+"""
+OpenTelemetry tracing, exported over OTLP/HTTP when `settings.otel_enabled`.
+
+Spans cover the FastAPI request, the chat turn (`stream_with_persistence`),
+each LangGraph node, model call and tool of the general and chef agents (the
+chef agent's spans nest under the `call_chef_agent` tool span), SQLAlchemy
+statements and checkpointer operations.
+
+Sampling is parent-based: an incoming `traceparent` decides; new traces are
+kept with probability `settings.otel_traces_sample_ratio`.
+
+The tracer provider is created per worker from the lifespan (its export
+thread does not survive a fork). With tracing disabled every span is a no-op.
+Agent steps run in worker threads, so the turn's trace context is passed
+explicitly with `bind_context` (`asyncio.to_thread` copies it already).
+"""
+import logging
+from typing import Any, Callable, Optional, TypeVar
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import Span, Status, StatusCode
+
+from app.core.config import settings
+from app.core.metrics import metrics_callback
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("chef_agent_api")
+
+T = TypeVar("T")
+
+_provider: Any = None
+
+
+def instrument_app(app) -> None:
+    """Add request spans to the FastAPI app and statement spans to the SQLAlchemy engines."""
+    if not settings.otel_enabled:
+        return
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+
+    from app.db_config.db_async_session import engine as async_engine, replica_engine
+    from app.db_config.session import engine as sync_engine
+
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="/healthz,/readyz,/metrics")
+    engines = [async_engine.sync_engine, sync_engine]
+    if replica_engine is not None:
+        engines.append(replica_engine.sync_engine)
+    # Only hooks the cursor-execute events, which SQLAlchemy 2.1 still provides;
+    # the instrumentor's declared range stops at 2.0
+    SQLAlchemyInstrumentor().instrument(engines=engines, skip_dep_check=True)
+
+
+def start_tracing() -> None:
+    """Create this worker's tracer provider and OTLP exporter (idempotent)."""
+    global _provider
+    if not settings.otel_enabled or _provider is not None:
+        return
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.otel_service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.otel_traces_sample_ratio)),
+    )
+    _provider.add_span_processor(
+        BatchSpanProcessor(
+            OTLPSpanExporter(endpoint=f"{settings.otel_exporter_otlp_endpoint.rstrip('/')}/v1/traces")
+        )
+    )
+    trace.set_tracer_provider(_provider)
+    logger.info(
+        "Tracing to %s (sample ratio %s)",
+        settings.otel_exporter_otlp_endpoint,
+        settings.otel_traces_sample_ratio,
+    )
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and stop the exporter."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def bind_context(fn: Callable[..., T], ctx: Optional[otel_context.Context] = None) -> Callable[..., T]:
+    """Wrap `fn` to run in `ctx` (default: the current trace context), e.g. in an executor thread."""
+    ctx = otel_context.get_current() if ctx is None else ctx
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        token = otel_context.attach(ctx)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            otel_context.detach(token)
+
+    return run
+
+
+def end_span(span: Span, error: Optional[BaseException] = None) -> None:
+    """End `span`, marking it failed if `error` is given."""
+    if error is not None:
+        span.record_exception(error)
+        span.set_status(Status(StatusCode.ERROR, str(error) or type(error).__name__))
+    span.end()
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback turning agent runs into spans.
+
+    One span per LangGraph node (`<agent>.<node>`), model call and tool call,
+    parented to the span of the nearest traced ancestor run, or to the trace
+    context current when the top-level run starts.
+    """
+
+    def __init__(self) -> None:
+        self._spans: dict[UUID, Span] = {}
+        self._parents: dict[UUID, Optional[UUID]] = {}
+
+    def _parent_context(self, parent_run_id: Optional[UUID]) -> otel_context.Context:
+        run_id = parent_run_id
+        while run_id is not None:
+            span = self._spans.get(run_id)
+            if span is not None:
+                return trace.set_span_in_context(span)
+            run_id = self._parents.get(run_id)
+        return otel_context.get_current()
+
+    def _start(self, name: str, run_id: UUID, parent_run_id: Optional[UUID], attributes: dict) -> None:
+        self._spans[run_id] = tracer.start_span(
+            name,
+            context=self._parent_context(parent_run_id),
+            attributes={key: value for key, value in attributes.items() if value is not None},
+        )
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> Optional[Span]:
+        self._parents.pop(run_id, None)
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            end_span(span, error)
+        return span
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, name=None, **kwargs) -> None:
+        self._parents[run_id] = parent_run_id
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        # Only the node runs themselves, not the runnables inside them
+        if node is None or name != node:
+            return
+        agent = metadata.get("agent", "unknown")
+        self._start(
+            f"{agent}.{node}",
+            run_id,
+            parent_run_id,
+            {"agent": agent, "langgraph.node": node, "langgraph.step": metadata.get("langgraph_step")},
+        )
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs) -> None:
+        self._parents[run_id] = parent_run_id
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name")
+        self._start(
+            f"chat {model or 'model'}",
+            run_id,
+            parent_run_id,
+            {"agent": metadata.get("agent"), "gen_ai.request.model": model},
+        )
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        span = self._spans.get(run_id)
+        if span is not None:
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if usage:
+                        span.set_attribute("gen_ai.usage.input_tokens", usage.get("input_tokens", 0))
+                        span.set_attribute("gen_ai.usage.output_tokens", usage.get("output_tokens", 0))
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, metadata=None, **kwargs) -> None:
+        self._parents[run_id] = parent_run_id
+        tool = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._start(
+            f"tool {tool}",
+            run_id,
+            parent_run_id,
+            {"agent": (metadata or {}).get("agent"), "gen_ai.tool.name": tool},
+        )
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id, error)
+
+
+# Singleton instance
+tracing_callback = TracingCallbackHandler()
+
+
+def agent_callbacks() -> list[BaseCallbackHandler]:
+    """Callbacks for a top-level agent run: metrics, plus tracing when enabled."""
+    return [metrics_callback, tracing_callback] if settings.otel_enabled else [metrics_callback]
@@ -12,3 +12,24 @@ async_session = async_sessionmaker(
     class_=AsyncSession,
     expire_on_commit=False,
 )
+
+# Optional read replica for read-only paths (see app.db_config.read_routing)
+replica_engine = (
+    create_async_engine(
+        settings.replica_database_url,
+        future=True,
+        execution_options={"postgresql_readonly": True},
+    )
+    if settings.replica_database_url
+    else None
+)
+
+replica_session = (
+    async_sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+    if replica_engine is not None
+    else None
+)
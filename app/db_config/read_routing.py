@@ -0,0 +1,167 @@
+"""
+Routing of read-only requests between the primary and the read replica.
+
+Reads go to the replica (`settings.replica_database_url`) unless:
+
+- no replica is configured;
+- the replica lags the primary by more than `settings.replica_max_lag_seconds`
+  (measured at most every `settings.replica_lag_check_seconds`; a failed check
+  counts as lagging);
+- the user wrote within the last `settings.replica_read_your_writes_seconds`,
+  so e.g. the thread list right after `create_thread` comes from the primary.
+  Writes are recorded in Redis (`rw:<owner>` with that TTL, keyed by user id,
+  or by Auth0 subject for the profile) so the window holds across workers; if
+  Redis fails, reads go to the primary.
+
+Writes and transactions that read before writing always use the primary.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.redis import get_redis, get_sync_redis
+from app.db_config.db_async_session import replica_engine
+
+logger = logging.getLogger(__name__)
+
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReadRoutingStats:
+    """Counters for read routing decisions."""
+
+    def __init__(self) -> None:
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.recent_write_fallbacks = 0
+        self.lag_fallbacks = 0
+        self.lag_check_errors = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "recent_write_fallbacks": self.recent_write_fallbacks,
+            "lag_fallbacks": self.lag_fallbacks,
+            "lag_check_errors": self.lag_check_errors,
+        }
+
+
+class ReadRouter:
+    """Decides per request whether reads may be served by the replica."""
+
+    def __init__(self) -> None:
+        self.stats = ReadRoutingStats()
+        self.lag_seconds: Optional[float] = None
+        self._checked_at = 0.0
+        self._check_lock = asyncio.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return replica_engine is not None
+
+    @staticmethod
+    def _write_key(owner: Any) -> str:
+        return f"rw:{owner}"
+
+    @staticmethod
+    def _window_ms() -> int:
+        return int(1000 * settings.replica_read_your_writes_seconds)
+
+    async def record_write(self, owner: Any) -> None:
+        """Pin the owner's reads to the primary for the read-your-writes window."""
+        if not self.configured or self._window_ms() <= 0:
+            return
+        try:
+            await get_redis().set(self._write_key(owner), 1, px=self._window_ms())
+        except Exception as exc:
+            logger.warning("Could not record write for %s: %s", owner, exc)
+
+    def record_write_sync(self, owner: Any) -> None:
+        """`record_write` for callers running in worker threads."""
+        if not self.configured or self._window_ms() <= 0:
+            return
+        try:
+            get_sync_redis().set(self._write_key(owner), 1, px=self._window_ms())
+        except Exception as exc:
+            logger.warning("Could not record write for %s: %s", owner, exc)
+
+    async def wrote_recently(self, owner: Any) -> bool:
+        """True if the owner wrote within the read-your-writes window."""
+        if self._window_ms() <= 0:
+            return False
+        try:
+            return await get_redis().get(self._write_key(owner)) is not None
+        except Exception as exc:
+            logger.warning("Could not check recent writes, reading from primary: %s", exc)
+            return True
+
+    async def _refresh_lag(self) -> None:
+        async with self._check_lock:
+            if time.monotonic() - self._checked_at < settings.replica_lag_check_seconds:
+                return
+            try:
+                async with replica_engine.connect() as conn:
+                    self.lag_seconds = float(await conn.scalar(REPLICA_LAG_SQL))
+            except Exception as exc:
+                self.stats.lag_check_errors += 1
+                self.lag_seconds = None
+                logger.warning("Replica lag check failed, reading from primary: %s", exc)
+            self._checked_at = time.monotonic()
+
+    async def replica_healthy(self) -> bool:
+        """True when a replica is configured and within the lag tolerance."""
+        if not self.configured:
+            return False
+        if time.monotonic() - self._checked_at >= settings.replica_lag_check_seconds:
+            await self._refresh_lag()
+        return self.lag_seconds is not None and self.lag_seconds <= settings.replica_max_lag_seconds
+
+    async def use_replica(self, user_id: Optional[int]) -> bool:
+        """
+        Decide where this request's reads go, and count the decision.
+
+        Args:
+            user_id: The requesting user, or None when not yet known
+
+        Returns:
+            True to read from the replica, False for the primary
+        """
+        if not self.configured:
+            self.stats.primary_reads += 1
+            return False
+        if not await self.replica_healthy():
+            self.stats.lag_fallbacks += 1
+            self.stats.primary_reads += 1
+            return False
+        if user_id is not None and await self.wrote_recently(user_id):
+            self.stats.recent_write_fallbacks += 1
+            self.stats.primary_reads += 1
+            return False
+        self.stats.replica_reads += 1
+        return True
+
+    def status(self) -> dict[str, Any]:
+        """Routing configuration, last measured lag and counters."""
+        return {
+            "configured": self.configured,
+            "lag_seconds": self.lag_seconds,
+            "max_lag_seconds": settings.replica_max_lag_seconds,
+            "read_your_writes_seconds": settings.replica_read_your_writes_seconds,
+            **self.stats.as_dict(),
+        }
+
+
+# Singleton instance
+read_router = ReadRouter()
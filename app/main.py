@@ -1,16 +1,70 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.routers import (
-    user, chat, thread, message, recipe
+    user, chat, thread, message, recipe, admin, health, metrics
 )
 from app.core.config import settings
+from app.core.loop_monitor import LoopMonitorMiddleware, forbid_blocking_calls, loop_monitor
+from app.core.metrics import PrometheusMiddleware
 from app.core.openapi import custom_openapi
+from app.core.profiling import ProfilingMiddleware
+from app.core.redis import close_redis
+from app.core.resources import resources
+from app.core.stream_bus import stream_bus
+from app.core.tracing import instrument_app, shutdown_tracing, start_tracing
+from app.db_config.db_async_session import engine as async_engine, replica_engine
+from app.db_config.session import engine as sync_engine
+from app.services.drain_service import drain_service
+from app.services.thread_purge_service import thread_purge_worker
+from app.services.usage_service import usage_recorder
+from app.services.warmup_service import warmup_service
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start this process's warm-up and background workers; stop them on shutdown.
+
+    Runs in each worker after fork, so connections are never shared between
+    processes. The worker serves requests right away; `/readyz` fails until
+    warm-up has finished. Shutdown drains in-flight chat streams before
+    closing pools, Redis and the checkpointer.
+    """
+    start_tracing()
+    if settings.loop_blocking_strict:
+        logger.warning("Blocking calls on the event loop will raise: %s", ", ".join(forbid_blocking_calls()))
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    drain_service.install_signal_handlers()
+    warmup_service.start()
+    thread_purge_worker.start()
+    usage_recorder.start()
+    yield
+    await drain_service.wait()
+    await warmup_service.stop()
+    await thread_purge_worker.stop()
+    await usage_recorder.stop()
+    await loop_monitor.stop()
+    await stream_bus.close()
+    await resources.close()
+    await close_redis()
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+    sync_engine.dispose()
+    shutdown_tracing()
 
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title=settings.app_name,
+        lifespan=lifespan,
         openapi_url=f"{settings.api_v1_str}/openapi.json",
         docs_url=f"{settings.api_v1_str}/docs",
         swagger_ui_init_oauth={
@@ -32,10 +86,20 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", "Retry-After", "X-Profile-Id"],
     )
+    if settings.loop_monitor_enabled:
+        app.add_middleware(LoopMonitorMiddleware)
+    if settings.metrics_enabled:
+        app.add_middleware(PrometheusMiddleware)
+    if settings.profiling_enabled:
+        app.add_middleware(ProfilingMiddleware)
+    instrument_app(app)
 
     # Routers
-   
+    app.include_router(health.router, tags=["health"])
+    if settings.metrics_enabled:
+        app.include_router(metrics.router, tags=["metrics"])
     app.include_router(
         user.router,
         prefix=f"{settings.api_v1_str}/user",
@@ -61,6 +125,11 @@ def create_app() -> FastAPI:
         prefix=f"{settings.api_v1_str}/recipes",
         tags=["recipes"],
     )
+    app.include_router(
+        admin.router,
+        prefix=f"{settings.api_v1_str}/admin",
+        tags=["admin"],
+    )
 
     return app
 
@@ -0,0 +1,26 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, Float, ForeignKey, Integer, String, func
+
+from app.db_config.base import Base
+
+
+class LlmUsage(Base):
+    """
+    LLM usage per user, UTC day, agent and model.
+
+    Counters are only ever incremented (batched upserts). Chat turns and
+    time to first token are counted on the agent that streams the answer.
+    """
+    __tablename__ = "llm_usage_daily"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    agent = Column(String, primary_key=True)
+    model = Column(String, primary_key=True)
+    turns = Column(Integer, nullable=False, server_default="0")
+    llm_calls = Column(Integer, nullable=False, server_default="0")
+    prompt_tokens = Column(BigInteger, nullable=False, server_default="0")
+    cached_prompt_tokens = Column(BigInteger, nullable=False, server_default="0")
+    completion_tokens = Column(BigInteger, nullable=False, server_default="0")
+    llm_seconds = Column(Float, nullable=False, server_default="0")  # summed model call time
+    ttft_seconds = Column(Float, nullable=False, server_default="0")  # summed over `turns`
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
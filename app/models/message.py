@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -14,8 +14,13 @@ class Message(Base):
     role = Column(String, nullable=False)  # "user" or "assistant"
     recipe_data = Column(JSONB, nullable=True)  # recipes array for UI to render cards on refresh
 
-    thread_id = Column(UUID(as_uuid=True), ForeignKey("threads.id"), nullable=False, index=True)
+    thread_id = Column(UUID(as_uuid=True), ForeignKey("threads.id", ondelete="CASCADE"), nullable=False, index=True)
     thread = relationship("Thread", back_populates="messages")
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Ordered history per thread; also used by the thread activity trigger.
+        Index("ix_messages_thread_id_created_at", thread_id, created_at),
+    )
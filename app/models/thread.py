@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, String, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -7,6 +7,13 @@ from app.db_config.base import Base
 
 
 class Thread(Base):
+    """
+    Conversation thread.
+
+    last_message_at, message_count and last_message_preview are maintained by
+    the `messages_thread_activity` trigger (see migration 004) on every message
+    insert/delete, so list views never need to join `messages`.
+    """
     __tablename__ = "threads"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
@@ -14,9 +21,30 @@ class Thread(Base):
     user = relationship("User", back_populates="threads")
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    deleted_at = Column(DateTime, nullable=True)  # soft delete; row is purged in the background
+    last_message_at = Column(DateTime, default=datetime.utcnow, server_default=text("now()"), nullable=False)
+    message_count = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    last_message_preview = Column(String, nullable=True)  # first 200 chars of the latest message
     messages = relationship(
         "Message",
         back_populates="thread",
         cascade="all, delete-orphan",
+        passive_deletes=True,  # messages are removed by ON DELETE CASCADE
         order_by="Message.created_at",
     )
+
+    __table_args__ = (
+        # Only soft-deleted rows are indexed; the purge worker scans this.
+        Index(
+            "ix_threads_deleted_at",
+            deleted_at,
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+        # Thread sidebar: a user's live threads, most recent activity first.
+        Index(
+            "ix_threads_user_id_last_message_at",
+            user_id,
+            last_message_at.desc(),
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+    )
@@ -0,0 +1,67 @@
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class CacheStatsOut(BaseModel):
+    """Read cache counters for this process."""
+    hits: int
+    misses: int
+    errors: int
+    bypassed: int
+    discarded: int
+    hit_rate: float
+    avg_lookup_ms: float
+    avg_load_ms: float
+
+
+class RateLimitStatsOut(BaseModel):
+    """Chat limit decisions for this process."""
+    allowed: int
+    rate_limited: int
+    concurrency_limited: int
+    errors: int
+    active_streams: int
+
+
+class ReadRoutingOut(BaseModel):
+    """Read replica routing state and decisions for this process."""
+    configured: bool
+    lag_seconds: Optional[float]
+    max_lag_seconds: float
+    read_your_writes_seconds: float
+    replica_reads: int
+    primary_reads: int
+    recent_write_fallbacks: int
+    lag_fallbacks: int
+    lag_check_errors: int
+
+
+class UsageRowOut(BaseModel):
+    """LLM usage of one user, agent and model on one UTC day."""
+    user_id: int
+    day: date
+    agent: str
+    model: str
+    turns: int
+    llm_calls: int
+    prompt_tokens: int
+    cached_prompt_tokens: int
+    completion_tokens: int
+    llm_seconds: float
+    avg_ttft_ms: Optional[float]
+    tokens_per_second: Optional[float]
+    updated_at: datetime
+
+
+class ProfileOut(BaseModel):
+    """A stored request profile."""
+    id: str
+    method: str
+    path: str
+    status_code: Optional[int]
+    started_at: datetime
+    duration_seconds: float
+    samples: int
+    interval_ms: float
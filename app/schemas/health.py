@@ -0,0 +1,34 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class HealthOut(BaseModel):
+    """Liveness response."""
+    status: str = "ok"
+
+
+class WarmUpStepOut(BaseModel):
+    """Warm-up outcome for one component."""
+    state: str
+    seconds: Optional[float] = None
+    attempts: int
+    error: Optional[str] = None
+
+
+class ReadinessOut(BaseModel):
+    """Readiness response with per-component warm-up timings."""
+    ready: bool
+    draining: bool = False
+    warmup_seconds: Optional[float] = None
+    components: Dict[str, WarmUpStepOut]
+
+
+class DrainStatusOut(BaseModel):
+    """Shutdown drain progress for one worker."""
+    draining: bool
+    finished: bool
+    elapsed_seconds: Optional[float] = None
+    turns_at_start: int
+    turns_in_flight: int
+    turns_cancelled: int
@@ -83,3 +83,21 @@ class Recipe(BaseModel):
     updated_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
+
+
+class RecipeImportError(BaseModel):
+    """A single NDJSON line that could not be imported."""
+
+    line: int = Field(..., description="1-based line number in the uploaded file")
+    error: str
+
+
+class RecipeImportResult(BaseModel):
+    """Summary of a bulk NDJSON recipe import."""
+
+    imported: int = 0
+    failed: int = 0
+    errors: list[RecipeImportError] = Field(
+        default_factory=list,
+        description="Per-line errors (capped; see `failed` for the total count)",
+    )
@@ -16,7 +16,15 @@ class ThreadOut(BaseModel):
     user_id: int  # User.id is still Integer
     created_at: datetime
     updated_at: datetime
+    last_message_at: Optional[datetime] = None
+    message_count: int = 0
+    last_message_preview: Optional[str] = None
     messages: Optional[List[MessageOut]] = None
 
     class Config:
         from_attributes = True
+
+
+class ThreadBulkDeleteOut(BaseModel):
+    """Result of a bulk thread deletion."""
+    deleted: int
@@ -2,17 +2,24 @@ import asyncio
 import base64
 import json
 import logging
+import time
 from typing import AsyncGenerator, Generator
 from uuid import UUID
 
 from fastapi import UploadFile
 from langchain_core.messages import HumanMessage
+from opentelemetry import context as otel_context
+from opentelemetry import trace
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.agents.general_agent.agent import stream_general_agent
 from app.agents.general_agent.schemas import GeneralAgentContext
 from app.agents.general_agent.tools.save_recipe_tool import _normalize_recipe_payload
+from app.core.metrics import CHAT_CANCELLATIONS, CHAT_STAGE_SECONDS, time_stage
+from app.core.profiling import profile_thread
+from app.core.tracing import bind_context, end_span, tracer
 from app.services.message_service import MessageService
+from app.services.usage_service import TurnUsage, usage_recorder
 from app.utils.recipe_utils import normalize_recipe_times
 
 logger = logging.getLogger(__name__)
@@ -138,13 +145,17 @@ class ChatService:
         db: AsyncSession,
         image_base64: str | None = None,
         image_type: str = "image/jpeg",
-        user_language: str = "English"
+        user_language: str = "English",
+        cancel_event: asyncio.Event | None = None,
     ) -> AsyncGenerator[str, None]:
         """
         Stream the agent response and persist messages to database.
         
         Note: The PostgresSaver checkpointer handles agent memory/history.
         We only save messages to the database for frontend display purposes.
+
+        When `cancel_event` is set the agent stops being polled, a `cancelled`
+        event is sent and whatever the assistant said so far is saved.
         
         Args:
             message: User's text message
@@ -154,26 +165,73 @@ class ChatService:
             image_base64: Optional base64-encoded image
             image_type: MIME type of the image
             user_language: User's preferred language
+            cancel_event: Optional event that stops the turn when set
             
         Yields:
             Response tokens from the agent
         """
+        span = tracer.start_span(
+            "chat.turn", attributes={"chat.thread_id": thread_id, "chat.user_id": user_id}
+        )
+        usage = TurnUsage()
+        error: BaseException | None = None
+        try:
+            async for chunk in self._stream_turn(
+                message=message,
+                thread_id=thread_id,
+                user_id=user_id,
+                db=db,
+                image_base64=image_base64,
+                image_type=image_type,
+                user_language=user_language,
+                cancel_event=cancel_event,
+                trace_context=trace.set_span_in_context(span),
+                usage=usage,
+            ):
+                yield chunk
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            end_span(span, error)
+            usage_recorder.record(user_id, usage)
+            logger.info("Chat turn usage (thread %s): %s", thread_id, usage.summary())
+
+    async def _stream_turn(
+        self,
+        message: str,
+        thread_id: str,
+        user_id: int,
+        db: AsyncSession,
+        image_base64: str | None,
+        image_type: str,
+        user_language: str,
+        cancel_event: asyncio.Event | None,
+        trace_context: otel_context.Context,
+        usage: TurnUsage,
+    ) -> AsyncGenerator[str, None]:
+        """
+        Body of `stream_with_persistence`; its steps are traced under
+        `trace_context` and its LLM usage is collected in `usage`.
+        """
         thread_uuid = UUID(thread_id)
         message_service = MessageService(db)
         
         # Save user message to database (for frontend display)
-        await message_service.create_message(
-            thread_id=thread_uuid,
-            content=message,
-            role="user",
-            user_id=user_id
-        )
+        with tracer.start_as_current_span("chat.message_insert", context=trace_context), time_stage("message_insert"):
+            await message_service.create_message(
+                thread_id=thread_uuid,
+                content=message,
+                role="user",
+                user_id=user_id
+            )
         
         current_content = self.create_message_content(message, image_base64, image_type)
         current_message = HumanMessage(content=current_content)
         
         # Build config and context (user_id for save_recipe tool)
         config = self.build_config(thread_id, user_id=user_id)
+        config["callbacks"] = [usage]
         context = self.build_context(user_language, user_id=user_id)
 
         def _status_event(message: str) -> str:
@@ -184,6 +242,8 @@ class ChatService:
         full_response_parts: list[str] = []
         recipes_for_message: list[dict] = []  # persisted with message for UI on refresh
         sync_stream = stream_general_agent([current_message], config, context)
+        agent_started = time.perf_counter()
+        first_token_at: float | None = None
         loop = asyncio.get_event_loop()
 
         def _next_or_none(gen):
@@ -192,6 +252,10 @@ class ChatService:
             except StopIteration:
                 return None
 
+        # Executor threads do not inherit the trace context; agent spans nest under the turn.
+        # A profiled request also samples the threads running the agent steps.
+        next_in_trace = profile_thread(bind_context(_next_or_none, trace_context))
+
         def _is_recipe_json(text: str) -> bool:
             """True if text is (or looks like) call_chef_agent JSON so we don't save it as message content."""
             if not text:
@@ -208,7 +272,18 @@ class ChatService:
                 return False
 
         while True:
-            chunk = await loop.run_in_executor(None, _next_or_none, sync_stream)
+            next_chunk = loop.run_in_executor(None, next_in_trace, sync_stream)
+            if cancel_event is not None:
+                cancelled = asyncio.ensure_future(cancel_event.wait())
+                await asyncio.wait({next_chunk, cancelled}, return_when=asyncio.FIRST_COMPLETED)
+                cancelled.cancel()
+                if cancel_event.is_set():
+                    # The pending agent step finishes in its worker thread and is discarded
+                    next_chunk.add_done_callback(lambda f: f.cancelled() or f.exception())
+                    CHAT_CANCELLATIONS.inc()
+                    yield "data: " + json.dumps({"type": "cancelled"}) + "\n\n"
+                    break
+            chunk = await next_chunk
             if chunk is None:
                 break
 
@@ -253,6 +328,10 @@ class ChatService:
                     json_str = line[6:]
                     parsed = json.loads(json_str)
                     if parsed.get("type") == "data" and parsed.get("data"):
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                            usage.ttft_seconds = first_token_at - agent_started
+                            CHAT_STAGE_SECONDS.labels(stage="first_token").observe(first_token_at - agent_started)
                         data_content = parsed["data"]
                         if not _is_recipe_json(data_content):
                             full_response_parts.append(data_content)
@@ -264,13 +343,14 @@ class ChatService:
         if not full_response and recipes_for_message:
             full_response = (recipes_for_message[0].get("name") or "Recipe").strip() or None
         if full_response:
-            await message_service.create_message(
-                thread_id=thread_uuid,
-                content=full_response,
-                role="assistant",
-                user_id=user_id,
-                recipe_data=recipes_for_message if recipes_for_message else None,
-            )
+            with tracer.start_as_current_span("chat.persist", context=trace_context), time_stage("persist"):
+                await message_service.create_message(
+                    thread_id=thread_uuid,
+                    content=full_response,
+                    role="assistant",
+                    user_id=user_id,
+                    recipe_data=recipes_for_message if recipes_for_message else None,
+                )
             logger.debug(f"Saved assistant message: {len(full_response)} chars")
 
 
@@ -0,0 +1,130 @@
+"""
+Graceful drain of in-flight chat streams on shutdown.
+
+On SIGTERM/SIGINT (or at lifespan shutdown at the latest) the worker:
+
+1. stops accepting new chat streams (503 + `Retry-After`) and fails `/readyz`
+   so the load balancer routes elsewhere;
+2. lets running turns finish, up to `settings.shutdown_drain_seconds`;
+3. cancels the turns still running at the deadline, which makes them send a
+   `cancelled` event and save the partial answer, and waits up to
+   `settings.shutdown_cancel_grace_seconds` for those writes.
+
+Uvicorn waits for open responses before running the lifespan shutdown, so the
+drain starts from a signal handler chained in front of uvicorn's. Run uvicorn
+with `--timeout-graceful-shutdown` above the sum of both settings.
+"""
+import asyncio
+import logging
+import signal
+import threading
+import time
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.stream_bus import stream_bus
+
+logger = logging.getLogger(__name__)
+
+
+class DrainService:
+    """Coordinates the shutdown drain of this worker."""
+
+    def __init__(self) -> None:
+        self.draining = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.turns_at_start = 0
+        self.turns_cancelled = 0
+        self._task: asyncio.Task | None = None
+
+    def install_signal_handlers(self) -> None:
+        """Begin draining as soon as SIGTERM/SIGINT arrives, then defer to uvicorn."""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                loop.call_soon_threadsafe(self.begin)
+                previous(signum, frame)
+
+            signal.signal(sig, handler)
+
+    def check_accepting(self) -> None:
+        """Raise 503 when this worker no longer takes new chat streams."""
+        if self.draining:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is restarting. Please retry.",
+                headers={"Retry-After": "1"},
+            )
+
+    def begin(self) -> None:
+        """Start draining (idempotent)."""
+        if self.draining:
+            return
+        self.draining = True
+        self.started_at = time.monotonic()
+        self.turns_at_start = len(stream_bus.active_turns())
+        logger.info("Draining: %d chat turn(s) in flight", self.turns_at_start)
+        self._task = asyncio.create_task(self._drain(), name="drain")
+
+    async def wait(self) -> None:
+        """Begin draining if needed and wait until it has finished."""
+        self.begin()
+        await self._task
+
+    async def _drain(self) -> None:
+        deadline = self.started_at + settings.shutdown_drain_seconds
+        last_log = 0.0
+        while stream_bus.active_turns() and time.monotonic() < deadline:
+            now = time.monotonic()
+            if now - last_log >= 5:
+                last_log = now
+                logger.info(
+                    "Draining: %d chat turn(s) in flight, %.0fs until cancel",
+                    len(stream_bus.active_turns()),
+                    deadline - now,
+                )
+            await asyncio.sleep(0.1)
+
+        remaining = stream_bus.active_turns()
+        if remaining:
+            self.turns_cancelled = len(remaining)
+            logger.warning("Drain deadline reached, cancelling %d chat turn(s)", len(remaining))
+            for turn in remaining:
+                turn.cancelled.set()
+            grace_deadline = time.monotonic() + settings.shutdown_cancel_grace_seconds
+            while stream_bus.active_turns() and time.monotonic() < grace_deadline:
+                await asyncio.sleep(0.1)
+
+        self.finished_at = time.monotonic()
+        logger.info(
+            "Drain finished in %.1fs (%d turn(s) at start, %d cancelled, %d unfinished)",
+            self.finished_at - self.started_at,
+            self.turns_at_start,
+            self.turns_cancelled,
+            len(stream_bus.active_turns()),
+        )
+
+    def status(self) -> dict:
+        """Drain progress for this worker."""
+        now = self.finished_at or time.monotonic()
+        return {
+            "draining": self.draining,
+            "finished": self.finished_at is not None,
+            "elapsed_seconds": now - self.started_at if self.started_at is not None else None,
+            "turns_at_start": self.turns_at_start,
+            "turns_in_flight": len(stream_bus.active_turns()),
+            "turns_cancelled": self.turns_cancelled,
+        }
+
+
+# Singleton instance
+drain_service = DrainService()
@@ -1,10 +1,25 @@
+from app.core.cache import read_cache
+from app.db_config.read_routing import read_router
 from app.models.message import Message
 from app.models.thread import Thread
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
+from sqlalchemy import Row, select
+from typing import List, Optional, Sequence
 from uuid import UUID
 
+from app.utils.fieldsets import select_columns
+
+# Column projection matching MessageOut (recipe_data is exposed as `recipes`)
+MESSAGE_OUT_COLUMNS = (
+    Message.id,
+    Message.content,
+    Message.role,
+    Message.thread_id,
+    Message.recipe_data.label("recipes"),
+    Message.created_at,
+    Message.updated_at,
+)
+
 
 class MessageService:
     """Service layer for message operations."""
@@ -47,6 +62,8 @@ class MessageService:
         self.db.add(message)
         await self.db.commit()
         await self.db.refresh(message)
+        await read_cache.invalidate("threads", user_id)  # activity columns changed
+        await read_router.record_write(user_id)
         return message
 
     async def get_messages(
@@ -73,6 +90,85 @@ class MessageService:
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
+    async def get_message_rows(
+        self,
+        thread_id: UUID,
+        user_id: int,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Row]:
+        """
+        Get MessageOut column projections for a thread in a single query.
+
+        Ownership is checked in the same statement through a join on threads.
+
+        Args:
+            thread_id: Thread ID
+            user_id: User ID to verify thread ownership
+            fields: Optional MessageOut field names to select (all when None)
+
+        Returns:
+            Rows ordered by creation time, empty if the thread is not accessible
+        """
+        stmt = (
+            select(*select_columns(MESSAGE_OUT_COLUMNS, fields))
+            .join(Thread, Thread.id == Message.thread_id)
+            .where(
+                Message.thread_id == thread_id,
+                Thread.user_id == user_id,
+                Thread.deleted_at.is_(None),
+            )
+            .order_by(Message.created_at.asc())
+        )
+        result = await self.db.execute(stmt)
+        return list(result.all())
+
+    async def get_thread_version(self, thread_id: UUID, user_id: int) -> Optional[tuple]:
+        """
+        Cheap version marker for a thread's messages (used for ETags).
+
+        A single primary-key lookup on threads; the activity columns change on
+        every message insert/delete.
+
+        Returns:
+            Version tuple, or None if the thread is not accessible
+        """
+        stmt = select(Thread.message_count, Thread.last_message_at, Thread.updated_at).where(
+            Thread.id == thread_id,
+            Thread.user_id == user_id,
+            Thread.deleted_at.is_(None),
+        )
+        row = (await self.db.execute(stmt)).one_or_none()
+        return tuple(row) if row else None
+
+    async def get_message_row(
+        self,
+        message_id: UUID,
+        user_id: int,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Optional[Row]:
+        """
+        Get a MessageOut column projection for one message.
+
+        Args:
+            message_id: Message ID
+            user_id: User ID to verify thread ownership
+            fields: Optional MessageOut field names to select (all when None)
+
+        Returns:
+            Row if found and thread belongs to user, None otherwise
+        """
+        stmt = (
+            select(*select_columns(MESSAGE_OUT_COLUMNS, fields))
+            .join(Thread, Thread.id == Message.thread_id)
+            .where(
+                Message.id == message_id,
+                Thread.user_id == user_id,
+                Thread.deleted_at.is_(None),
+            )
+        )
+        result = await self.db.execute(stmt)
+        return result.one_or_none()
+
     async def get_message(
         self, 
         message_id: UUID, 
@@ -123,6 +219,8 @@ class MessageService:
         
         await self.db.delete(message)
         await self.db.commit()
+        await read_cache.invalidate("threads", user_id)
+        await read_router.record_write(user_id)
         return True
 
     async def _verify_thread_ownership(
@@ -142,7 +240,8 @@ class MessageService:
         """
         stmt = select(Thread).where(
             Thread.id == thread_id,
-            Thread.user_id == user_id
+            Thread.user_id == user_id,
+            Thread.deleted_at.is_(None),
         )
         result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
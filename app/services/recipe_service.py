@@ -1,14 +1,47 @@
+import logging
 from datetime import datetime, timedelta
-from typing import List, Union
+from typing import AsyncGenerator, AsyncIterator, List, Optional, Sequence, Union
 from uuid import UUID
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.cache import read_cache
+from app.core.config import settings
+from app.db_config.read_routing import read_router
 from app.models.recipe import Recipe as RecipeModel
-from app.schemas.recipe import Recipe, RecipeCreate, RecipeUpdate
+from app.schemas.recipe import (
+    Recipe,
+    RecipeCreate,
+    RecipeImportError,
+    RecipeImportResult,
+    RecipeUpdate,
+)
+from app.utils.fieldsets import select_columns
+
+logger = logging.getLogger(__name__)
+
+# Column projection matching the Recipe response schema
+RECIPE_OUT_COLUMNS = (
+    RecipeModel.id,
+    RecipeModel.name,
+    RecipeModel.description,
+    RecipeModel.prep_time,
+    RecipeModel.cook_time,
+    RecipeModel.total_time,
+    RecipeModel.servings,
+    RecipeModel.difficulty,
+    RecipeModel.ingredients,
+    RecipeModel.instructions,
+    RecipeModel.tags,
+    RecipeModel.image_url,
+    RecipeModel.created_at,
+    RecipeModel.updated_at,
+)
 
 
 def _serialize_ingredients(ingredients: list) -> list:
@@ -29,6 +62,40 @@ def _serialize_instructions(instructions: list) -> list:
     return [item.model_dump() if hasattr(item, "model_dump") else item for item in instructions]
 
 
+def _recipe_columns(data: dict, user_id: int) -> dict:
+    """Map a recipe payload to RecipeModel column values."""
+    return {
+        "name": data["name"],
+        "description": data["description"],
+        "prep_time": data["prep_time"],
+        "cook_time": data["cook_time"],
+        "total_time": data["total_time"],
+        "servings": data["servings"],
+        "difficulty": data["difficulty"],
+        "ingredients": _serialize_ingredients(data.get("ingredients", [])),
+        "instructions": _serialize_instructions(data.get("instructions", [])),
+        "tags": data.get("tags") or [],
+        "image_url": data.get("image_url"),
+        "user_id": user_id,
+    }
+
+
+def _add_import_error(result: RecipeImportResult, line: int, error: str, count: int = 1) -> None:
+    """Count `count` failed lines, reporting the error while under `recipe_import_max_errors`."""
+    result.failed += count
+    if len(result.errors) < settings.recipe_import_max_errors:
+        result.errors.append(RecipeImportError(line=line, error=error))
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    """Flatten a pydantic ValidationError into a short one-line message."""
+    parts = []
+    for err in exc.errors(include_url=False):
+        loc = ".".join(str(p) for p in err.get("loc", ()))
+        parts.append(f"{loc}: {err['msg']}" if loc else err["msg"])
+    return "; ".join(parts)
+
+
 class RecipeService:
     """Service layer for recipe operations."""
 
@@ -41,26 +108,12 @@ class RecipeService:
             data = recipe_data.model_dump()
         else:
             data = dict(recipe_data)
-        ingredients = _serialize_ingredients(data.get("ingredients", []))
-        instructions = _serialize_instructions(data.get("instructions", []))
-        tags = data.get("tags") or []
-        recipe_model = RecipeModel(
-            name=data["name"],
-            description=data["description"],
-            prep_time=data["prep_time"],
-            cook_time=data["cook_time"],
-            total_time=data["total_time"],
-            servings=data["servings"],
-            difficulty=data["difficulty"],
-            ingredients=ingredients,
-            instructions=instructions,
-            tags=tags,
-            image_url=data.get("image_url"),
-            user_id=user_id,
-        )
+        recipe_model = RecipeModel(**_recipe_columns(data, user_id))
         self.db.add(recipe_model)
         await self.db.commit()
         await self.db.refresh(recipe_model)
+        await read_cache.invalidate("recipes", user_id)
+        await read_router.record_write(user_id)
         return recipe_model
 
     @staticmethod
@@ -85,26 +138,12 @@ class RecipeService:
         )
         if existing:
             return existing
-        ingredients = _serialize_ingredients(data.get("ingredients", []))
-        instructions = _serialize_instructions(data.get("instructions", []))
-        tags = data.get("tags") or []
-        recipe_model = RecipeModel(
-            name=data["name"],
-            description=data["description"],
-            prep_time=data["prep_time"],
-            cook_time=data["cook_time"],
-            total_time=data["total_time"],
-            servings=data["servings"],
-            difficulty=data["difficulty"],
-            ingredients=ingredients,
-            instructions=instructions,
-            tags=tags,
-            image_url=data.get("image_url"),
-            user_id=user_id,
-        )
+        recipe_model = RecipeModel(**_recipe_columns(data, user_id))
         db.add(recipe_model)
         db.commit()
         db.refresh(recipe_model)
+        read_cache.invalidate_sync("recipes", user_id)
+        read_router.record_write_sync(user_id)
         return recipe_model
 
     async def get_recipe_by_id(self, recipe_id: UUID, user_id: int) -> RecipeModel:
@@ -128,6 +167,152 @@ class RecipeService:
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
+    async def get_recipe_data(
+        self, recipe_id: UUID, user_id: int, fields: Optional[Sequence[str]] = None
+    ) -> dict:
+        """
+        Get one recipe as a Recipe-shaped dict (cached; must belong to user).
+
+        `fields` limits the selected columns. Raises 404 if not found.
+        """
+        async def load() -> Optional[dict]:
+            stmt = select(*select_columns(RECIPE_OUT_COLUMNS, fields)).where(
+                RecipeModel.id == recipe_id,
+                RecipeModel.user_id == user_id,
+            )
+            row = (await self.db.execute(stmt)).one_or_none()
+            return row._asdict() if row else None
+
+        recipe = await read_cache.get_or_load(
+            "recipes", user_id, read_cache.variant("item", str(recipe_id), fields), load
+        )
+        if recipe is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Recipe not found",
+            )
+        return recipe
+
+    async def get_recipe_rows(
+        self, user_id: int, fields: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        """
+        Get Recipe-shaped dicts for all of a user's recipes (cached, no ORM objects).
+
+        `fields` limits the selected columns, e.g. to skip the JSONB ingredients,
+        instructions and tags for title-only list views.
+        """
+        async def load() -> List[dict]:
+            stmt = select(*select_columns(RECIPE_OUT_COLUMNS, fields)).where(
+                RecipeModel.user_id == user_id
+            )
+            return [row._asdict() for row in (await self.db.execute(stmt)).all()]
+
+        return await read_cache.get_or_load(
+            "recipes", user_id, read_cache.variant("list", fields), load
+        )
+
+    async def get_recipes_version(self, user_id: int) -> list:
+        """Cheap version marker for a user's recipe list (cached; used for ETags)."""
+        async def load() -> list:
+            stmt = select(func.count(RecipeModel.id), func.max(RecipeModel.updated_at)).where(
+                RecipeModel.user_id == user_id
+            )
+            return list((await self.db.execute(stmt)).one())
+
+        return await read_cache.get_or_load("recipes", user_id, "version", load)
+
+    async def export_recipes_ndjson(self, user_id: int) -> AsyncGenerator[str, None]:
+        """
+        Stream all recipes for a user as NDJSON.
+
+        Rows are read through a server-side cursor in batches of
+        `settings.recipe_export_batch_size`, so memory stays constant regardless
+        of collection size.
+
+        Args:
+            user_id: Owner of the recipes
+
+        Yields:
+            One JSON-encoded `Recipe` per line
+        """
+        stmt = (
+            select(RecipeModel)
+            .where(RecipeModel.user_id == user_id)
+            .order_by(RecipeModel.created_at.asc())
+            .execution_options(yield_per=settings.recipe_export_batch_size)
+        )
+        result = await self.db.stream_scalars(stmt)
+        async for recipe in result:
+            yield Recipe.model_validate(recipe).model_dump_json() + "\n"
+
+    async def import_recipes(
+        self, lines: AsyncIterator[tuple[int, Optional[bytes]]], user_id: int
+    ) -> RecipeImportResult:
+        """
+        Bulk-import recipes from NDJSON lines.
+
+        Each line is validated against `RecipeCreate`. Valid rows are written with
+        multi-row inserts, one transaction per `settings.recipe_import_batch_size`
+        rows; invalid lines are reported and skipped. A batch the database
+        rejects is rolled back and reported as failed, with its line range, and
+        the import goes on with the next batch.
+
+        Args:
+            lines: Async iterator of (line_number, raw_json) tuples; raw_json is
+                None for a line over the length limit
+            user_id: Owner of the imported recipes
+
+        Returns:
+            RecipeImportResult with imported/failed counts and per-line errors
+        """
+        result = RecipeImportResult()
+        batch: list[dict] = []
+        batch_lines: list[int] = []
+        try:
+            async for line_number, raw in lines:
+                if raw is None:
+                    _add_import_error(
+                        result, line_number, f"Line longer than {settings.recipe_import_max_line_bytes} bytes"
+                    )
+                    continue
+                try:
+                    recipe = RecipeCreate.model_validate_json(raw)
+                except ValidationError as exc:
+                    _add_import_error(result, line_number, _format_validation_error(exc))
+                    continue
+                batch.append(_recipe_columns(recipe.model_dump(), user_id))
+                batch_lines.append(line_number)
+                if len(batch) >= settings.recipe_import_batch_size:
+                    await self._insert_batch(batch, batch_lines, result)
+                    batch, batch_lines = [], []
+            if batch:
+                await self._insert_batch(batch, batch_lines, result)
+        finally:
+            # Also when the import stops halfway: committed batches must show in the list
+            if result.imported:
+                await read_cache.invalidate("recipes", user_id)
+                await read_router.record_write(user_id)
+        return result
+
+    async def _insert_batch(self, rows: list[dict], lines: list[int], result: RecipeImportResult) -> None:
+        """Insert a batch of recipe rows in a single transaction, counting it in `result`."""
+        try:
+            await self.db.execute(insert(RecipeModel), rows)
+            await self.db.commit()
+        except SQLAlchemyError as exc:
+            await self.db.rollback()
+            logger.warning("Recipe import batch (lines %d-%d) rolled back: %s", lines[0], lines[-1], exc)
+            _add_import_error(
+                result,
+                lines[0],
+                f"Lines {lines[0]}-{lines[-1]} not imported: the database rejected the batch "
+                f"({type(getattr(exc, 'orig', None) or exc).__name__})",
+                count=len(rows),
+            )
+            return
+        result.imported += len(rows)
+
     async def update_recipe(
         self, recipe_id: UUID, recipe_data: Union[dict, RecipeUpdate], user_id: int
     ) -> RecipeModel:
@@ -146,6 +331,8 @@ class RecipeService:
                 setattr(recipe, key, value)
         await self.db.commit()
         await self.db.refresh(recipe)
+        await read_cache.invalidate("recipes", user_id)
+        await read_router.record_write(user_id)
         return recipe
 
     async def delete_recipe(self, recipe_id: UUID, user_id: int) -> None:
@@ -153,3 +340,5 @@ class RecipeService:
         recipe = await self.get_recipe_by_id(recipe_id, user_id)
         await self.db.delete(recipe)
         await self.db.commit()
+        await read_cache.invalidate("recipes", user_id)
+        await read_router.record_write(user_id)
@@ -0,0 +1,114 @@
+"""
+Background purge of soft-deleted threads.
+
+Thread deletion from the API only stamps `threads.deleted_at`. This worker
+later removes the LangGraph checkpoint rows for each deleted thread in small
+batches and then deletes the thread row itself; messages go with it through
+the `ON DELETE CASCADE` foreign key.
+"""
+import asyncio
+import logging
+from uuid import UUID
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db_config.db_async_session import async_session
+from app.models.thread import Thread
+
+logger = logging.getLogger(__name__)
+
+# Tables written by langgraph-checkpoint-postgres, keyed by thread_id (text)
+CHECKPOINT_TABLES = ("checkpoint_writes", "checkpoint_blobs", "checkpoints")
+
+
+class ThreadPurgeWorker:
+    """Deletes soft-deleted threads and their checkpoints in the background."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = async_session):
+        self.session_factory = session_factory
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the purge loop on the running event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="thread-purge-worker")
+
+    async def stop(self) -> None:
+        """Cancel the purge loop and wait for it to exit."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def wake(self) -> None:
+        """Ask the worker to run now instead of waiting for the next interval."""
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                while await self.purge_pending() >= settings.thread_purge_threads_per_run:
+                    pass  # more work queued up; keep draining
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Thread purge run failed")
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=settings.thread_purge_interval_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def purge_pending(self) -> int:
+        """
+        Purge up to `settings.thread_purge_threads_per_run` soft-deleted threads.
+
+        Returns:
+            Number of threads purged
+        """
+        async with self.session_factory() as db:
+            stmt = (
+                select(Thread.id)
+                .where(Thread.deleted_at.is_not(None))
+                .order_by(Thread.deleted_at.asc())
+                .limit(settings.thread_purge_threads_per_run)
+            )
+            thread_ids = list((await db.execute(stmt)).scalars().all())
+            for thread_id in thread_ids:
+                await self._purge_thread(db, thread_id)
+        if thread_ids:
+            logger.info("Purged %d deleted threads", len(thread_ids))
+        return len(thread_ids)
+
+    async def _purge_thread(self, db: AsyncSession, thread_id: UUID) -> None:
+        """Delete checkpoints in batches, then the thread row (messages cascade)."""
+        batch_size = settings.thread_purge_batch_size
+        for table in CHECKPOINT_TABLES:
+            stmt = text(
+                f"DELETE FROM {table} WHERE ctid IN ("
+                f"SELECT ctid FROM {table} WHERE thread_id = :thread_id LIMIT :limit)"
+            )
+            while True:
+                result = await db.execute(
+                    stmt, {"thread_id": str(thread_id), "limit": batch_size}
+                )
+                await db.commit()
+                if result.rowcount < batch_size:
+                    break
+        await db.execute(
+            delete(Thread).where(Thread.id == thread_id, Thread.deleted_at.is_not(None))
+        )
+        await db.commit()
+
+
+# Singleton instance
+thread_purge_worker = ThreadPurgeWorker()
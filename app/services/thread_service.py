@@ -1,11 +1,30 @@
+from app.core.cache import read_cache
+from app.db_config.read_routing import read_router
 from app.models.thread import Thread
 from app.models.message import Message
+from app.services.message_service import MESSAGE_OUT_COLUMNS
+from app.services.thread_purge_service import thread_purge_worker
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import load_only, selectinload
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
 from uuid import UUID
 
+from app.utils.fieldsets import select_columns
+
+# Column projection matching ThreadOut (without messages)
+THREAD_OUT_COLUMNS = (
+    Thread.id,
+    Thread.user_id,
+    Thread.created_at,
+    Thread.updated_at,
+    Thread.last_message_at,
+    Thread.message_count,
+    Thread.last_message_preview,
+)
+
 
 class ThreadService:
     """Service layer for thread operations."""
@@ -19,23 +38,38 @@ class ThreadService:
         self.db.add(thread)
         await self.db.commit()
         await self.db.refresh(thread)
+        await read_cache.invalidate("threads", user_id)
+        await read_router.record_write(user_id)
         # Eagerly load messages (empty list for new thread)
         stmt = select(Thread).options(selectinload(Thread.messages)).where(Thread.id == thread.id)
         result = await self.db.execute(stmt)
         return result.scalar_one()
 
-    async def get_thread(self, thread_id: UUID, user_id: Optional[int] = None) -> Optional[Thread]:
+    async def get_thread(
+        self,
+        thread_id: UUID,
+        user_id: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Optional[Thread]:
         """
         Get a thread by ID, optionally filtered by user_id.
         
         Args:
             thread_id: Thread ID
             user_id: Optional user ID to verify ownership
+            fields: Optional ThreadOut field names to load (all when None);
+                messages are only loaded when "messages" is included
             
         Returns:
             Thread if found and accessible, None otherwise
         """
-        stmt = select(Thread).options(selectinload(Thread.messages)).where(Thread.id == thread_id)
+        stmt = select(Thread).where(Thread.id == thread_id, Thread.deleted_at.is_(None))
+        if fields is None or "messages" in fields:
+            stmt = stmt.options(selectinload(Thread.messages))
+        if fields is not None:
+            stmt = stmt.options(
+                load_only(*(getattr(Thread, f) for f in fields if f != "messages"))
+            )
         if user_id:
             stmt = stmt.where(Thread.user_id == user_id)
         
@@ -43,31 +77,143 @@ class ThreadService:
         return result.scalar_one_or_none()
 
     async def get_threads(self, user_id: int) -> List[Thread]:
-        """Get all threads for a user."""
+        """Get all threads for a user, most recently active first."""
         stmt = (
             select(Thread)
             .options(selectinload(Thread.messages))
-            .where(Thread.user_id == user_id)
-            .order_by(Thread.updated_at.desc())
+            .where(Thread.user_id == user_id, Thread.deleted_at.is_(None))
+            .order_by(Thread.last_message_at.desc())
         )
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
+    async def get_thread_rows(
+        self, user_id: int, fields: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        """
+        Get ThreadOut-shaped dicts for all of a user's threads (cached).
+
+        Uses column projections (no ORM identity map) and one extra query for
+        the messages of all threads.
+
+        Args:
+            user_id: Owner of the threads
+            fields: Optional ThreadOut field names to select (all when None);
+                messages are only queried when "messages" is included
+
+        Returns:
+            List of dicts with thread columns and, if requested, a `messages`
+            list of message dicts
+        """
+        return await read_cache.get_or_load(
+            "threads",
+            user_id,
+            read_cache.variant("list", fields),
+            lambda: self._load_thread_rows(user_id, fields),
+        )
+
+    async def _load_thread_rows(
+        self, user_id: int, fields: Optional[Sequence[str]]
+    ) -> List[dict]:
+        stmt = (
+            select(*select_columns(THREAD_OUT_COLUMNS, fields))
+            .where(Thread.user_id == user_id, Thread.deleted_at.is_(None))
+            .order_by(Thread.last_message_at.desc())
+        )
+        threads = (await self.db.execute(stmt)).all()
+        if not threads:
+            return []
+        if fields is not None and "messages" not in fields:
+            return [thread._asdict() for thread in threads]
+
+        messages_by_thread = defaultdict(list)
+        stmt = (
+            select(*MESSAGE_OUT_COLUMNS)
+            .where(Message.thread_id.in_([t.id for t in threads]))
+            .order_by(Message.created_at.asc())
+        )
+        for row in (await self.db.execute(stmt)).all():
+            messages_by_thread[row.thread_id].append(row._asdict())
+
+        return [
+            {**thread._asdict(), "messages": messages_by_thread[thread.id]}
+            for thread in threads
+        ]
+
+    async def get_threads_version(self, user_id: int) -> list:
+        """
+        Cheap version marker for a user's thread list (cached; used for ETags).
+
+        Changes whenever a thread is created or deleted, or a message is added
+        to or removed from any of the user's threads.
+        """
+        async def load() -> list:
+            stmt = select(
+                func.count(Thread.id),
+                func.max(Thread.updated_at),
+                func.coalesce(func.sum(Thread.message_count), 0),
+            ).where(Thread.user_id == user_id, Thread.deleted_at.is_(None))
+            return list((await self.db.execute(stmt)).one())
+
+        return await read_cache.get_or_load("threads", user_id, "version", load)
+
     async def delete_thread(self, thread_id: UUID, user_id: int) -> bool:
         """
-        Delete a thread if it belongs to the user.
-        
+        Soft-delete a thread if it belongs to the user.
+
+        The thread is hidden immediately; its messages and checkpoints are
+        removed later by the background purge worker.
+
         Args:
             thread_id: Thread ID to delete
             user_id: User ID to verify ownership
-            
+
         Returns:
             True if deleted, False if not found or not owned by user
         """
-        thread = await self.get_thread(thread_id, user_id)
-        if not thread:
-            return False
-        
-        await self.db.delete(thread)
+        stmt = (
+            update(Thread)
+            .where(
+                Thread.id == thread_id,
+                Thread.user_id == user_id,
+                Thread.deleted_at.is_(None),
+            )
+            .values(deleted_at=datetime.utcnow())
+        )
+        result = await self.db.execute(stmt)
+        await self.db.commit()
+        if result.rowcount:
+            await read_cache.invalidate("threads", user_id)
+            await read_router.record_write(user_id)
+            thread_purge_worker.wake()
+        return result.rowcount > 0
+
+    async def delete_threads_older_than(self, user_id: int, older_than: datetime) -> int:
+        """
+        Soft-delete all of a user's threads with no activity since `older_than`.
+
+        Args:
+            user_id: Owner of the threads
+            older_than: Cutoff; naive values are treated as UTC
+
+        Returns:
+            Number of threads deleted
+        """
+        if older_than.tzinfo is not None:
+            older_than = older_than.astimezone(timezone.utc).replace(tzinfo=None)
+        stmt = (
+            update(Thread)
+            .where(
+                Thread.user_id == user_id,
+                Thread.last_message_at < older_than,
+                Thread.deleted_at.is_(None),
+            )
+            .values(deleted_at=datetime.utcnow())
+        )
+        result = await self.db.execute(stmt)
         await self.db.commit()
-        return True
+        if result.rowcount:
+            await read_cache.invalidate("threads", user_id)
+            await read_router.record_write(user_id)
+            thread_purge_worker.wake()
+        return result.rowcount
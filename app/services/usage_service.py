@@ -0,0 +1,239 @@
+"""
+LLM usage accounting: per-turn measurement and per-user daily totals.
+
+Each chat turn gets a `TurnUsage` callback. It is passed to the general
+agent run and inherited by the chef agent that `call_chef_agent` invokes, so
+it sees every model call of the turn and sums prompt/completion tokens and
+model time per (agent, model). The chat service adds the time to first
+token.
+
+At the end of the turn `usage_recorder.record()` folds it into an in-memory
+buffer keyed by (user, UTC day, agent, model). A background task flushes the
+buffer every `settings.usage_flush_seconds` (sooner once it holds
+`settings.usage_flush_max_rows` keys) with one multi-row upsert into
+`llm_usage_daily`. A failed flush keeps its rows for the next attempt, and
+shutdown flushes what is left.
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, fields
+from datetime import date, datetime, timezone
+from typing import Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db_config.db_async_session import async_session
+from app.models.llm_usage import LlmUsage
+
+logger = logging.getLogger(__name__)
+
+# The agent whose answer is streamed to the user; turns and TTFT are counted on it
+STREAMING_AGENT = "general"
+
+
+@dataclass
+class UsageCounters:
+    """Additive usage counters (one `llm_usage_daily` row, or one agent/model of a turn)."""
+
+    turns: int = 0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_seconds: float = 0.0
+    ttft_seconds: float = 0.0
+
+    def add(self, other: "UsageCounters") -> None:
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        """Completion tokens per second of model time."""
+        return self.completion_tokens / self.llm_seconds if self.llm_seconds else None
+
+
+class TurnUsage(BaseCallbackHandler):
+    """Per-turn LLM usage, collected from the callbacks of every model call in the turn."""
+
+    def __init__(self) -> None:
+        self.by_model: dict[tuple[str, str], UsageCounters] = {}
+        self.ttft_seconds: Optional[float] = None
+        self._started: dict[UUID, tuple[float, str, str]] = {}
+        # Model calls of the chef agent finish in tool threads
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs) -> None:
+        metadata = metadata or {}
+        self._started[run_id] = (
+            time.perf_counter(),
+            metadata.get("agent") or "unknown",
+            metadata.get("ls_model_name") or "unknown",
+        )
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        start, agent, model = started
+        call = UsageCounters(llm_calls=1, llm_seconds=time.perf_counter() - start)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    call.prompt_tokens += usage.get("input_tokens", 0)
+                    call.completion_tokens += usage.get("output_tokens", 0)
+                    call.cached_prompt_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0)
+        with self._lock:
+            self.by_model.setdefault((agent, model), UsageCounters()).add(call)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._started.pop(run_id, None)
+
+    def rows(self) -> dict[tuple[str, str], UsageCounters]:
+        """Counters per (agent, model), with the turn and its TTFT on the streaming agent."""
+        with self._lock:
+            rows = {key: UsageCounters(**vars(counters)) for key, counters in self.by_model.items()}
+        streaming = next((key for key in rows if key[0] == STREAMING_AGENT), None)
+        if streaming is not None:
+            rows[streaming].turns = 1
+            rows[streaming].ttft_seconds = self.ttft_seconds or 0.0
+        return rows
+
+    def summary(self) -> str:
+        """One-line description for logs."""
+        parts = [
+            f"{agent}/{model}: {c.prompt_tokens} in ({c.cached_prompt_tokens} cached), "
+            f"{c.completion_tokens} out, {c.llm_calls} call(s)"
+            + (f", {c.tokens_per_second:.0f} tok/s" if c.tokens_per_second else "")
+            for (agent, model), c in self.rows().items()
+        ]
+        ttft = f"{1000 * self.ttft_seconds:.0f} ms" if self.ttft_seconds is not None else "n/a"
+        return f"ttft {ttft}; " + "; ".join(parts)
+
+
+class UsageRecorder:
+    """Buffers per-user daily usage and writes it in batches."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = async_session):
+        self.session_factory = session_factory
+        self._buffer: dict[tuple[int, date, str, str], UsageCounters] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start the flush loop on the running event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="usage-recorder")
+
+    async def stop(self) -> None:
+        """Cancel the flush loop and write what is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Final usage flush failed; %d row(s) lost", len(self._buffer))
+
+    def record(self, user_id: int, usage: TurnUsage) -> None:
+        """Add a finished turn's usage to the buffer."""
+        day = datetime.now(timezone.utc).date()
+        for (agent, model), counters in usage.rows().items():
+            self._buffer.setdefault((user_id, day, agent, model), UsageCounters()).add(counters)
+        if len(self._buffer) >= settings.usage_flush_max_rows:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.usage_flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Usage flush failed; retrying with the next batch")
+
+    async def flush(self) -> int:
+        """
+        Upsert the buffered rows in one statement.
+
+        Returns:
+            Number of rows written
+        """
+        if not self._buffer:
+            return 0
+        batch, self._buffer = self._buffer, {}
+        values = [
+            {"user_id": user_id, "day": day, "agent": agent, "model": model, **vars(counters)}
+            for (user_id, day, agent, model), counters in batch.items()
+        ]
+        stmt = insert(LlmUsage).values(values)
+        counter_columns = [field.name for field in fields(UsageCounters)]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "day", "agent", "model"],
+            set_={
+                **{name: getattr(LlmUsage, name) + getattr(stmt.excluded, name) for name in counter_columns},
+                "updated_at": func.now(),
+            },
+        )
+        try:
+            async with self.session_factory() as db:
+                await db.execute(stmt)
+                await db.commit()
+        except BaseException:
+            # Put the batch back (merged with anything recorded meanwhile)
+            for key, counters in batch.items():
+                self._buffer.setdefault(key, UsageCounters()).add(counters)
+            raise
+        return len(values)
+
+
+class UsageService:
+    """Reads of the per-user daily usage table."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_usage(
+        self,
+        start: date,
+        end: date,
+        user_id: Optional[int] = None,
+        limit: int = 1000,
+    ) -> Sequence[LlmUsage]:
+        """
+        Usage rows between two UTC days (inclusive), newest first.
+
+        Args:
+            start: First day
+            end: Last day
+            user_id: Only this user's rows when given
+            limit: Maximum number of rows
+        """
+        stmt = select(LlmUsage).where(LlmUsage.day >= start, LlmUsage.day <= end)
+        if user_id is not None:
+            stmt = stmt.where(LlmUsage.user_id == user_id)
+        stmt = stmt.order_by(
+            LlmUsage.day.desc(), LlmUsage.user_id, LlmUsage.agent, LlmUsage.model
+        ).limit(limit)
+        return (await self.db.execute(stmt)).scalars().all()
+
+
+# Singleton instance
+usage_recorder = UsageRecorder()
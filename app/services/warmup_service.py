@@ -0,0 +1,178 @@
+"""
+Warm-up of a worker's connections and clients before it takes traffic.
+
+Started once per worker from the lifespan. Steps run concurrently and are
+timed individually; failed steps are retried every
+`settings.warmup_retry_seconds` until all pass, and only then does `/readyz`
+report the worker as ready:
+
+- database: fills the async pool with `settings.warmup_db_connections`
+  connections (plus one for the sync engine used by agent tools) and, when
+  configured, the read replica pool; the replica is optional, so a replica
+  failure is logged and does not hold back readiness
+- jwks: fetches the Auth0 signing keys
+- checkpointer: connects the LangGraph checkpointer (runs its table setup)
+- agents: builds the agent graphs and the remaining registered clients, and
+  loads the tokenizer the chat history is trimmed with
+- openai: opens a keep-alive connection to the model provider
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+
+from app.api.v1.dependencies.auth0 import get_jwks
+from app.core.config import settings
+from app.core.resources import resources
+from app.db_config.db_async_session import engine as async_engine, replica_engine
+from app.db_config.session import engine as sync_engine
+from app.utils.tokens import get_encoding
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUpStep:
+    """Outcome of one warm-up step."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.state = "pending"  # pending | ok | failed | skipped
+        self.seconds: Optional[float] = None
+        self.attempts = 0
+        self.error: Optional[str] = None
+
+
+class WarmUpService:
+    """Runs the warm-up steps for this worker and tracks readiness."""
+
+    def __init__(self) -> None:
+        self._steps: dict[str, Callable[[], Awaitable[None]]] = {
+            "database": self._warm_database,
+            "jwks": self._warm_jwks,
+            "checkpointer": self._warm_checkpointer,
+            "agents": self._warm_agents,
+            "openai": self._warm_openai,
+        }
+        self.steps = {name: WarmUpStep(name) for name in self._steps}
+        self.seconds: Optional[float] = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return all(step.state in ("ok", "skipped") for step in self.steps.values())
+
+    def start(self) -> None:
+        """Start warming up in the background (idempotent); skipped if PRELOAD_RESOURCES is off."""
+        if not settings.preload_resources:
+            for step in self.steps.values():
+                step.state = "skipped"
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="warm-up")
+
+    async def stop(self) -> None:
+        """Cancel a warm-up that is still running."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        start = time.perf_counter()
+        pending = list(self._steps)
+        while True:
+            results = await asyncio.gather(*(self._run_step(name) for name in pending))
+            pending = [name for name, ok in zip(pending, results) if not ok]
+            if not pending:
+                break
+            await asyncio.sleep(settings.warmup_retry_seconds)
+        self.seconds = time.perf_counter() - start
+        logger.info(
+            "Warm-up finished in %.0f ms (%s)",
+            1000 * self.seconds,
+            ", ".join(f"{s.name} {1000 * s.seconds:.0f} ms" for s in self.steps.values()),
+        )
+
+    async def _run_step(self, name: str) -> bool:
+        step = self.steps[name]
+        step.attempts += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._steps[name](), settings.warmup_step_timeout_seconds)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            step.state = "failed"
+            step.error = str(exc) or type(exc).__name__
+            logger.warning("Warm-up step %s failed (attempt %d): %s", name, step.attempts, step.error)
+            return False
+        finally:
+            step.seconds = time.perf_counter() - start
+        step.state = "ok"
+        step.error = None
+        return True
+
+    @staticmethod
+    async def _fill_pool(engine) -> None:
+        async def connect():
+            conn = await engine.connect()
+            await conn.execute(text("SELECT 1"))
+            return conn
+
+        # Hold all connections at once so the pool keeps that many open
+        results = await asyncio.gather(
+            *(connect() for _ in range(settings.warmup_db_connections)),
+            return_exceptions=True,
+        )
+        for conn in results:
+            if not isinstance(conn, BaseException):
+                await conn.close()
+        for error in results:
+            if isinstance(error, BaseException):
+                raise error
+
+    async def _warm_database(self) -> None:
+        await self._fill_pool(async_engine)
+
+        def connect_sync() -> None:
+            with sync_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        await asyncio.to_thread(connect_sync)
+
+        if replica_engine is not None:
+            try:
+                await self._fill_pool(replica_engine)
+            except Exception as exc:
+                logger.warning("Read replica unavailable, reads use the primary: %s", exc)
+
+    async def _warm_jwks(self) -> None:
+        await asyncio.to_thread(get_jwks)
+
+    async def _warm_checkpointer(self) -> None:
+        checkpointer = await asyncio.to_thread(resources.get, "checkpointer")
+        await asyncio.to_thread(checkpointer.conn.execute, "SELECT 1")
+
+    async def _warm_agents(self) -> None:
+        for name in resources.names():
+            await asyncio.to_thread(resources.get, name)
+        # Loads (downloads on first use) the tokenizer the history trim counts with
+        model = resources.get("general_model")
+        await asyncio.to_thread(get_encoding, model.model_name)
+
+    async def _warm_openai(self) -> None:
+        if settings.cassette_mode == "replay":
+            return  # answers come from the cassettes
+        model = await asyncio.to_thread(resources.get, "general_model")
+        # Cheap authenticated call; leaves a TLS connection in the client's pool
+        await asyncio.to_thread(model.root_client.models.retrieve, model.model_name)
+
+
+# Singleton instance
+warmup_service = WarmUpService()
@@ -0,0 +1,45 @@
+"""Weak ETags and conditional GET (`If-None-Match` -> 304) helpers."""
+
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Response, status
+from pydantic_core import to_json
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a weak ETag from cheap version markers (counts, max timestamps, fields).
+
+    Args:
+        parts: Values that change whenever the representation changes; they are
+            hashed as JSON so cached (decoded) and fresh values give the same tag
+
+    Returns:
+        Weak ETag, e.g. W/"3f2a..."
+    """
+    digest = hashlib.blake2b(to_json(parts), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header matches `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the current ETag."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    """Headers for a revalidatable private response."""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
@@ -0,0 +1,64 @@
+"""Sparse fieldsets (`?fields=a,b,c`) for read endpoints."""
+
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ConfigDict, create_model
+
+
+def parse_fields(
+    fields: Optional[str],
+    schema: type[BaseModel],
+    always: Sequence[str] = ("id",),
+) -> Optional[tuple[str, ...]]:
+    """
+    Parse a comma-separated `fields` query parameter against a response schema.
+
+    Args:
+        fields: Raw query value, e.g. "id,name,tags"; None/empty means all fields
+        schema: Full response schema the fields must belong to
+        always: Fields that are always returned (e.g. the primary key)
+
+    Returns:
+        Requested field names in schema order, or None for the full schema
+
+    Raises:
+        HTTPException: 400 if an unknown field is requested
+    """
+    if not fields:
+        return None
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - schema.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    requested.update(always)
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+@lru_cache(maxsize=None)
+def partial_schema(schema: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    """
+    Build (once per field set) a reduced copy of `schema` with only `fields`.
+
+    Field types and constraints are kept; model-level validators are not, so
+    callers must pass data already shaped like the response (column projections
+    labelled with response field names, or ORM objects whose attribute names
+    match).
+    """
+    definitions = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    return create_model(
+        f"{schema.__name__}Partial",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
+
+
+def select_columns(columns: Iterable, fields: Optional[Sequence[str]]) -> list:
+    """Keep only the projection columns whose key is in `fields` (all when None)."""
+    if fields is None:
+        return list(columns)
+    return [column for column in columns if column.key in fields]
@@ -0,0 +1,115 @@
+"""
+Canonical response languages.
+
+`user_language` comes from the chat form as free text ("pt-BR", "português",
+"Portuguese", ...). `normalize_language` maps the spellings of `LANGUAGES` to
+one name each, so the system prompt has one variant per language. Other
+values are passed through, reduced to a short title-cased name (at most
+three words of letters and hyphens), so any language is still honored;
+the prompt quotes them as a language name rather than taking them as text.
+"""
+import unicodedata
+from functools import lru_cache
+from typing import Optional
+
+DEFAULT_LANGUAGE = "English"
+
+# Canonical name: ISO 639-1 / locale codes and native names (casefolded)
+LANGUAGES: dict[str, tuple[str, ...]] = {
+    "English": ("en", "inglês", "ingles", "inglés"),
+    "Portuguese": ("pt", "pt-pt", "português", "portugues", "portuguese (portugal)"),
+    "Brazilian Portuguese": ("pt-br", "português brasileiro", "portugues brasileiro", "português (brasil)",
+                             "portuguese (brazil)"),
+    "Spanish": ("es", "español", "espanol", "espanhol", "castellano"),
+    "French": ("fr", "français", "francais", "francês"),
+    "German": ("de", "deutsch", "alemão"),
+    "Italian": ("it", "italiano"),
+    "Dutch": ("nl", "nederlands"),
+    "Catalan": ("ca", "català"),
+    "Galician": ("gl", "galego"),
+    "Polish": ("pl", "polski"),
+    "Czech": ("cs", "čeština"),
+    "Romanian": ("ro", "română"),
+    "Hungarian": ("hu", "magyar"),
+    "Greek": ("el", "ελληνικά"),
+    "Swedish": ("sv", "svenska"),
+    "Norwegian": ("no", "nb", "nn", "norsk"),
+    "Danish": ("da", "dansk"),
+    "Finnish": ("fi", "suomi"),
+    "Russian": ("ru", "русский"),
+    "Ukrainian": ("uk", "українська"),
+    "Turkish": ("tr", "türkçe"),
+    "Arabic": ("ar", "العربية"),
+    "Hebrew": ("he", "עברית"),
+    "Persian": ("fa", "فارسی"),
+    "Hindi": ("hi", "हिन्दी"),
+    "Bengali": ("bn", "বাংলা"),
+    "Chinese": ("zh", "中文", "简体中文", "繁體中文"),
+    "Japanese": ("ja", "日本語"),
+    "Korean": ("ko", "한국어"),
+    "Vietnamese": ("vi", "tiếng việt"),
+    "Thai": ("th", "ไทย"),
+    "Indonesian": ("id", "bahasa indonesia"),
+    "Malay": ("ms", "bahasa melayu"),
+    "Filipino": ("fil", "tl", "tagalog"),
+    "Swahili": ("sw", "kiswahili"),
+    "Urdu": ("ur", "اردو"),
+    "Tamil": ("ta", "தமிழ்"),
+    "Telugu": ("te", "తెలుగు"),
+    "Marathi": ("mr", "मराठी"),
+    "Gujarati": ("gu", "ગુજરાતી"),
+    "Punjabi": ("pa", "ਪੰਜਾਬੀ"),
+    "Kannada": ("kn", "ಕನ್ನಡ"),
+    "Malayalam": ("ml", "മലയാളം"),
+    "Sinhala": ("si", "සිංහල"),
+    "Nepali": ("ne", "नेपाली"),
+    "Icelandic": ("is", "íslenska"),
+    "Slovak": ("sk", "slovenčina"),
+    "Slovenian": ("sl", "slovenščina"),
+    "Serbian": ("sr", "српски", "srpski"),
+    "Croatian": ("hr", "hrvatski"),
+    "Bosnian": ("bs", "bosanski"),
+    "Bulgarian": ("bg", "български"),
+    "Lithuanian": ("lt", "lietuvių"),
+    "Latvian": ("lv", "latviešu"),
+    "Estonian": ("et", "eesti"),
+    "Albanian": ("sq", "shqip"),
+    "Armenian": ("hy", "հայերեն"),
+    "Georgian": ("ka", "ქართული"),
+    "Azerbaijani": ("az", "azərbaycan"),
+    "Kazakh": ("kk", "қазақ"),
+    "Uzbek": ("uz", "oʻzbek"),
+    "Basque": ("eu", "euskara"),
+    "Welsh": ("cy", "cymraeg"),
+    "Irish": ("ga", "gaeilge"),
+    "Afrikaans": ("af",),
+    "Amharic": ("am", "አማርኛ"),
+}
+
+_ALIASES = {alias: name for name, aliases in LANGUAGES.items() for alias in (name.casefold(), *aliases)}
+
+# Pass-through names: "Haitian Creole", "Norwegian Bokmål", "Runa Simi"
+MAX_LANGUAGE_WORDS = 3
+MAX_LANGUAGE_CHARS = 32
+
+
+def _name_chars(value: str) -> str:
+    """`value` with everything but letters (and their combining marks), spaces and hyphens blanked."""
+    return "".join(
+        ch if ch in " -" or unicodedata.category(ch)[0] in "LM" else " " for ch in value
+    )
+
+
+@lru_cache(maxsize=1024)
+def normalize_language(value: Optional[str]) -> str:
+    """Canonical language for a free-text language name or locale code ("es_MX" -> "Spanish", "urdu" -> "Urdu")."""
+    key = " ".join((value or "").replace("_", "-").casefold().split())
+    if key in _ALIASES:
+        return _ALIASES[key]
+    # Region variants of a known language ("es-mx", "fr-ca")
+    base = key.split("-")[0]
+    if base in _ALIASES:
+        return _ALIASES[base]
+    words = _name_chars(value or "").split()[:MAX_LANGUAGE_WORDS]
+    name = " ".join(words)[:MAX_LANGUAGE_CHARS].strip(" -")
+    return name.title() or DEFAULT_LANGUAGE
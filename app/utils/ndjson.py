@@ -0,0 +1,52 @@
+"""Helpers for reading newline-delimited JSON (NDJSON) request bodies incrementally."""
+
+from typing import AsyncIterator, Optional
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[tuple[int, Optional[bytes]]]:
+    """
+    Split a byte stream into NDJSON lines without buffering the whole body.
+
+    Only the unfinished last line is kept between chunks, and each chunk is
+    scanned once. A line longer than `max_line_bytes` is not kept either: its
+    bytes are skipped up to the next newline.
+
+    Args:
+        chunks: Async iterator of raw body chunks (e.g. Request.stream())
+        max_line_bytes: Longest line accepted
+
+    Yields:
+        Tuples of (1-based line number, raw line bytes), with None instead of
+        the bytes for a line over `max_line_bytes`. Blank lines are skipped
+        but still counted so line numbers match the uploaded file.
+    """
+    parts: list[bytes] = []  # unfinished line
+    size = 0
+    too_long = False
+    line_number = 0
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) >= 0:
+            line_number += 1
+            piece = chunk[start:end]
+            start = end + 1
+            if too_long or size + len(piece) > max_line_bytes:
+                yield line_number, None
+            else:
+                line = b"".join(parts) + piece if parts else piece
+                if line.strip():
+                    yield line_number, line
+            parts, size, too_long = [], 0, False
+        rest = chunk[start:]
+        if rest and not too_long:
+            if size + len(rest) > max_line_bytes:
+                parts, size, too_long = [], 0, True
+            else:
+                parts.append(rest)
+                size += len(rest)
+    if too_long:
+        yield line_number + 1, None
+    elif parts and b"".join(parts).strip():
+        yield line_number + 1, b"".join(parts)
@@ -0,0 +1,35 @@
+"""Single-pass response serialization for large list endpoints."""
+
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_type_adapter(tp: Any) -> TypeAdapter:
+    """Return a cached TypeAdapter for `tp` (building one is expensive)."""
+    return TypeAdapter(tp)
+
+
+def json_response(tp: Any, data: Any, status_code: int = 200) -> Response:
+    """
+    Validate `data` against `tp` once and encode it straight to a JSON response.
+
+    Use with column projections (SQLAlchemy Row objects or dicts) instead of
+    ORM instances: validation reads attributes directly and pydantic-core
+    writes the JSON bytes, skipping FastAPI's second response_model pass.
+    Keep `response_model=` on the route so the OpenAPI schema is unchanged.
+
+    Args:
+        tp: Response type, e.g. list[MessageOut]
+        data: Rows/dicts to validate
+        status_code: HTTP status code
+
+    Returns:
+        Response with an application/json body
+    """
+    adapter = get_type_adapter(tp)
+    content = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return Response(content=content, status_code=status_code, media_type="application/json")
@@ -0,0 +1,109 @@
+"""
+Token counts of chat messages, for fitting history into a prompt budget.
+
+Text is counted with the model's tiktoken encoding (loaded once per model;
+`o200k_base` for models tiktoken does not know). When the encoding cannot be
+loaded (it is downloaded on first use, so e.g. offline) counts fall back to
+an estimate of 4 characters per token. Images count as a fixed
+`IMAGE_TOKENS` whatever the size of their data URL, as OpenAI bills them by
+tile, not by bytes.
+
+Counts of messages with an id (every checkpointed message) are cached: the
+same history is counted again on every turn of a thread.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Optional
+
+from langchain_core.messages import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+# One high-detail 512x512 tile (85 base + 170 per tile)
+IMAGE_TOKENS = 765
+# Role and separators around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+FALLBACK_ENCODING = "o200k_base"
+
+_CACHE_SIZE = 20_000
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> Optional[Any]:
+    """tiktoken encoding for `model`, or None when it cannot be loaded (counts are then estimated)."""
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception as exc:
+        logger.warning("No tokenizer for %s, estimating token counts: %s", model, exc)
+        return None
+
+
+def count_text_tokens(text: str, model: str) -> int:
+    if not text:
+        return 0
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _content_tokens(content: Any, model: str) -> int:
+    if isinstance(content, str):
+        return count_text_tokens(content, model)
+    tokens = 0
+    for block in content or []:
+        if isinstance(block, str):
+            tokens += count_text_tokens(block, model)
+        elif block.get("type") == "text":
+            tokens += count_text_tokens(block.get("text", ""), model)
+        elif block.get("type") in ("image_url", "image"):
+            tokens += IMAGE_TOKENS
+        else:
+            tokens += count_text_tokens(json.dumps(block, default=str), model)
+    return tokens
+
+
+def _message_tokens(message: BaseMessage, model: str) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + _content_tokens(message.content, model)
+    for call in getattr(message, "tool_calls", None) or []:
+        tokens += count_text_tokens(call["name"], model)
+        tokens += count_text_tokens(json.dumps(call["args"], ensure_ascii=False), model)
+    return tokens
+
+
+class MessageTokenCounter:
+    """Per-message token counts, cached by (model, message id) in a bounded LRU."""
+
+    def __init__(self, maxsize: int = _CACHE_SIZE):
+        self.maxsize = maxsize
+        self._cache: OrderedDict[tuple[str, str], int] = OrderedDict()
+        # Agent steps run in executor threads
+        self._lock = threading.Lock()
+
+    def count(self, message: BaseMessage, model: str) -> int:
+        if not message.id:
+            return _message_tokens(message, model)
+        key = (model, message.id)
+        with self._lock:
+            tokens = self._cache.get(key)
+            if tokens is not None:
+                self._cache.move_to_end(key)
+                return tokens
+        tokens = _message_tokens(message, model)
+        with self._lock:
+            self._cache[key] = tokens
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return tokens
+
+
+# Singleton instance
+message_tokens = MessageTokenCounter()
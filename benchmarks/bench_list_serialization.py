@@ -0,0 +1,192 @@
+"""
+Benchmark: list endpoint serialization, before vs after the fast path.
+
+Serves the same 1k-row payloads for messages, threads and recipes through two
+FastAPI routes each:
+
+- before: per-row `model_validate` on (transient) ORM instances, then
+  FastAPI's own `response_model` validation and serialization
+- after: column-projection rows validated once by a cached TypeAdapter and
+  encoded straight to the response (`app.utils.serialization.json_response`)
+
+No database is needed; rows are built in memory so only handler CPU is measured
+(the "before" numbers therefore exclude ORM identity-map loading costs).
+
+Usage:
+    OPENAI_API_KEY=x TAVILY_API_KEY=x python -m benchmarks.bench_list_serialization [--rows 1000] [--seconds 3]
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+import app.models.user  # noqa: F401  (register all mappers)
+from app.models.message import Message
+from app.models.recipe import Recipe as RecipeModel
+from app.models.thread import Thread
+from app.schemas.message import MessageOut
+from app.schemas.recipe import Recipe
+from app.schemas.thread import ThreadOut
+from app.utils.serialization import json_response
+
+
+def _build_messages(n: int, thread_id: uuid.UUID) -> list[dict]:
+    now = datetime(2026, 1, 1)
+    return [
+        dict(
+            id=uuid.uuid4(),
+            content=f"Message {i}: " + "lorem ipsum dolor sit amet " * 8,
+            role="user" if i % 2 == 0 else "assistant",
+            thread_id=thread_id,
+            recipe_data=None,
+            created_at=now + timedelta(seconds=i),
+            updated_at=now + timedelta(seconds=i),
+        )
+        for i in range(n)
+    ]
+
+
+def _as_projection(msg: dict) -> SimpleNamespace:
+    """Shape of a MESSAGE_OUT_COLUMNS row (recipe_data labelled as recipes)."""
+    data = dict(msg)
+    data["recipes"] = data.pop("recipe_data")
+    return SimpleNamespace(**data)
+
+
+def _build_recipes(n: int) -> list[dict]:
+    now = datetime(2026, 1, 1)
+    return [
+        dict(
+            id=uuid.uuid4(),
+            name=f"Recipe {i}",
+            description="A weeknight dinner with pantry staples.",
+            prep_time=10,
+            cook_time=20,
+            total_time=30,
+            servings=4,
+            difficulty="easy",
+            ingredients=[{"name": f"ingredient {j}", "quantity": "100g"} for j in range(10)],
+            instructions=[
+                {"step_number": j + 1, "description": "Stir and simmer.", "time_minutes": 3, "chef_tip": None}
+                for j in range(8)
+            ],
+            tags=["dinner", "quick"],
+            image_url=None,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(n)
+    ]
+
+
+def _build_threads(n: int) -> list[dict]:
+    now = datetime(2026, 1, 1)
+    threads = []
+    for i in range(n):
+        thread_id = uuid.uuid4()
+        threads.append(
+            dict(
+                id=thread_id,
+                user_id=1,
+                created_at=now,
+                updated_at=now,
+                last_message_at=now,
+                message_count=2,
+                last_message_preview="lorem ipsum",
+                messages=_build_messages(2, thread_id),
+            )
+        )
+    return threads
+
+
+def build_app(rows: int) -> FastAPI:
+    api = FastAPI()
+    message_data = _build_messages(rows, uuid.uuid4())
+    messages = [Message(**m) for m in message_data]
+    message_rows = [_as_projection(m) for m in message_data]
+
+    recipe_data = _build_recipes(rows)
+    recipes = [RecipeModel(user_id=1, **r) for r in recipe_data]
+    recipe_rows = [SimpleNamespace(**r) for r in recipe_data]
+
+    thread_data = _build_threads(rows)
+    threads = [
+        Thread(**{**t, "messages": [Message(**m) for m in t["messages"]]})
+        for t in thread_data
+    ]
+    thread_rows = [
+        {**t, "messages": [_as_projection(m) for m in t["messages"]]}
+        for t in thread_data
+    ]
+
+    @api.get("/before/messages", response_model=List[MessageOut])
+    def messages_before():
+        return [MessageOut.model_validate(m) for m in messages]
+
+    @api.get("/after/messages", response_model=List[MessageOut])
+    def messages_after() -> Response:
+        return json_response(List[MessageOut], message_rows)
+
+    @api.get("/before/threads", response_model=List[ThreadOut])
+    def threads_before():
+        return [
+            ThreadOut(
+                id=t.id,
+                user_id=t.user_id,
+                created_at=t.created_at,
+                updated_at=t.updated_at,
+                last_message_at=t.last_message_at,
+                message_count=t.message_count,
+                last_message_preview=t.last_message_preview,
+                messages=[MessageOut.model_validate(m) for m in t.messages],
+            )
+            for t in threads
+        ]
+
+    @api.get("/after/threads", response_model=List[ThreadOut])
+    def threads_after() -> Response:
+        return json_response(List[ThreadOut], thread_rows)
+
+    @api.get("/before/recipes", response_model=List[Recipe])
+    def recipes_before():
+        return recipes
+
+    @api.get("/after/recipes", response_model=List[Recipe])
+    def recipes_after() -> Response:
+        return json_response(List[Recipe], recipe_rows)
+
+    return api
+
+
+def measure(client: TestClient, path: str, seconds: float) -> float:
+    """Return requests per second for `path` over roughly `seconds`."""
+    client.get(path).raise_for_status()  # warm-up
+    count = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        client.get(path)
+        count += 1
+    return count / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    client = TestClient(build_app(args.rows))
+    print(f"{'endpoint':<12}{'before rps':>14}{'after rps':>14}{'speedup':>10}")
+    for name in ("messages", "threads", "recipes"):
+        before = measure(client, f"/before/{name}", args.seconds)
+        after = measure(client, f"/after/{name}", args.seconds)
+        print(f"{name:<12}{before:>14.1f}{after:>14.1f}{after / before:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""
+Micro-benchmarks: the pure-Python code that runs on every chat turn or recipe save.
+
+Cases (realistic fixtures: long histories, large recipes, long token streams):
+
+- chat.stream_turn: the per-chunk parsing loop of `stream_with_persistence`
+  over a long SSE stream (text tokens, a chef tool call and its recipe
+  result); the agent, the database and the executor are replaced so only
+  the loop itself is measured
+- agent.stream_events: `stream_general_agent` building SSE events from the
+  agent's message stream (LangGraph replaced by the recorded stream)
+- middleware.sanitize_history: the `before_agent` trim and orphan removal
+  on a long history with tool-call pairs, ending in a cancelled tool call
+- recipe.normalize_payload: `_normalize_recipe_payload` on a large chef recipe
+- recipe.normalize_times: `normalize_recipe_times` filling times from steps
+- recipe.columns: `_recipe_columns` with pydantic ingredients and steps
+  (`_serialize_ingredients` / `_serialize_instructions`)
+- schema.instruction_steps: `InstructionStep` validation of steps that use
+  the alias keys (`desc`, `text`, `step`, ...)
+
+Each case reports operations per second (median of `--repeat` timed runs of
+at least `--min-time` seconds, GC disabled like `timeit`) and the peak memory
+allocated by one operation (tracemalloc).
+
+As a regression gate, save a baseline on the machine that runs the gate and
+compare later runs with it: the exit code is 1 when a case got slower, or
+allocates more, than `--threshold` percent. Allocation numbers are
+deterministic; ops/sec only compare on the same machine.
+
+Usage:
+    OPENAI_API_KEY=x TAVILY_API_KEY=x python -m benchmarks.bench_micro [--cases chat.,recipe.] [--size 1]
+        [--save-baseline benchmarks/baselines/micro.json] [--baseline benchmarks/baselines/micro.json] [--threshold 15]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from opentelemetry import context as otel_context
+
+from benchmarks.bench_load import _git
+from benchmarks.standins import BENCH_RECIPE
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "micro.json"
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], Any]
+    # Units of work per operation (chunks, messages, steps), for the report
+    items: int = 1
+
+
+# --- fixtures ---------------------------------------------------------------
+
+def large_recipe(steps: int = 30, ingredients: int = 40) -> dict:
+    """Chef-shaped recipe (`time_to_prepare`, no prep/cook/total) of the given size."""
+    return {
+        **BENCH_RECIPE,
+        "name": "Slow-braised short ribs with polenta",
+        "ingredients": [{"name": f"ingredient {i}", "quantity": f"{10 * i} g"} for i in range(ingredients)],
+        "instructions": [
+            {
+                "step_number": i + 1,
+                "description": f"Step {i + 1}: stir, season and simmer gently, scraping the bottom of the pot. " * 2,
+                "time_minutes": 5 + i % 7,
+                "chef_tip": "Taste as you go." if i % 3 == 0 else None,
+            }
+            for i in range(steps)
+        ],
+    }
+
+
+def history(turns: int) -> list:
+    """Checkpointed history: per turn a question, a chef tool call with its result, and an answer."""
+    messages: list = []
+    recipe_json = json.dumps({"recipes": [large_recipe(12, 15)], "source": "web", "reasoning": ""})
+    for i in range(turns):
+        call_id = f"call_{i:06d}"
+        messages += [
+            HumanMessage(content=f"Turn {i}: give me a recipe with what is left in my fridge", id=f"h{i}"),
+            AIMessage(
+                content="",
+                tool_calls=[{"id": call_id, "name": "call_chef_agent", "args": {"message": f"recipe {i}"}}],
+                id=f"a{i}",
+            ),
+            ToolMessage(content=recipe_json, tool_call_id=call_id, name="call_chef_agent", id=f"t{i}"),
+            AIMessage(content="Here is a recipe that uses your leftovers. " * 5, id=f"r{i}"),
+        ]
+    return messages
+
+
+def token_stream(tokens: int) -> list:
+    """What the general agent's `stream(stream_mode=["updates", "messages"])` yields for a recipe turn."""
+    meta = {"langgraph_node": "model"}
+    recipe_json = json.dumps({"recipes": [large_recipe()], "source": "web", "reasoning": ""})
+    call = {"id": "call_bench", "name": "call_chef_agent", "args": {"message": "a recipe with short ribs"}}
+    stream: list = [
+        ("updates", {}),
+        ("messages", (AIMessageChunk(content="", tool_calls=[call]), meta)),
+        ("messages", (ToolMessage(content=recipe_json, tool_call_id="call_bench", name="call_chef_agent"), meta)),
+    ]
+    words = ("Braise ", "the ", "ribs ", "low ", "and ", "slow; ", "the ", "polenta ", "goes ", "in ", "last. ")
+    stream += [("messages", (AIMessageChunk(content=words[i % len(words)]), meta)) for i in range(tokens)]
+    return stream
+
+
+def sse_events(stream: list) -> list[str]:
+    """SSE chunks `stream_general_agent` produces for `stream`."""
+    from app.agents.general_agent import agent
+    from app.agents.general_agent.schemas import GeneralAgentContext
+
+    agent.get_general_agent = lambda: SimpleNamespace(stream=lambda *args, **kwargs: iter(stream))
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    return list(agent.stream_general_agent([], config, GeneralAgentContext()))
+
+
+class InlineExecutor(ThreadPoolExecutor):
+    """Runs submitted calls immediately, so `run_in_executor` costs no thread hop (never starts a thread)."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+# --- cases ------------------------------------------------------------------
+
+def build_cases(size: int) -> list[Case]:
+    from app.agents.general_agent import agent
+    from app.agents.general_agent.middlewares import _sanitize_history
+    from app.agents.general_agent.schemas import GeneralAgentContext
+    from app.agents.general_agent.tools.save_recipe_tool import _normalize_recipe_payload
+    from app.core.config import settings
+    from app.schemas.recipe import IngredientItem, InstructionStep
+    from app.services import chat_service as chat_module
+    from app.services.recipe_service import _recipe_columns
+    from app.services.usage_service import TurnUsage
+    from app.utils.recipe_utils import normalize_recipe_times
+
+    tokens = 2000 * size
+    stream = token_stream(tokens)
+    events = sse_events(stream)
+
+    # stream_with_persistence's loop, with the agent, database and executor replaced
+    class NoDatabase:
+        def __init__(self, db: Any) -> None:
+            pass
+
+        async def create_message(self, **kwargs: Any) -> None:
+            return None
+
+    chat_module.stream_general_agent = lambda messages, config, context: iter(events)
+    chat_module.MessageService = NoDatabase
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(InlineExecutor())
+
+    async def stream_turn() -> None:
+        async for _ in chat_module.chat_service._stream_turn(
+            message="A recipe with short ribs, please",
+            thread_id=str(uuid.uuid4()),
+            user_id=1,
+            db=None,
+            image_base64=None,
+            image_type="image/jpeg",
+            user_language="English",
+            cancel_event=None,
+            trace_context=otel_context.get_current(),
+            usage=TurnUsage(),
+        ):
+            pass
+
+    agent.get_general_agent = lambda: SimpleNamespace(stream=lambda *args, **kwargs: iter(stream))
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    context = GeneralAgentContext()
+
+    def stream_events() -> None:
+        for _ in agent.stream_general_agent([], config, context):
+            pass
+
+    cancelled_call = {"id": "call_cancelled", "name": "call_chef_agent", "args": {"message": "one more"}}
+    state = {
+        "messages": [
+            *history(50 * size),
+            AIMessage(content="", tool_calls=[cancelled_call], id="cancelled"),
+            HumanMessage(content="Never mind, something vegetarian instead", id="latest"),
+        ]
+    }
+
+    recipe = large_recipe(30 * size, 40 * size)
+    timeless = {**recipe, "prep_time": 0, "cook_time": 0, "total_time": 0}
+    typed = {
+        **_normalize_recipe_payload(recipe),
+        "ingredients": [IngredientItem(**item) for item in recipe["ingredients"]],
+        "instructions": [InstructionStep(**step) for step in recipe["instructions"]],
+    }
+    aliases = ("desc", "descr", "step", "text", "instruction", "description")
+    steps = [
+        {
+            "step_number": i + 1,
+            aliases[i % len(aliases)]: f"Step {i + 1}: fold in the herbs and rest the dough.",
+            "time_minutes": i % 9,
+        }
+        for i in range(30 * size)
+    ]
+
+    def validate_steps() -> None:
+        for step in steps:
+            InstructionStep.model_validate(step)
+
+    # The trim alone: the summary update is a model call
+    settings.history_summary_enabled = False
+    return [
+        Case("chat.stream_turn", lambda: loop.run_until_complete(stream_turn()), items=len(events)),
+        Case("agent.stream_events", stream_events, items=len(stream)),
+        Case(
+            "middleware.sanitize_history",
+            lambda: _sanitize_history.before_agent(state, None),
+            items=len(state["messages"]),
+        ),
+        Case("recipe.normalize_payload", lambda: _normalize_recipe_payload(recipe)),
+        Case("recipe.normalize_times", lambda: normalize_recipe_times(timeless)),
+        Case("recipe.columns", lambda: _recipe_columns(typed, 1)),
+        Case("schema.instruction_steps", validate_steps, items=len(steps)),
+    ]
+
+
+# --- measurement ------------------------------------------------------------
+
+def ops_per_second(fn: Callable[[], Any], min_time: float, repeat: int) -> float:
+    """Median ops/sec of `repeat` runs, each looping `fn` for at least `min_time` seconds."""
+    loops = 1
+    while True:  # calibrate like timeit
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - start >= min_time / 5:
+            break
+        loops *= 2
+    rates = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            count, start = 0, time.perf_counter()
+            while (elapsed := time.perf_counter() - start) < min_time:
+                for _ in range(loops):
+                    fn()
+                count += loops
+            rates.append(count / elapsed)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return statistics.median(rates)
+
+
+def allocated_kib(fn: Callable[[], Any]) -> float:
+    """Peak memory allocated by one call of `fn` (tracemalloc), in KiB."""
+    fn()  # caches and lazy imports are not the case's allocations
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - before) / 1024
+
+
+def run(cases: list[Case], min_time: float, repeat: int) -> dict[str, Any]:
+    results = {}
+    for case in cases:
+        rate = ops_per_second(case.run, min_time, repeat)
+        results[case.name] = {
+            "ops_per_sec": rate,
+            "us_per_op": 1e6 / rate,
+            "ns_per_item": 1e9 / rate / case.items,
+            "items": case.items,
+            "alloc_kib": allocated_kib(case.run),
+        }
+        print(
+            f"  {case.name:<40}{rate:>12.1f}{1e6 / rate:>12.1f}{1e9 / rate / case.items:>10.0f}"
+            f"{results[case.name]['alloc_kib']:>12.1f}",
+            flush=True,
+        )
+    return results
+
+
+# --- gate -------------------------------------------------------------------
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> bool:
+    """
+    Print per-case changes against a baseline.
+
+    Returns:
+        True if a case's ops/sec dropped, or its allocations grew, by more than `threshold` percent
+    """
+    print(f"\nbaseline {baseline['meta']['commit'][:12] or '?'} vs current {current['meta']['commit'][:12] or '?'}")
+    if baseline["meta"]["config"] != current["meta"]["config"]:
+        print("warning: the runs used different settings; numbers are not directly comparable")
+    if baseline["meta"]["machine"] != current["meta"]["machine"]:
+        print("warning: the baseline comes from another machine; only allocations are comparable")
+    print(f"  {'case':<40}{'metric':>12}{'baseline':>12}{'current':>12}{'change':>10}")
+    regressed = False
+    for name, stats in current["cases"].items():
+        base = baseline["cases"].get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in (("ops_per_sec", True), ("alloc_kib", False)):
+            old, new = base[metric], stats[metric]
+            if not old:
+                continue
+            change = 100 * (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > threshold else ""
+            regressed |= bool(flag)
+            print(f"  {name:<40}{metric:>12}{old:>12.1f}{new:>12.1f}{change:>+9.1f}%{flag}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default="", help="comma-separated case name prefixes (default: all)")
+    parser.add_argument("--size", type=int, default=1, help="fixture size multiplier")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE), help="store results as the baseline")
+    parser.add_argument("--baseline", nargs="?", const=str(DEFAULT_BASELINE), help="compare with this baseline")
+    parser.add_argument("--threshold", type=float, default=15.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    prefixes = [prefix for prefix in args.cases.split(",") if prefix]
+    cases = [
+        case for case in build_cases(args.size)
+        if not prefixes or any(case.name.startswith(prefix) for prefix in prefixes)
+    ]
+    if not cases:
+        parser.error(f"no case matches {args.cases!r}")
+
+    print(f"  {'case':<40}{'ops/sec':>12}{'us/op':>12}{'ns/item':>10}{'alloc KiB':>12}")
+    results = {
+        "meta": {
+            "commit": _git("rev-parse", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": f"{platform.node()} {platform.machine()} {platform.python_version()}",
+            "config": {"size": args.size},
+        },
+        "cases": run(cases, args.min_time, args.repeat),
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(results, indent=2))
+        print(f"results written to {path}", file=sys.stderr)
+    if args.baseline:
+        baseline_path = Path(args.baseline)
+        if not baseline_path.exists():
+            sys.exit(f"no baseline at {baseline_path}; create one with --save-baseline")
+        if compare(json.loads(baseline_path.read_text()), results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
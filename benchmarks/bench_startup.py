@@ -0,0 +1,100 @@
+"""
+Benchmark: worker startup cost.
+
+Measures, each in fresh subprocesses:
+
+- import: wall time of `import app.main` (no connections are opened and no
+  agents or clients are built at import)
+- first request: from spawning `uvicorn app.main:app` until `GET /healthz`
+  succeeds, with the background warm-up enabled (PRELOAD_RESOURCES=true) and
+  disabled (everything built on first use)
+- ready (with `--ready`): from spawning uvicorn until `GET /readyz` returns
+  200, i.e. DB pool filled, JWKS loaded, checkpointer and agents built and a
+  connection to the model provider open. Needs Postgres, Auth0 and OpenAI.
+
+Usage:
+    OPENAI_API_KEY=x TAVILY_API_KEY=x python -m benchmarks.bench_startup [--runs 5] [--port 8765] [--ready]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import() -> float:
+    """Seconds to import app.main in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_until_ok(port: int, path: str, preload: bool, timeout: float = 60.0) -> float:
+    """Seconds from spawning uvicorn until `path` first returns 200."""
+    env = {**os.environ, "PRELOAD_RESOURCES": "true" if preload else "false"}
+    url = f"http://127.0.0.1:{port}{path}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(url, timeout=1.0).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited before serving a request")
+            time.sleep(0.02)
+        raise TimeoutError(f"no response from {url} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ready", action="store_true", help="also measure time until /readyz passes")
+    args = parser.parse_args()
+
+    results = {
+        "import": [measure_import() for _ in range(args.runs)],
+        "first request (preload)": [
+            measure_until_ok(args.port, "/healthz", preload=True) for _ in range(args.runs)
+        ],
+        "first request (lazy)": [
+            measure_until_ok(args.port, "/healthz", preload=False) for _ in range(args.runs)
+        ],
+    }
+    if args.ready:
+        results["ready"] = [
+            measure_until_ok(args.port, "/readyz", preload=True) for _ in range(args.runs)
+        ]
+    print(f"{'phase':<26}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for phase, samples in results.items():
+        print(
+            f"{phase:<26}{1000 * statistics.median(samples):>12.0f}"
+            f"{1000 * min(samples):>10.0f}{1000 * max(samples):>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
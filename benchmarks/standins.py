@@ -0,0 +1,252 @@
+"""
+Local stand-ins for the external services, for benchmarks that run the real app offline.
+
+- `LocalJwks`: an RSA key pair whose public JWKS is installed as the Auth0
+  signing keys, so tokens signed here pass `verify_jwt` unchanged
+- `FakeChatModel`: a streaming chat model with configurable per-token
+  latency and token usage, scripted from the tools it is bound to
+- `FakeTavilyClient`: a `search()` with configurable latency and a canned
+  result
+
+`install_standins()` replaces the registered `general_model`, `chef_model`,
+`summary_model` and `tavily_client` resources and the JWKS; it must run before the first
+request (before anything builds the real clients). With CASSETTE_MODE set
+the real model and search clients are kept, recording or replaying through
+`app.core.cassettes`.
+"""
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+BENCH_RECIPE = {
+    "name": "Weeknight tomato pasta",
+    "ingredients": [{"name": name, "quantity": quantity} for name, quantity in (
+        ("spaghetti", "400 g"), ("canned tomatoes", "800 g"), ("garlic", "3 cloves"),
+        ("olive oil", "3 tbsp"), ("basil", "1 bunch"), ("parmesan", "40 g"), ("salt", "to taste"),
+    )],
+    "instructions": [
+        {"step_number": i + 1, "description": text, "time_minutes": minutes, "chef_tip": None}
+        for i, (text, minutes) in enumerate((
+            ("Bring a large pot of salted water to a boil.", 10),
+            ("Fry the sliced garlic in olive oil until golden.", 2),
+            ("Add the tomatoes and simmer until thick.", 15),
+            ("Cook the pasta until al dente.", 9),
+            ("Toss the pasta with the sauce, basil and parmesan.", 2),
+        ))
+    ],
+    "time_to_prepare": 30,
+    "image_url": None,
+}
+
+
+class LocalJwks:
+    """RSA signing key standing in for the Auth0 tenant."""
+
+    KID = "bench-key"
+
+    def __init__(self, private_pem: str, jwks: dict):
+        self.private_pem = private_pem
+        self.jwks = jwks
+
+    @classmethod
+    def generate(cls) -> "LocalJwks":
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from jose import jwk
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        public_pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        public = jwk.construct(public_pem, "RS256").to_dict()
+        public.update({"kid": cls.KID, "use": "sig", "alg": "RS256"})
+        public = {key: value.decode() if isinstance(value, bytes) else value for key, value in public.items()}
+        return cls(private_pem, {"keys": [public]})
+
+    def save(self, path: Path) -> None:
+        path.write_text(json.dumps({"private_pem": self.private_pem, "jwks": self.jwks}))
+
+    @classmethod
+    def load(cls, path: Path) -> "LocalJwks":
+        data = json.loads(path.read_text())
+        return cls(data["private_pem"], data["jwks"])
+
+    def token(self, sub: str, domain: str, audience: str, ttl: int = 3600) -> str:
+        """Access token for user `sub`, with the claims `get_current_user` needs to create the user."""
+        from jose import jwt
+
+        now = int(time.time())
+        claims = {
+            "sub": sub,
+            "iss": f"https://{domain}/",
+            "aud": audience,
+            "iat": now,
+            "exp": now + ttl,
+            "email": f"{sub.split('|')[-1]}@bench.local",
+            "name": "Bench User",
+        }
+        return jwt.encode(claims, self.private_pem, algorithm="RS256", headers={"kid": self.KID})
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Streaming chat model replaying a fixed script with configurable timing.
+
+    - bound to `call_chef_agent` (general agent): asks the chef agent when the
+      user's last message mentions "recipe", otherwise answers in text
+    - bound to `RecipeResponse` (chef agent, structured output as a tool):
+      searches once with `web_search`, then returns `BENCH_RECIPE`
+    - otherwise (or after a tool result): streams `tokens` text tokens
+
+    Every streamed token waits `token_latency` seconds; the first waits
+    `first_token_latency` instead. Usage metadata is attached to the last chunk.
+    """
+
+    model_name: str = "bench-fake"
+    tokens: int = 50
+    token_latency: float = 0.02
+    first_token_latency: float = 0.3
+    prompt_tokens_per_message: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "bench-fake"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _plan(self, messages: list[BaseMessage], tools: Optional[list[dict]]) -> AIMessage:
+        names = {tool["function"]["name"] for tool in tools or []}
+        last = messages[-1] if messages else None
+        if "RecipeResponse" in names:
+            if not any(isinstance(m, ToolMessage) for m in messages) and "web_search" in names:
+                return self._tool_call("web_search", {"text_query": "quick tomato pasta"})
+            return self._tool_call("RecipeResponse", {"recipes": [BENCH_RECIPE], "source": "bench", "reasoning": ""})
+        if "call_chef_agent" in names and isinstance(last, HumanMessage) and "recipe" in str(last.content).lower():
+            return self._tool_call("call_chef_agent", {"message": str(last.content)})
+        words = ("Here ", "is ", "a ", "quick ", "and ", "tasty ", "idea ", "for ", "tonight. ")
+        return AIMessage(content="".join(words[i % len(words)] for i in range(self.tokens)))
+
+    @staticmethod
+    def _tool_call(name: str, args: dict) -> AIMessage:
+        return AIMessage(content="", tool_calls=[{"id": f"call_{uuid.uuid4().hex[:12]}", "name": name, "args": args}])
+
+    def _usage(self, messages: list[BaseMessage], output_tokens: int) -> dict:
+        prompt_tokens = self.prompt_tokens_per_message * len(messages)
+        return {"input_tokens": prompt_tokens, "output_tokens": output_tokens, "total_tokens": prompt_tokens + output_tokens}
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs) -> ChatResult:
+        time.sleep(self.first_token_latency)
+        message = self._plan(messages, tools)
+        message.usage_metadata = self._usage(messages, len(message.content.split()) if message.content else 20)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        tools: Optional[list[dict]] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._plan(messages, tools)
+        time.sleep(self.first_token_latency)
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"id": call["id"], "name": call["name"], "args": json.dumps(call["args"]), "index": i}
+                    for i, call in enumerate(message.tool_calls)
+                ],
+                usage_metadata=self._usage(messages, 20),
+            ))
+            return
+        pieces = [piece for piece in message.content.split(" ") if piece]
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(self.token_latency)
+            last = i == len(pieces) - 1
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=piece + ("" if last else " "),
+                usage_metadata=self._usage(messages, len(pieces)) if last else None,
+            ))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class FakeTavilyClient:
+    """Tavily stand-in: `search()` waits `latency` seconds and returns canned results."""
+
+    def __init__(self, latency: float = 0.4):
+        self.latency = latency
+
+    def search(self, query: str, **kwargs: Any) -> dict:
+        time.sleep(self.latency)
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"{BENCH_RECIPE['name']} ({i})",
+                    "url": f"https://recipes.bench.local/{i}",
+                    "content": "Simmer tomatoes with garlic and olive oil; toss with pasta. " * 4,
+                    "score": 0.9 - i / 10,
+                }
+                for i in range(5)
+            ],
+            "response_time": self.latency,
+        }
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def install_standins(jwks_path: Optional[Path] = None) -> None:
+    """
+    Replace the model, search and JWKS dependencies of this process with stand-ins.
+
+    Timing comes from BENCH_TOKENS, BENCH_TOKEN_LATENCY_MS,
+    BENCH_FIRST_TOKEN_MS and BENCH_SEARCH_LATENCY_MS; the signing key from
+    `jwks_path` (default: BENCH_JWKS_FILE). Models and search are left to the
+    cassettes when CASSETTE_MODE is set.
+    """
+    # Imported for their side effect: they register the real model and agent
+    # factories, which must exist before the stand-ins below replace them
+    import app.agents.chef_agent.agent  # noqa: F401
+    import app.agents.general_agent.agent  # noqa: F401
+    from app.api.v1.dependencies import auth0
+    from app.core.config import settings
+    from app.core.resources import resources
+
+    auth0._jwks_cache = LocalJwks.load(jwks_path or Path(os.environ["BENCH_JWKS_FILE"])).jwks
+    if settings.cassette_mode != "off":
+        return
+
+    def model() -> FakeChatModel:
+        return FakeChatModel(
+            tokens=int(_env_float("BENCH_TOKENS", 50)),
+            token_latency=_env_float("BENCH_TOKEN_LATENCY_MS", 20) / 1000,
+            first_token_latency=_env_float("BENCH_FIRST_TOKEN_MS", 300) / 1000,
+        )
+
+    resources.register("general_model", model)
+    resources.register("chef_model", model)
+    resources.register("summary_model", model)
+    resources.register(
+        "tavily_client", lambda: FakeTavilyClient(latency=_env_float("BENCH_SEARCH_LATENCY_MS", 400) / 1000)
+    )
@@ -0,0 +1,8 @@
+import os
+
+# Settings are read at import time; required values get placeholders and
+# Redis is the in-process stand-in
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+os.environ.setdefault("REDIS_URL", "memory://")
+os.environ.setdefault("PRELOAD_RESOURCES", "false")
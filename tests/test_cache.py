@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core import cache as cache_module
+from app.core.cache import ReadCache
+from app.core.config import settings
+from app.core.redis import InMemoryRedis
+
+
+class DownRedis:
+    """Redis client whose every command fails as if the server were unreachable."""
+
+    def __getattr__(self, name):
+        async def fail(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+        return fail
+
+    def pipeline(self, *args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = InMemoryRedis()
+    monkeypatch.setattr(cache_module, "get_redis", lambda: client)
+    monkeypatch.setattr(cache_module, "get_sync_redis", lambda: client)
+    monkeypatch.setattr(settings, "cache_enabled", True)
+    return client
+
+
+class Loader:
+    """Counts calls and returns the current rows of a fake table."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return list(self.rows)
+
+
+def test_miss_then_hit(redis):
+    cache = ReadCache()
+    load = Loader(["a"])
+
+    assert asyncio.run(cache.get_or_load("recipes", 1, "list", load)) == ["a"]
+    assert asyncio.run(cache.get_or_load("recipes", 1, "list", load)) == ["a"]
+    assert load.calls == 1
+    assert (cache.stats.misses, cache.stats.hits) == (1, 1)
+
+
+def test_invalidate_drops_every_variant(redis):
+    cache = ReadCache()
+    load = Loader(["a"])
+    asyncio.run(cache.get_or_load("recipes", 1, "list", load))
+    asyncio.run(cache.get_or_load("recipes", 1, "version", load))
+
+    load.rows = ["a", "b"]
+    asyncio.run(cache.invalidate("recipes", 1))
+
+    assert asyncio.run(cache.get_or_load("recipes", 1, "list", load)) == ["a", "b"]
+    assert asyncio.run(cache.get_or_load("recipes", 1, "version", load)) == ["a", "b"]
+    assert load.calls == 4
+
+
+def test_invalidate_sync(redis):
+    cache = ReadCache()
+    load = Loader(["a"])
+    asyncio.run(cache.get_or_load("recipes", 1, "list", load))
+
+    load.rows = ["b"]
+    cache.invalidate_sync("recipes", 1)
+
+    assert asyncio.run(cache.get_or_load("recipes", 1, "list", load)) == ["b"]
+
+
+def test_load_racing_a_write_is_not_stored(redis):
+    """A load that read rows before a write must not cache them after the write's invalidation."""
+    cache = ReadCache()
+    table = ["old"]
+
+    async def racing_load():
+        rows = list(table)  # reads the old rows...
+        table[:] = ["new"]  # ...then a write commits and invalidates
+        await cache.invalidate("recipes", 1)
+        return rows
+
+    assert asyncio.run(cache.get_or_load("recipes", 1, "list", racing_load)) == ["old"]
+    assert cache.stats.discarded == 1
+    assert asyncio.run(cache.get_or_load("recipes", 1, "list", Loader(table))) == ["new"]
+
+
+def test_later_variants_do_not_extend_the_ttl(redis):
+    cache = ReadCache()
+    asyncio.run(cache.get_or_load("recipes", 1, "list", Loader(["a"]), ttl=10))
+    first_deadline = redis._expires[cache.key("recipes", 1)]
+
+    asyncio.run(cache.get_or_load("recipes", 1, "version", Loader(["a"]), ttl=10))
+
+    assert redis._expires[cache.key("recipes", 1)] == first_deadline
+
+
+def test_failed_load_releases_the_lock(redis):
+    cache = ReadCache()
+
+    async def failing_load():
+        raise RuntimeError("database error")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_load("recipes", 1, "list", failing_load))
+
+    assert asyncio.run(redis.get(f"{cache.key('recipes', 1)}:lock:list")) is None
+
+
+def test_redis_down_falls_back_to_the_loader(monkeypatch):
+    monkeypatch.setattr(cache_module, "get_redis", lambda: DownRedis())
+    monkeypatch.setattr(settings, "cache_enabled", True)
+    cache = ReadCache()
+    load = Loader(["a"])
+
+    assert asyncio.run(cache.get_or_load("recipes", 1, "list", load)) == ["a"]
+    assert cache.stats.errors == 1
+    # Redis use is paused: the next lookup goes straight to the loader
+    assert asyncio.run(cache.get_or_load("recipes", 1, "list", load)) == ["a"]
+    assert cache.stats.bypassed == 1
+    assert load.calls == 2
+    asyncio.run(cache.invalidate("recipes", 1))  # does not raise
+
+
+def test_prometheus_metrics_by_namespace(redis):
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, {"namespace": "metrics-test", **labels}) or 0
+
+    cache = ReadCache()
+    table = ["old"]
+
+    async def racing_load():
+        rows = list(table)
+        await cache.invalidate("metrics-test", 2)
+        return rows
+
+    asyncio.run(cache.get_or_load("metrics-test", 1, "list", Loader(["a"])))
+    asyncio.run(cache.get_or_load("metrics-test", 1, "list", Loader(["a"])))
+    asyncio.run(cache.get_or_load("metrics-test", 2, "list", racing_load))
+
+    assert sample("chef_cache_lookups_total", result="hit") == 1
+    assert sample("chef_cache_lookups_total", result="miss") == 2
+    assert sample("chef_cache_stores_total", outcome="stored") == 1
+    assert sample("chef_cache_stores_total", outcome="fenced") == 1
+    assert sample("chef_cache_load_seconds_count") == 2
+    assert sample("chef_cache_lookup_seconds_count") == 3
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+from app.api.v1.routers.chat import ChatStreamResponse
+from app.core.config import settings
+from app.core.rate_limit import ChatLimiter
+from app.core.stream_bus import StreamBus
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "chat_concurrency_limit_enabled", True)
+    monkeypatch.setattr(settings, "chat_max_concurrent_streams", 1)
+
+
+async def disconnected(message):
+    raise OSError("client disconnected")
+
+
+async def receive():
+    return {"type": "http.disconnect"}
+
+
+def test_cleanup_runs_when_the_body_never_starts(limits):
+    """A client gone before the first chunk must not keep the stream slot or the thread's turn."""
+    limiter, bus = ChatLimiter(), StreamBus()
+
+    async def run():
+        lease = await limiter.acquire(1)
+        turn = await bus.start_turn("thread-1", 1)
+
+        async def body():
+            yield "data: never sent\n\n"
+
+        response = ChatStreamResponse(lease.wrap(turn.relay(body())), cleanup=[turn.finish, lease.release])
+        with pytest.raises(ClientDisconnect):
+            await response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, disconnected)
+        assert turn.done
+        assert await bus.follow("thread-1", 1) is None
+        # The slot is free again
+        await (await limiter.acquire(1)).release()
+
+    asyncio.run(run())
+    assert limiter.stats.active_streams == 0
@@ -0,0 +1,108 @@
+import uuid
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+
+from app.agents.general_agent import middlewares
+from app.agents.general_agent import summary
+from app.agents.general_agent.summary import HistoryFolder, cap_backlog, transcript_entry
+from app.core.config import settings
+from app.core.resources import resources
+
+
+class FailingModel(FakeListChatModel):
+    def _call(self, *args, **kwargs):
+        raise ConnectionError("Connection error")
+
+
+@pytest.fixture
+def folder(monkeypatch):
+    folder = HistoryFolder()
+    monkeypatch.setattr(middlewares, "history_folder", folder)
+    monkeypatch.setattr(middlewares, "_thread_id", lambda: "thread-1")
+    monkeypatch.setattr(settings, "history_summary_enabled", True)
+    monkeypatch.setattr(settings, "history_token_budget", 200)
+    monkeypatch.setattr(settings, "history_summary_batch_tokens", 100)
+    monkeypatch.setitem(resources._instances, "general_model", FakeListChatModel(responses=["ok"]))
+    return folder
+
+
+@pytest.fixture
+def summary_model(monkeypatch):
+    def use(model):
+        monkeypatch.setitem(resources._instances, "summary_model", model)
+
+    return use
+
+
+def history(turns):
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(f"h{i} I am vegan " * 10, id=uuid.uuid4().hex))
+        messages.append(AIMessage(f"a{i} noted " * 10, id=uuid.uuid4().hex))
+    return messages
+
+
+def apply(state, update):
+    """State after a before_agent update, as the graph would merge it."""
+    removed = {m.id for m in update.get("messages", []) if isinstance(m, RemoveMessage)}
+    state = {**state, **{k: v for k, v in update.items() if k != "messages"}}
+    state["messages"] = [m for m in state["messages"] if m.id not in removed]
+    return state
+
+
+def wait(folder):
+    for fold in list(folder._folds.values()):
+        fold.future.exception()
+
+
+def test_failed_summary_keeps_evicted_messages(folder, summary_model):
+    summary_model(FailingModel(responses=[]))
+    state = {"messages": history(10), "history_summary": "old"}
+
+    state = apply(state, middlewares._sanitize_history.before_agent(state, None))
+    evicted = list(state["history_backlog"])
+    assert evicted and evicted[0].startswith("User: h0 I am vegan")
+    wait(folder)
+
+    # The fold failed: the summary is unchanged and nothing evicted is lost
+    state["messages"].append(HumanMessage("next", id=uuid.uuid4().hex))
+    state = apply(state, middlewares._sanitize_history.before_agent(state, None) or {})
+    assert state["history_summary"] == "old"
+    assert state["history_backlog"][: len(evicted)] == evicted
+
+
+def test_finished_summary_is_applied_on_the_next_turn(folder, summary_model):
+    summary_model(FakeListChatModel(responses=["vegan"]))
+    state = {"messages": history(10), "history_summary": "old"}
+
+    state = apply(state, middlewares._sanitize_history.before_agent(state, None))
+    assert state["history_summary"] == "old"  # not on this turn's critical path
+    wait(folder)
+
+    state["messages"].append(HumanMessage("next", id=uuid.uuid4().hex))
+    state = apply(state, middlewares._sanitize_history.before_agent(state, None) or {})
+    assert state["history_summary"] == "vegan"
+    assert state["history_backlog"] == []
+
+
+def test_backlog_is_a_text_transcript():
+    image = HumanMessage([
+        {"type": "text", "text": "what can I cook with this?"},
+        {"type": "image_url", "image_url": {"url": "data:image/png;base64," + "A" * 100_000}},
+    ])
+    assert transcript_entry(image) == "User: [image] what can I cook with this?"
+    call = AIMessage("", tool_calls=[{"name": "web_search", "args": {"query": "tofu"}, "id": "c1"}])
+    assert transcript_entry(call) == 'Assistant called web_search: {"query": "tofu"}'
+    assert len(transcript_entry(AIMessage("x" * 100_000))) < 3000
+
+
+def test_backlog_is_capped_by_tokens(monkeypatch):
+    monkeypatch.setattr(summary, "MAX_BACKLOG_TOKENS", 50)
+    backlog = [f"User: message {i} " + "word " * 10 for i in range(20)]
+
+    kept, dropped = cap_backlog(backlog)
+
+    assert kept == backlog[dropped:] and dropped > 0
+    assert kept[-1] == backlog[-1]
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.core.rate_limit import ChatLimiter
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "chat_rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "chat_rate_limit_burst", 2)
+    monkeypatch.setattr(settings, "chat_rate_limit_per_minute", 1)
+    monkeypatch.setattr(settings, "chat_concurrency_limit_enabled", True)
+    monkeypatch.setattr(settings, "chat_max_concurrent_streams", 1)
+
+
+def test_concurrency_rejection_does_not_spend_a_token(limits):
+    limiter = ChatLimiter()
+    rejected = sample("chef_chat_limit_rejections_total", reason="concurrency")
+
+    async def run():
+        lease = await limiter.acquire(1)
+        with pytest.raises(HTTPException) as exc:
+            await limiter.acquire(1)
+        assert exc.value.status_code == 429
+        await lease.release()
+        # The rejected request left the second token of the burst
+        await (await limiter.acquire(1)).release()
+
+    asyncio.run(run())
+    assert sample("chef_chat_limit_rejections_total", reason="concurrency") == rejected + 1
+
+
+def test_metrics_count_rejections_and_leases(limits):
+    limiter = ChatLimiter()
+    leases = sample("chef_chat_stream_leases")
+    rejected = sample("chef_chat_limit_rejections_total", reason="rate")
+
+    async def run():
+        await (await limiter.acquire(1)).release()
+        lease = await limiter.acquire(2)
+        assert sample("chef_chat_stream_leases") == leases + 1
+        await lease.release()
+        await lease.release()  # releasing twice counts once
+        await (await limiter.acquire(1)).release()
+        with pytest.raises(HTTPException):
+            await limiter.acquire(1)
+
+    asyncio.run(run())
+    assert sample("chef_chat_stream_leases") == leases
+    assert sample("chef_chat_limit_rejections_total", reason="rate") == rejected + 1